@@ -0,0 +1,37 @@
+import argparse
+from motor_kpis import AtualizadorDados, criar_servidor
+
+# API JSON local com os totais dos cartões do painel:
+#   python api_kpis.py --porta 8502
+#   curl "http://127.0.0.1:8502/fotovoltaico?ano=2024&mes=3"
+#   curl "http://127.0.0.1:8502/onibus?tipo=Urbano&inicio=2024-01-01&fim=2024-06-30"
+#   python api_kpis.py --planilha campi/   (uma planilha por campus)
+#   curl "http://127.0.0.1:8502/fotovoltaico?site=Belém&ano=2024"
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve os KPIs da planilha em JSON.")
+    parser.add_argument("--planilha", default="kpis_energia_por_unidade.xlsx",
+                        help="Planilha, pasta de planilhas (uma por campus) ou manifesto JSON de campi")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8502)
+    parser.add_argument("--intervalo", type=float, default=2.0, help="Segundos entre verificações da planilha")
+    parser.add_argument("--cache", type=int, default=1024, help="Respostas mantidas no LRU")
+    parser.add_argument("--registrar", action="store_true", help="Registra cada requisição no stderr")
+    args = parser.parse_args()
+
+    # Sem pasta de entrada: os lotes são ingeridos pelo painel, e a API só
+    # acompanha a planilha e os incrementos
+    atualizador = AtualizadorDados(args.planilha, intervalo=args.intervalo).iniciar()
+    atualizador.atual()
+    servidor = criar_servidor(atualizador, args.host, args.porta, args.cache, args.registrar)
+    print(f"API de KPIs em http://{args.host}:{args.porta}/ (versão {atualizador.atual().versao})")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        atualizador.parar()
+
+if __name__ == "__main__":
+    main()
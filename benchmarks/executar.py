@@ -0,0 +1,169 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+import pandas as pd
+from motor_kpis import (
+    cache, dados, ler_aba, ler_frota, totais_frota, gerar_pdf_kpis, normalizar, modelo_previsao, METRICAS_FV,
+    METODOS_NORMALIZACAO,
+)
+from motor_kpis.esquemas import ESQUEMA_FOTOVOLTAICO
+from benchmarks.planilha_sintetica import gerar_planilha
+
+# Benchmark das etapas do painel sobre planilhas sintéticas:
+#   python -m benchmarks.executar --unidades 10 100 --anos 5 --resolucao mensal diaria \
+#       --saida bench.json --comparar bench_anterior.json
+# Cada etapa é repetida e registrada em segundos (mínimo e mediana).
+
+def cronometrar(func, repeticoes, preparar=None):
+    tempos = []
+    for _ in range(repeticoes):
+        if preparar is not None:
+            preparar()
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return {"min": min(tempos), "mediana": statistics.median(tempos), "repeticoes": repeticoes}
+
+def _esquecer(pasta_cache=None):
+    # Esquece o que está em memória e, com pasta_cache, também o cache em disco
+    dados.esquecer_conjuntos()
+    cache.esquecer_assinaturas()
+    if pasta_cache is not None:
+        shutil.rmtree(pasta_cache, ignore_errors=True)
+
+def medir_cenario(xlsx_path, pasta_cache, repeticoes):
+    from figuras import construir, INDICADORES_RADAR
+    cache.CACHE_DIR = pasta_cache
+    frio = lambda: _esquecer(pasta_cache)
+    etapas = {}
+
+    etapas["leitura_excel"] = cronometrar(lambda: pd.read_excel(xlsx_path, sheet_name=None), repeticoes)
+    etapas["leitura_esquema"] = cronometrar(lambda: dados.ler_planilha(xlsx_path), repeticoes)
+    etapas["carregar_dados_fotovoltaico"] = cronometrar(
+        lambda: dados.carregar_dados_fotovoltaico(xlsx_path), repeticoes, frio)
+    etapas["carregar_dados_sistema"] = cronometrar(
+        lambda: dados.carregar_dados_sistema(xlsx_path), repeticoes, frio)
+    etapas["leitura_frota"] = cronometrar(lambda: ler_frota(xlsx_path, threads=1), repeticoes)
+    etapas["leitura_frota_threads"] = cronometrar(lambda: ler_frota(xlsx_path), repeticoes)
+    etapas["carregar_dados_frota"] = cronometrar(lambda: dados.carregar_dados_frota(xlsx_path), repeticoes, frio)
+    etapas["carregar_dados_frio"] = cronometrar(lambda: dados.carregar_dados(xlsx_path), repeticoes, frio)
+    etapas["carregar_dados_cache_disco"] = cronometrar(
+        lambda: dados.carregar_dados(xlsx_path), repeticoes, lambda: _esquecer())
+    etapas["carregar_dados_memoria"] = cronometrar(lambda: dados.carregar_dados(xlsx_path), repeticoes)
+
+    conjunto = dados.carregar_dados(xlsx_path)
+    larga = ler_aba(xlsx_path, ESQUEMA_FOTOVOLTAICO)
+    etapas["melt"] = cronometrar(lambda: dados.fundir_fotovoltaico(larga), repeticoes)
+    longa = dados.fundir_fotovoltaico(larga)
+    etapas["colunas_derivadas"] = cronometrar(lambda: dados.derivar_fotovoltaico(longa.copy()), repeticoes)
+    fv, cubo = conjunto.fotovoltaico, conjunto.cubo
+    etapas["montar_cubo"] = cronometrar(lambda: dados.montar_cubo(fv, conjunto.sistema, conjunto.fatores), repeticoes)
+
+    anos = sorted(fv["Ano"].dropna().unique().astype(int).tolist())
+    ano = anos[-1]
+    etapas["pivot_mensal_cubo"] = cronometrar(
+        lambda: [cubo.pivot_mensal(metrica, ano) for metrica in METRICAS_FV], repeticoes)
+    etapas["pivot_table_bruto"] = cronometrar(
+        lambda: [fv[fv["Ano"] == ano].pivot_table(index="MesNum", columns="Unidade", values=metrica,
+                                                   aggfunc="sum", observed=True).fillna(0) for metrica in METRICAS_FV],
+        repeticoes)
+    etapas["groupby_tempo_unidade"] = cronometrar(
+        lambda: fv.groupby(["Tempo", "Unidade"], observed=True)[METRICAS_FV].sum().groupby("Tempo").sum(), repeticoes)
+    etapas["totais_unidade"] = cronometrar(lambda: cubo.totais_unidade(ano), repeticoes)
+    etapas["totais_frota"] = cronometrar(lambda: totais_frota(conjunto.frota, por="Veiculo"), repeticoes)
+    etapas["comparativo"] = cronometrar(lambda: cubo.comparativo(anos), repeticoes)
+    etapas["ajuste_previsao"] = cronometrar(lambda: modelo_previsao(cubo, conjunto.fatores), repeticoes)
+    etapas["normalizacao_radar"] = cronometrar(
+        lambda: [normalizar(cubo.comparativo(anos), INDICADORES_RADAR, metodo) for metodo in METODOS_NORMALIZACAO],
+        repeticoes)
+    etapas["figura_empilhado"] = cronometrar(
+        lambda: construir("empilhado", conjunto, metrica="Geração (kWh)", ano=ano), repeticoes)
+    etapas["figura_radar"] = cronometrar(lambda: construir("radares", conjunto, anos=tuple(anos)), repeticoes)
+    etapas["gerar_pdf_kpis"] = cronometrar(lambda: gerar_pdf_kpis(fv[fv["Ano"] == ano], str(ano)), repeticoes)
+    return {
+        "linhas_fotovoltaico": len(fv),
+        "memoria_fotovoltaico_mb": fv.memory_usage(deep=True).sum() / 2**20,
+        "etapas": etapas,
+    }
+
+def commit_atual():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+def _comparar(resultados, arquivo_anterior):
+    with open(arquivo_anterior, encoding="utf-8") as f:
+        anteriores = {json.dumps(r["cenario"], sort_keys=True): r for r in json.load(f)["resultados"]}
+    for resultado in resultados:
+        anterior = anteriores.get(json.dumps(resultado["cenario"], sort_keys=True))
+        if anterior is None:
+            continue
+        print(f"\n{resultado['cenario']} (atual / anterior)")
+        for etapa, medida in resultado["etapas"].items():
+            if etapa in anterior["etapas"]:
+                razao = medida["min"] / max(anterior["etapas"][etapa]["min"], 1e-9)
+                print(f"  {etapa:<30} {medida['min']:9.4f}s  x{razao:5.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Mede as etapas do painel em planilhas sintéticas.")
+    parser.add_argument("--unidades", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--anos", type=int, nargs="+", default=[5])
+    parser.add_argument("--resolucao", nargs="+", default=["mensal"], choices=["mensal", "diaria"])
+    parser.add_argument("--veiculos", type=int, help="Abas de veículos (padrão: Rodoviário e Urbano)")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--pasta", default=os.path.join(tempfile.gettempdir(), "kpis_bench"),
+                        help="Onde ficam as planilhas sintéticas (reaproveitadas entre execuções)")
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados (padrão: stdout)")
+    parser.add_argument("--mapear", action="store_true",
+                        help="Cache Feather sem compressão lido por memory map (KPIS_MMAP=1)")
+    parser.add_argument("--comparar", help="JSON de uma execução anterior para comparação")
+    args = parser.parse_args()
+
+    os.makedirs(args.pasta, exist_ok=True)
+    cache.MAPEAR_CACHE = cache.MAPEAR_CACHE or args.mapear
+    resultados = []
+    for unidades, anos, resolucao in itertools.product(args.unidades, args.anos, args.resolucao):
+        cenario = {"unidades": unidades, "anos": anos, "resolucao": resolucao}
+        nome = f"sintetica_{unidades}u_{anos}a_{resolucao}"
+        if args.veiculos:
+            cenario["veiculos"] = args.veiculos
+            nome += f"_{args.veiculos}v"
+        xlsx_path = os.path.join(args.pasta, nome + ".xlsx")
+        if not os.path.exists(xlsx_path):
+            gerar_planilha(xlsx_path, unidades, anos, resolucao, veiculos=args.veiculos)
+        print(f"Cenário {cenario}...", flush=True)
+        medidas = medir_cenario(xlsx_path, os.path.join(args.pasta, "cache"), args.repeticoes)
+        resultados.append({"cenario": cenario, **medidas})
+
+    relatorio = {
+        "meta": {
+            "data": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "commit": commit_atual(),
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "cpus": os.cpu_count(),
+            "cache_mapeado": cache.MAPEAR_CACHE,
+        },
+        "resultados": resultados,
+    }
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=1)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+    if args.comparar:
+        _comparar(resultados, args.comparar)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+import argparse
+import itertools
+import json
+import os
+import shutil
+import sys
+import tempfile
+import pandas as pd
+from motor_kpis import cache, dados, exportar_abas, motores_disponiveis
+from benchmarks.executar import cronometrar, commit_atual
+from benchmarks.planilha_sintetica import gerar_planilha
+
+# Paridade e tempo de leitura de cada motor (calamine, openpyxl, parquet, csv):
+#   python -m benchmarks.motores --unidades 10 100 --resolucao mensal diaria --saida motores.json
+# Todas as abas lidas por cada motor são comparadas com as do openpyxl; uma
+# diferença faz o comando terminar com erro.
+
+def _diferenca(lido, referencia):
+    larga, quadros = lido
+    larga_ref, quadros_ref = referencia
+    try:
+        pd.testing.assert_frame_equal(larga, larga_ref)
+        for nome, df in quadros_ref.items():
+            pd.testing.assert_frame_equal(quadros[nome], df, obj=nome)
+    except AssertionError as e:
+        return str(e)
+    return None
+
+def medir_motores(xlsx_path, repeticoes):
+    referencia = dados.ler_planilha(xlsx_path, "openpyxl")
+    motores = {}
+    for motor in motores_disponiveis():
+        if motor in ("parquet", "csv"):
+            exportar_abas(xlsx_path, motor)
+        motores[motor] = {
+            **cronometrar(lambda: dados.ler_planilha(xlsx_path, motor), repeticoes),
+            "diferenca": _diferenca(dados.ler_planilha(xlsx_path, motor), referencia),
+        }
+    return motores
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara os motores de leitura da planilha.")
+    parser.add_argument("--unidades", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--anos", type=int, nargs="+", default=[5])
+    parser.add_argument("--resolucao", nargs="+", default=["mensal"], choices=["mensal", "diaria"])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--pasta", default=os.path.join(tempfile.gettempdir(), "kpis_bench_motores"),
+                        help="Onde ficam as planilhas sintéticas e suas exportações")
+    parser.add_argument("--saida", help="Arquivo JSON com os resultados (padrão: stdout)")
+    args = parser.parse_args()
+
+    os.makedirs(args.pasta, exist_ok=True)
+    resultados = []
+    for unidades, anos, resolucao in itertools.product(args.unidades, args.anos, args.resolucao):
+        cenario = {"unidades": unidades, "anos": anos, "resolucao": resolucao}
+        xlsx_path = os.path.join(args.pasta, f"sintetica_{unidades}u_{anos}a_{resolucao}.xlsx")
+        if not os.path.exists(xlsx_path):
+            gerar_planilha(xlsx_path, unidades, anos, resolucao)
+        print(f"Cenário {cenario}...", file=sys.stderr, flush=True)
+        resultados.append({"cenario": cenario, "motores": medir_motores(xlsx_path, args.repeticoes)})
+        shutil.rmtree(os.path.splitext(xlsx_path)[0] + "_abas", ignore_errors=True)
+        cache.esquecer_assinaturas()
+
+    relatorio = {
+        "meta": {"commit": commit_atual(), "pandas": pd.__version__, "motores": motores_disponiveis()},
+        "resultados": resultados,
+    }
+    texto = json.dumps(relatorio, ensure_ascii=False, indent=1)
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            f.write(texto)
+    else:
+        print(texto)
+    for resultado in resultados:
+        for motor, medida in resultado["motores"].items():
+            print(f"{json.dumps(resultado['cenario'])} {motor:<9} {medida['min']:8.4f}s "
+                  f"{'idêntico' if medida['diferenca'] is None else 'DIFERENTE'}", file=sys.stderr)
+    if any(m["diferenca"] for r in resultados for m in r["motores"].values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
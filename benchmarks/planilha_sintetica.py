@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+from motor_kpis import ABAS_ONIBUS, COL_TARIFA, COL_GEE
+
+# Planilha sintética no mesmo esquema de kpis_energia_por_unidade.xlsx:
+# aba fotovoltaica larga (uma coluna por unidade), dados_sistema e as abas
+# de ônibus. Os valores seguem a ordem de grandeza dos dados reais.
+RESOLUCOES = {"mensal": "MS", "diaria": "D"}
+
+COLUNAS_ONIBUS = [
+    "km", "kWh", "Dias", "Emissão de GEE (Diesel) (kgCO2)", "Emissão de GEE (Elétrico) (kg CO2)",
+    "Redução da Emissão", "Percentual de Redução", "Litros (Combustão)", "Gasto em Diesel",
+    "Gasto em Energia Elétrica", "Economia", "Tarifa Fora Ponta", "Coeficiente de Emissão Combustão",
+    "Coefiente de GEE", "Litros de Diesel", "Preço Diesel s10 (R$/L)",
+]
+
+def nomes_unidades(n):
+    return [f"Unidade {i:03d}" for i in range(1, n + 1)]
+
+def nomes_veiculos(n):
+    return [f"Ônibus {i:02d}" for i in range(1, n + 1)]
+
+def quadros_sinteticos(unidades=10, anos=5, resolucao="mensal", ano_inicial=2021, semente=0, veiculos=None):
+    # veiculos: None gera as abas Rodoviário/Urbano da planilha original; n
+    # gera n abas de veículos com a coluna Tipo
+    rng = np.random.default_rng(semente)
+    tempo = pd.date_range(f"{ano_inicial}-01-01", f"{ano_inicial + anos - 1}-12-31",
+                          freq=RESOLUCOES[resolucao])
+    nomes = nomes_unidades(unidades)
+    # Geração com sazonalidade anual e porte diferente por unidade
+    escala = 30 if resolucao == "mensal" else 1
+    porte = rng.uniform(50, 300, unidades)
+    sazonal = 1 + 0.25 * np.sin(2 * np.pi * tempo.dayofyear.to_numpy() / 365.25)
+    geracao = porte * sazonal[:, None] * escala * rng.uniform(0.7, 1.1, (len(tempo), unidades))
+    fv = pd.DataFrame(geracao.round(2), columns=nomes)
+    fv.insert(0, "Tempo", tempo)
+    fv[COL_TARIFA] = np.round(0.28 + 0.01 * (tempo.year.to_numpy() - ano_inicial), 4)
+    fv[COL_GEE] = rng.uniform(0.04, 0.6, len(tempo)).round(4)
+
+    sistema = pd.DataFrame({
+        "Unidade": nomes,
+        "Capacidade Instalada (kW)": (porte * 200).round(),
+        "Area": (porte * 1.5).round(2),
+    })
+
+    quadros = {"Sheet1": fv}
+    meses = pd.date_range(f"{ano_inicial}-01-01", periods=anos * 12, freq="MS")
+    abas = ABAS_ONIBUS if veiculos is None else nomes_veiculos(veiculos)
+    for i, aba in enumerate(abas):
+        valores = rng.uniform(0, 3000, (len(meses), len(COLUNAS_ONIBUS))).round(2)
+        onibus = pd.DataFrame(valores, columns=COLUNAS_ONIBUS)
+        onibus["Dias"] = rng.integers(0, 22, len(meses))
+        onibus.insert(0, "Tempo", meses)
+        if veiculos is not None:
+            onibus["Tipo"] = ABAS_ONIBUS[i % len(ABAS_ONIBUS)]
+        quadros[aba] = onibus
+    quadros["dados_sistema"] = sistema
+    return quadros
+
+def gerar_planilha(caminho, unidades=10, anos=5, resolucao="mensal", semente=0, veiculos=None):
+    quadros = quadros_sinteticos(unidades, anos, resolucao, semente=semente, veiculos=veiculos)
+    with pd.ExcelWriter(caminho, engine="openpyxl") as escritor:
+        for aba, df in quadros.items():
+            df.to_excel(escritor, sheet_name=aba, index=False)
+    return caminho
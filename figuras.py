@@ -0,0 +1,340 @@
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+from motor_kpis import normalizar_longo, medir
+
+# Paleta institucional
+COR_BG = "#f8f4ef"
+COR_CARD = "#f3e7d7"
+COR_TEXTO = "#473228"
+COR_CARD_ESCURO = "#8d6052"
+COR_CARD_CLARO = "#cbb197"
+
+# Paleta de cores para os sistemas
+CORES_SISTEMAS = {
+    "PPGL": "#006EB8",
+    "PRODERNA": "#3A9425",
+    "PPGQ": "#C3403B",
+    "SMA - Ceamazon": "#FFC93C",
+    "Mirate - Prefeitura": "#FF914D",
+    "ICB": "#73A9AD",
+    "WEG - Mirante do Rio": "#D2DAFF",
+    "Fronius - Ceamazon": "#F26B83",
+    "Abaetetuba": "#9B59B6",
+    "Controlador de Carga  - Ceamazon": "#A2A2A2",
+}
+
+FONTE = "Montserrat, Segoe UI, Arial, sans-serif"
+MESES_ABREV = ["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
+INDICADORES_RADAR = ["Geração (kWh)", "Eficiência (kWh/kWp)", "Receita (R$)", "Receita por área (R$/m²)", "Redução GEE (tCO2)"]
+
+# -------------------------------
+#   Fábrica de figuras com cache
+# -------------------------------
+# Cada figura é identificada por (tipo, versão dos dados, filtros). A figura
+# pronta fica num LRU compartilhado pelo processo: rever um período ou voltar
+# a uma seleção anterior não passa de novo pelo px.bar/px.pie/px.line_polar.
+# O st.plotly_chart serializa uma go.Figure via to_dict(), sem revalidar, e
+# nunca altera o objeto guardado.
+_CONSTRUTORES = {}
+
+def construtor(tipo):
+    def registrar(func):
+        _CONSTRUTORES[tipo] = func
+        return func
+    return registrar
+
+def construir(tipo, dados, **filtros):
+    # Monta a figura sem passar pelo cache
+    return _CONSTRUTORES[tipo](dados, **filtros)
+
+class FabricaFiguras:
+    def __init__(self, max_itens=256):
+        self.max_itens = max_itens
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def figura(self, tipo, dados, **filtros):
+        chave = (tipo, dados.versao, tuple(sorted(filtros.items())))
+        with self._lock:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                return self._cache[chave]
+        with medir("figura", tipo=tipo):
+            fig = construir(tipo, dados, **filtros)
+        with self._lock:
+            self._cache[chave] = fig
+            while len(self._cache) > self.max_itens:
+                self._cache.popitem(last=False)
+        return fig
+
+    def limpar(self):
+        with self._lock:
+            self._cache.clear()
+
+fabrica = FabricaFiguras()
+
+def figura(tipo, dados, **filtros):
+    return fabrica.figura(tipo, dados, **filtros)
+
+# -------------------------------
+#   Traços por unidade
+# -------------------------------
+# Séries empilhadas por unidade montadas numa passada: as linhas de cada
+# unidade saem de um único factorize/argsort e o total por Tempo de um
+# bincount. Tempo vai em milissegundos (float64) num eixo de datas e os
+# valores em float32: o Plotly serializa arrays NumPy como typed arrays em
+# base64, bem menores que datas ISO e floats com 17 dígitos no JSON. Acima
+# de LIMITE_WEBGL pontos as barras viram linhas Scattergl (WebGL),
+# empilhadas à mão.
+LIMITE_WEBGL = 2000
+
+def _milissegundos(tempo):
+    return tempo.to_numpy(dtype="datetime64[ms]").astype("float64")
+
+@medir("figura_empilhada")
+def figura_empilhada(df, campo, titulo, cor_total, cores=None, template=None, limite_webgl=LIMITE_WEBGL):
+    cores = cores or {}
+    tempo = _milissegundos(df["Tempo"])
+    valores = df[campo].to_numpy(dtype="float32")
+    codigos, unidades = pd.factorize(df["Unidade"])
+    ordem = np.argsort(codigos, kind="stable")
+    grupos = np.split(ordem, np.cumsum(np.bincount(codigos, minlength=len(unidades)))[:-1])
+    codigos_tempo, tempos = pd.factorize(tempo, sort=True)
+    total = np.bincount(codigos_tempo, weights=np.nan_to_num(valores), minlength=len(tempos))
+
+    webgl = len(df) > limite_webgl
+    if webgl:
+        # barmode="stack" não vale para Scattergl: o empilhamento é feito
+        # aqui, com a soma acumulada das unidades em cada Tempo (unidade sem
+        # leitura num Tempo conta zero); o hover mostra o valor da unidade
+        matriz = np.zeros((len(unidades), len(tempos)))
+        np.add.at(matriz, (codigos, codigos_tempo), np.nan_to_num(valores))
+        acumulado = matriz.cumsum(axis=0)
+        tracos = [
+            dict(type="scattergl", mode="lines", line=dict(color=cores.get(unidade)), name=str(unidade),
+                 x=tempos, y=acumulado[i].astype("float32"), customdata=matriz[i].astype("float32"),
+                 hovertemplate="%{customdata}<extra>%{fullData.name}</extra>")
+            for i, unidade in enumerate(unidades)
+        ]
+    else:
+        tracos = [
+            dict(type="bar", marker=dict(opacity=0.85, color=cores.get(unidade)), name=str(unidade),
+                 x=tempo[linhas], y=valores[linhas])
+            for unidade, linhas in zip(unidades, grupos)
+        ]
+    tracos.append(dict(type="scattergl" if webgl else "scatter", x=tempos, y=total.astype("float32"),
+                       name="Total", mode="lines" if webgl else "lines+markers", line=dict(color=cor_total)))
+    # Figura montada de uma vez: add_trace valida e copia a figura a cada traço
+    return go.Figure(data=tracos, layout=dict(
+        title=titulo, barmode="stack",
+        xaxis=dict(title="Tempo", type="date"), yaxis=dict(title=campo),
+        template=template
+    ))
+
+# -------------------------------
+#      Mobilidade Elétrica
+# -------------------------------
+@construtor("gasto_energia")
+def _gasto_energia(dados, tipo_onibus, ano=None, mes=None):
+    df = dados.onibus[tipo_onibus]
+    if ano is not None:
+        filtro = df["Ano"] == ano
+        if mes is not None:
+            filtro &= df["MesNum"] == mes
+        df = df[filtro]
+    gasto_total = pd.DataFrame({
+        "Tipo": ["Diesel", "Energia Elétrica"],
+        "Valor (R$)": [df["Gasto em Diesel"].sum(), df["Gasto em Energia Elétrica"].sum()]
+    })
+    fig = px.bar(
+        gasto_total, x="Tipo", y="Valor (R$)", color="Tipo",
+        color_discrete_sequence=[COR_CARD_ESCURO, COR_CARD_CLARO],
+        text="Valor (R$)"
+    )
+    fig.update_traces(texttemplate='%{text:.2s}', textposition='outside')
+    fig.update_layout(
+        title={
+            'text': "Equivalente gasto por Tipo de Energia",
+            'y': 0.96,
+            'x': 0.5,
+            'xanchor': 'center',
+            'yanchor': 'top',
+            'font': dict(size=23, color=COR_TEXTO, family=FONTE),
+        },
+        height=480,
+        margin=dict(t=75, b=25, l=0, r=0),
+        showlegend=False,
+        plot_bgcolor=COR_BG,
+        paper_bgcolor=COR_BG,
+        font=dict(color=COR_TEXTO, size=15)
+    )
+    fig.update_xaxes(title_text="Tipo")
+    fig.update_yaxes(title_text="Valor (R$)")
+    return fig
+
+# ------------------------------------
+#   Sistemas Fotovoltaicos - GERAL
+# ------------------------------------
+_EMPILHADOS = {
+    "Geração (kWh)": ("Geração (kWh)", "kWh", False),
+    "Receita (R$)": ("Receita (R$)", "R$", True),
+    "Redução GEE (tCO2)": ("Redução GEE (tCO₂)", "tCO₂", True),
+}
+
+@construtor("empilhado")
+def _empilhado(dados, metrica, ano, mes=None):
+    rotulo, eixo_y, fonte = _EMPILHADOS[metrica]
+    df_pivot = dados.cubo.pivot_mensal(metrica, ano, mes)
+    color_map = {unid: CORES_SISTEMAS.get(unid, "#cccccc") for unid in df_pivot.columns}
+    fig = px.bar(
+        df_pivot,
+        x=df_pivot.index,
+        y=df_pivot.columns,
+        labels={"value": rotulo, "MesNum": "Mês"},
+        template="simple_white",
+        color_discrete_map=color_map
+    )
+    fig.update_layout(
+        barmode='stack', height=350, xaxis_title="Mês", yaxis_title=eixo_y,
+        legend_title="Unidade", margin=dict(t=45))
+    if fonte:
+        fig.update_layout(font=dict(family=FONTE, size=15, color=COR_TEXTO))
+    fig.update_xaxes(tickvals=list(range(1,13)), ticktext=MESES_ABREV)
+    return fig
+
+@construtor("participacao")
+def _participacao(dados, ano, mes=None):
+    soma_sistemas = dados.cubo.totais_unidade(ano, mes)["Geração (kWh)"].reset_index()
+    if soma_sistemas.empty or soma_sistemas["Geração (kWh)"].sum() <= 0:
+        return None
+    fig = px.pie(
+        soma_sistemas,
+        names="Unidade",
+        values="Geração (kWh)",
+        hole=0.45,
+        labels={"Unidade": "Sistema", "Geração (kWh)": "Geração"},
+        color="Unidade",
+        color_discrete_map=CORES_SISTEMAS
+    )
+    fig.update_traces(textinfo='percent+label', pull=[0.04]*len(soma_sistemas))
+    fig.update_layout(showlegend=True, height=340)
+    return fig
+
+_MENSAIS_UNIDADE = {
+    "Geração (kWh)": (COR_CARD_CLARO, "kWh"),
+    "Receita (R$)": (COR_CARD_ESCURO, "R$"),
+    "Redução GEE (tCO2)": (COR_CARD_CLARO, "tCO₂"),
+}
+
+@construtor("unidade_mensal")
+def _unidade_mensal(dados, metrica, unidade, ano):
+    cor, eixo_y = _MENSAIS_UNIDADE[metrica]
+    df_uni = dados.cubo.serie_unidade(unidade, ano)
+    fig = px.bar(df_uni, x="MesNum", y=metrica, color_discrete_sequence=[cor])
+    fig.update_layout(title="", height=340, margin=dict(t=45,b=25,l=0,r=0),
+                      plot_bgcolor=COR_BG, paper_bgcolor=COR_BG, font=dict(color=COR_TEXTO, size=15))
+    fig.update_xaxes(title_text="Mês", tickvals=list(range(1,13)), ticktext=MESES_ABREV)
+    fig.update_yaxes(title_text=eixo_y)
+    return fig
+
+# ------------------------------------
+#   Comparativo Anual (Fotovoltaico)
+# ------------------------------------
+_COMPARATIVOS = {
+    "Geração (kWh)": ("Geração Total (kWh)", "kWh", 380, 50),
+    "Eficiência (kWh/kWp)": ("kWh/kWp", "Eficiência (kWh/kWp)", 350, 35),
+}
+
+@construtor("comparativo")
+def _comparativo(dados, metrica, anos):
+    rotulo, eixo_y, altura, margem = _COMPARATIVOS[metrica]
+    tabela_anos = dados.cubo.comparativo(list(anos))
+    fig = px.bar(
+        tabela_anos, x="Unidade", y=metrica, color="Ano", barmode="group",
+        text_auto=True, labels={metrica: rotulo}, template="simple_white")
+    fig.update_layout(
+        font=dict(family=FONTE, size=17, color=COR_TEXTO),
+        height=altura, xaxis_title="Sistema", yaxis_title=eixo_y, legend_title="Ano", margin=dict(t=margem)
+    )
+    return fig
+
+@construtor("radares")
+def _radares(dados, anos, metodo="maximo"):
+    # Um radar por ano; a normalização de todos os anos sai de uma só passada
+    longo = normalizar_longo(dados.cubo.comparativo(list(anos)), INDICADORES_RADAR, metodo)
+    figuras = []
+    for ano, df_rad in longo.rename(columns={"Unidade": "Sistema"}).groupby("Ano", sort=True):
+        fig = px.line_polar(
+            df_rad, r="Valor", theta="Indicador", color="Sistema", line_close=True,
+            title=f"Radar {ano}"
+        )
+        fig.update_layout(font=dict(family=FONTE, size=15, color=COR_TEXTO), height=410)
+        figuras.append(fig)
+    return tuple(figuras)
+
+# ------------------------------------
+#   Previsão dos próximos 12 meses
+# ------------------------------------
+@construtor("previsao_unidade")
+def _previsao_unidade(dados, metrica, unidade, meses=24):
+    # Últimos meses observados em barras e a previsão em linha tracejada
+    cor, eixo_y = _MENSAIS_UNIDADE[metrica]
+    try:
+        historico = dados.cubo.mensal.xs(unidade, level="Unidade")[metrica].tail(meses)
+    except KeyError:
+        historico = pd.Series(dtype=float)
+    tempo = pd.to_datetime(pd.DataFrame({
+        "year": historico.index.get_level_values("Ano"), "month": historico.index.get_level_values("MesNum"), "day": 1,
+    }))
+    previsao = dados.previsao.prever()
+    previsao = previsao[previsao["Unidade"] == unidade]
+    fig = go.Figure([
+        go.Bar(x=tempo, y=historico.to_numpy(), name="Observado", marker_color=cor),
+        go.Scatter(x=previsao["Tempo"], y=previsao[metrica], name="Previsão", mode="lines+markers",
+                   line=dict(color=COR_CARD_ESCURO, dash="dash")),
+    ])
+    fig.update_layout(height=340, margin=dict(t=45,b=25,l=0,r=0), plot_bgcolor=COR_BG, paper_bgcolor=COR_BG,
+                      font=dict(color=COR_TEXTO, size=15), legend=dict(orientation="h", y=1.12))
+    fig.update_yaxes(title_text=eixo_y)
+    return fig
+
+@construtor("previsao_sistemas")
+def _previsao_sistemas(dados):
+    tabela = dados.previsao.comparativo().melt(
+        id_vars="Unidade", value_vars=["Últimos 12 meses (kWh)", "Previsão (kWh)"],
+        var_name="Período", value_name="Geração (kWh)")
+    fig = px.bar(
+        tabela, x="Unidade", y="Geração (kWh)", color="Período", barmode="group", template="simple_white",
+        color_discrete_sequence=[COR_CARD_CLARO, COR_CARD_ESCURO])
+    fig.update_layout(
+        font=dict(family=FONTE, size=17, color=COR_TEXTO),
+        height=380, xaxis_title="Sistema", yaxis_title="kWh", legend_title="", margin=dict(t=50)
+    )
+    return fig
+
+# ------------------------------------
+#   Aquecimento em segundo plano
+# ------------------------------------
+def aquecer_figuras(dados):
+    # Figuras das seleções iniciais do painel, montadas antes da troca de
+    # versão pelo AtualizadorDados
+    for tipo_onibus, df in dados.onibus.items():
+        if "Ano" in df.columns and df["Ano"].notna().any():
+            ano = df["Ano"].max()
+            meses = sorted(df.loc[df["Ano"] == ano, "MesNum"].unique())
+            filtro = {"ano": ano, "mes": meses[0]} if len(meses) > 1 else {"ano": ano}
+            figura("gasto_energia", dados, tipo_onibus=tipo_onibus, **filtro)
+    anos = sorted(dados.fotovoltaico["Ano"].dropna().unique())
+    if not anos:
+        return
+    for metrica in _EMPILHADOS:
+        figura("empilhado", dados, metrica=metrica, ano=anos[-1], mes=None)
+    figura("participacao", dados, ano=anos[-1], mes=None)
+    for metrica in _COMPARATIVOS:
+        figura("comparativo", dados, metrica=metrica, anos=tuple(anos[-2:]))
+    figura("radares", dados, anos=tuple(anos[-2:]), metodo="maximo")
+    figura("previsao_sistemas", dados)
@@ -0,0 +1,118 @@
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from motor_kpis import carregar_dados, gerar_pdf_kpis, impressao_digital, versao_modelo
+
+# Geração em lote dos PDFs de KPIs fotovoltaicos (sem Streamlit):
+#   python gerar_relatorios.py --saida relatorios --processos 4
+
+MESES = {1:"Jan",2:"Fev",3:"Mar",4:"Abr",5:"Mai",6:"Jun",7:"Jul",8:"Ago",9:"Set",10:"Out",11:"Nov",12:"Dez"}
+
+# Dados carregados uma vez por processo de trabalho
+_df_fv = None
+
+def _iniciar_processo(xlsx_path):
+    global _df_fv
+    # O cache colunar já foi aquecido pelo processo principal
+    _df_fv = carregar_dados(xlsx_path).fotovoltaico
+
+def _gerar(posicoes, periodo_desc, arquivo):
+    # posicoes: linhas do grupo no frame fotovoltaico, na mesma ordem do
+    # cache que o processo principal leu
+    pdf_bytes = gerar_pdf_kpis(_df_fv.iloc[posicoes], periodo_desc)
+    os.makedirs(os.path.dirname(arquivo), exist_ok=True)
+    tmp = f"{arquivo}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(pdf_bytes)
+    os.replace(tmp, arquivo)
+    return arquivo
+
+# Níveis dos relatórios: total do ano, de cada mês, de cada unidade no ano e
+# de cada unidade no mês
+NIVEIS = (["Ano"], ["Ano", "MesNum"], ["Ano", "Unidade"], ["Ano", "MesNum", "Unidade"])
+
+def listar_tarefas(df_fv, saida, anos=None):
+    # Um groupby por nível: cada linha entra em um grupo por nível e cada
+    # grupo é hasheado uma vez, sem refiltrar o frame inteiro por tarefa. As
+    # posições das linhas vão junto, para o processo de trabalho só recortar
+    linhas = np.arange(len(df_fv))
+    if anos:
+        filtro = df_fv["Ano"].isin(anos).to_numpy()
+        df_fv, linhas = df_fv[filtro], linhas[filtro]
+    for chaves in NIVEIS:
+        grupos = df_fv.groupby(chaves, observed=True, sort=True)
+        for valores, posicoes in sorted(grupos.indices.items()):
+            valores = valores if isinstance(valores, tuple) else (valores,)
+            filtro = dict(zip(chaves, valores))
+            ano, mes, unidade = int(filtro["Ano"]), filtro.get("MesNum"), filtro.get("Unidade")
+            mes = None if mes is None else int(mes)
+            partes = [str(ano)]
+            if mes is not None:
+                partes.append(MESES[mes])
+            if unidade is not None:
+                partes.append(unidade)
+            periodo_desc = " - ".join(partes)
+            nome = re.sub(r"[^\w\-. ]", "_", f"KPIs_{periodo_desc}.pdf")
+            arquivo = os.path.join(saida, str(ano), nome)
+            yield (ano, mes, unidade, periodo_desc, arquivo), linhas[posicoes], impressao_digital(df_fv.iloc[posicoes])
+
+def salvar_manifesto(manifesto_path, manifesto):
+    # Gravado a cada PDF concluído: uma execução interrompida não perde os
+    # que já ficaram prontos
+    os.makedirs(os.path.dirname(manifesto_path) or ".", exist_ok=True)
+    tmp = f"{manifesto_path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, manifesto_path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os PDFs de KPIs para todos os períodos e unidades.")
+    parser.add_argument("--planilha", default="kpis_energia_por_unidade.xlsx")
+    parser.add_argument("--saida", default="relatorios")
+    parser.add_argument("--processos", type=int, default=os.cpu_count())
+    parser.add_argument("--anos", type=int, nargs="*", help="Restringe a geração a estes anos")
+    parser.add_argument("--forcar", action="store_true", help="Regera mesmo os PDFs inalterados")
+    args = parser.parse_args()
+
+    dados = carregar_dados(args.planilha)
+    manifesto_path = os.path.join(args.saida, "manifesto.json")
+    manifesto = {}
+    if os.path.exists(manifesto_path) and not args.forcar:
+        with open(manifesto_path, encoding="utf-8") as f:
+            manifesto = json.load(f)
+
+    # O manifesto guarda dados e modelo do PDF: mudar o relatório ou a logo
+    # também regera os PDFs
+    modelo = versao_modelo()
+    pendentes = {}
+    ignorados = 0
+    for tarefa, posicoes, impressao in listar_tarefas(dados.fotovoltaico, args.saida, args.anos):
+        impressao = f"{impressao}-{modelo}"
+        *_, periodo_desc, arquivo = tarefa
+        chave = os.path.relpath(arquivo, args.saida)
+        if manifesto.get(chave) == impressao and os.path.exists(arquivo):
+            ignorados += 1
+            continue
+        pendentes[chave] = ((posicoes, periodo_desc, arquivo), impressao)
+
+    print(f"{len(pendentes)} PDFs a gerar, {ignorados} inalterados.")
+    if pendentes:
+        with ProcessPoolExecutor(max_workers=args.processos, initializer=_iniciar_processo,
+                                 initargs=(args.planilha,)) as pool:
+            futuros = {pool.submit(_gerar, *tarefa): chave for chave, (tarefa, _) in pendentes.items()}
+            for futuro in as_completed(futuros):
+                chave = futuros[futuro]
+                try:
+                    futuro.result()
+                except Exception as e:
+                    print(f"Falha em {chave}: {e}")
+                    continue
+                manifesto[chave] = pendentes[chave][1]
+                salvar_manifesto(manifesto_path, manifesto)
+    print("Concluído.")
+
+if __name__ == "__main__":
+    main()
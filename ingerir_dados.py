@@ -0,0 +1,32 @@
+import argparse
+import os
+import time
+from motor_kpis import carregar_dados, ingerir_lote, arquivo_incrementos, arquivo_leituras
+
+# Ingestão incremental de leituras mensais (sem reler a planilha inteira):
+#   python ingerir_dados.py leituras_agosto.csv
+#   python ingerir_dados.py inversor_15min.csv
+#   python ingerir_dados.py kpis_energia_por_unidade_v2.xlsx
+
+def main():
+    parser = argparse.ArgumentParser(description="Acrescenta leituras novas aos dados do painel.")
+    parser.add_argument("lotes", nargs="*", help="Arquivos CSV/JSONL de leituras ou nova revisão da planilha (.xlsx)")
+    parser.add_argument("--planilha", default="kpis_energia_por_unidade.xlsx")
+    parser.add_argument("--limpar", action="store_true", help="Descarta as leituras ingeridas e volta à planilha")
+    args = parser.parse_args()
+
+    if args.limpar:
+        for arquivo in (arquivo_incrementos(args.planilha), arquivo_leituras(args.planilha)):
+            if os.path.exists(arquivo):
+                os.remove(arquivo)
+    dados = carregar_dados(args.planilha)
+    for lote in args.lotes:
+        inicio = time.perf_counter()
+        antes = len(dados.fotovoltaico)
+        dados = ingerir_lote(args.planilha, lote)
+        print(f"{lote}: {len(dados.fotovoltaico) - antes:+d} leituras "
+              f"({time.perf_counter() - inicio:.2f}s), versão {dados.versao}")
+    print(f"{len(dados.fotovoltaico)} leituras na versão {dados.versao}.")
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,27 @@
+import os
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-from utils import format_real, format_num, carregar_dados_onibus, carregar_dados_fotovoltaico, carregar_dados_sistema, gerar_pdf_kpis
+from motor_kpis import (
+    format_real, format_num, tabela_formatada, totais_frota, gerar_pdf_kpis, METODOS_NORMALIZACAO, AtualizadorDados,
+    ARQUIVO_RASTRO, medir, iniciar_rodada, encerrar_rodada, registros, duracao_rodada,
+)
+from figuras import figura, aquecer_figuras, COR_BG, COR_CARD, COR_TEXTO, COR_CARD_ESCURO, COR_CARD_CLARO
 
 # Configuração da página
 st.set_page_config(layout="wide", page_title="Painel de KPIs — Projeto de Gestão e Eficiência Energética da UFPA")
 
-# Paleta institucional
-COR_BG = "#f8f4ef"
-COR_CARD = "#f3e7d7"
-COR_TEXTO = "#473228"
-COR_CARD_ESCURO = "#8d6052"
-COR_CARD_CLARO = "#cbb197"
-
-# Paleta de cores para os sistemas
-CORES_SISTEMAS = {
-    "PPGL": "#006EB8",
-    "PRODERNA": "#3A9425",
-    "PPGQ": "#C3403B",
-    "SMA - Ceamazon": "#FFC93C",
-    "Mirate - Prefeitura": "#FF914D",
-    "ICB": "#73A9AD",
-    "WEG - Mirante do Rio": "#D2DAFF",
-    "Fronius - Ceamazon": "#F26B83",
-    "Abaetetuba": "#9B59B6",
-    "Controlador de Carga  - Ceamazon": "#A2A2A2",
-}
+# Medição das etapas desta rerun: painel na barra lateral com ?debug=1 (ou
+# KPIS_DEBUG=1) e linhas no JSONL de KPIS_RASTRO, quando definido
+depurar = st.query_params.get("debug") == "1" or os.environ.get("KPIS_DEBUG") == "1"
+if depurar or ARQUIVO_RASTRO:
+    iniciar_rodada("kpi.py")
+else:
+    encerrar_rodada()
+
+def grafico(fig):
+    # Inclui a serialização da figura para o navegador
+    with medir("plotly_chart"):
+        st.plotly_chart(fig, use_container_width=True)
 
 # CSS customizado
 st.markdown(f"""
@@ -112,18 +108,58 @@ modulo = st.sidebar.radio(
 st.sidebar.markdown('<div style="height:16px;"></div>', unsafe_allow_html=True)
 st.sidebar.image("logo-ceamazon-preta.png", use_container_width=True)
 
-# Caminho do arquivo Excel
-xlsx_path = "kpis_energia_por_unidade.xlsx"
+# Caminho do arquivo Excel (lido uma única vez para todos os módulos). O
+# conjunto é único no processo e compartilhado pelas sessões; com
+# copy-on-write os recortes de cada sessão são vistas, não cópias
+pd.set_option("mode.copy_on_write", True)
+# Planilha, pasta de planilhas (uma por campus) ou manifesto JSON de campi
+xlsx_path = os.environ.get("KPIS_FONTE", "kpis_energia_por_unidade.xlsx")
+
+# PDF gerado só quando solicitado, memorizado por (período, versão dos dados);
+# os bytes são imutáveis e servidos a todas as sessões sem cópia
+@st.cache_resource(max_entries=32, show_spinner="Gerando PDF dos KPIs...")
+def pdf_kpis(_df, periodo_desc, versao):
+    return gerar_pdf_kpis(_df, periodo_desc)
+
+def aquecer_pdf(dados):
+    # PDF do ano mais recente, o período selecionado ao abrir o painel
+    df_fv = dados.fotovoltaico
+    ano = df_fv["Ano"].max()
+    pdf_kpis(df_fv[df_fv["Ano"] == ano], f"{ano}", dados.versao)
+
+# Uma thread por processo vigia a planilha (e os lotes soltos em entrada/),
+# monta a nova versão com figuras e PDF aquecidos e só então a troca: as
+# reruns leem sempre a versão pronta
+@st.cache_resource
+def atualizador():
+    return AtualizadorDados(
+        xlsx_path, pasta_entrada="entrada", aquecimentos=[aquecer_figuras, aquecer_pdf]
+    ).iniciar()
+
+dados = atualizador().atual()
+if atualizador().ultimo_erro:
+    st.sidebar.warning(f"Atualização dos dados falhou: {atualizador().ultimo_erro}")
+# Com vários campi, o painel mostra todos juntos ou um deles
+if dados.sites:
+    site = st.sidebar.selectbox("Campus:", ["Todos os campi", *dados.sites], key="site")
+    if site in dados.sites:
+        dados = dados.sites[site]
 
 # -------------------------------
 #      Mobilidade Elétrica
 # -------------------------------
 if modulo.startswith("🚍"):
     st.write("")
-    tipo_onibus = st.radio("Tipo de ônibus:", ["Rodoviário", "Urbano"], horizontal=True, key="tipo_onibus")
-    df = carregar_dados_onibus(xlsx_path, tipo_onibus) 
+    # Veículos descobertos nas abas da planilha; com muitos, lista suspensa
+    veiculos = list(dados.onibus)
+    if len(veiculos) <= 4:
+        tipo_onibus = st.radio("Tipo de ônibus:", veiculos, horizontal=True, key="tipo_onibus")
+    else:
+        tipo_onibus = st.selectbox("Veículo:", veiculos, key="tipo_onibus")
+    df = dados.onibus[tipo_onibus]
 
     # Filtro de período
+    filtro_onibus = {}
     if "Ano" in df.columns and "Tempo" in df.columns:
         anos = sorted(df["Ano"].dropna().unique())
         ano_sel = st.selectbox("Ano:", anos, index=len(anos)-1, key="ano_onibus")
@@ -134,8 +170,10 @@ if modulo.startswith("🚍"):
             mes_sel = st.selectbox("Mês:", [meses_map[m] for m in meses_disp], key="mes_onibus")
             mes_num = [k for k,v in meses_map.items() if v == mes_sel][0]
             df = df[(df["Ano"] == ano_sel) & (df["MesNum"] == mes_num)]
+            filtro_onibus = {"ano": ano_sel, "mes": mes_num}
         else:
             df = df[df["Ano"] == ano_sel]
+            filtro_onibus = {"ano": ano_sel}
 
     # KPIs
     col1, col2, col3, col4 = st.columns(4)
@@ -167,40 +205,33 @@ if modulo.startswith("🚍"):
     st.write("")
     c = st.columns([1,2,1])
     with c[1]:
-        gasto_total = pd.DataFrame({
-            "Tipo": ["Diesel", "Energia Elétrica"],
-            "Valor (R$)": [df["Gasto em Diesel"].sum(), df["Gasto em Energia Elétrica"].sum()]
-        })
-        fig3 = px.bar(
-            gasto_total, x="Tipo", y="Valor (R$)", color="Tipo",
-            color_discrete_sequence=[COR_CARD_ESCURO, COR_CARD_CLARO],
-            text="Valor (R$)"
-        )
-        fig3.update_traces(texttemplate='%{text:.2s}', textposition='outside')
-        fig3.update_layout(
-            title={
-                'text': "Equivalente gasto por Tipo de Energia",
-                'y': 0.96,
-                'x': 0.5,
-                'xanchor': 'center',
-                'yanchor': 'top',
-                'font': dict(size=23, color=COR_TEXTO, family="Montserrat, Segoe UI, Arial, sans-serif"),
-            },
-            height=480,
-            margin=dict(t=75, b=25, l=0, r=0),
-            showlegend=False,
-            plot_bgcolor=COR_BG,
-            paper_bgcolor=COR_BG,
-            font=dict(color=COR_TEXTO, size=15)
+        grafico(figura("gasto_energia", dados, tipo_onibus=tipo_onibus, **filtro_onibus))
+
+    # Frota no mesmo período: um groupby sobre o frame longo de veículos
+    if len(veiculos) > 1:
+        frota = dados.frota
+        if filtro_onibus:
+            filtro = frota["Ano"] == filtro_onibus["ano"]
+            if "mes" in filtro_onibus:
+                filtro &= frota["MesNum"] == filtro_onibus["mes"]
+            frota = frota[filtro]
+        tabela_frota = totais_frota(frota, por="Veiculo")
+        tabela_frota.loc["Frota"] = tabela_frota.sum()
+        st.markdown("**Frota no período:**")
+        st.markdown(
+            tabela_formatada(
+                tabela_frota.rename_axis("Veículo").reset_index(),
+                {"km": 0, "kWh": 0, "Economia": "real", "Gasto em Diesel": "real",
+                 "Gasto em Energia Elétrica": "real", "Redução da Emissão": 2},
+                vazio="–"
+            ).to_html(index=False, classes="my-table", border=0),
+            unsafe_allow_html=True
         )
-        fig3.update_xaxes(title_text="Tipo")
-        fig3.update_yaxes(title_text="Valor (R$)")
-        st.plotly_chart(fig3, use_container_width=True)
 # ------------------------------------
 #   Sistemas Fotovoltaicos - GERAL
 # ------------------------------------
 elif modulo.startswith("🌞"):
-    df_fv = carregar_dados_fotovoltaico(xlsx_path)
+    df_fv = dados.fotovoltaico
 
     st.markdown(
         f"""<h2 style='text-align:center; color:{COR_TEXTO}; font-size:1.55em; margin-bottom:1em;'>
@@ -219,7 +250,10 @@ elif modulo.startswith("🌞"):
         mes_num = [k for k,v in meses_map.items() if v == mes_sel][0]
         df_filt = df_fv[(df_fv["Ano"] == ano_sel) & (df_fv["MesNum"] == mes_num)]
     else:
+        mes_num = None
         df_filt = df_fv[df_fv["Ano"] == ano_sel]
+    cubo = dados.cubo
+    totais = cubo.totais(ano_sel, mes_num)
 
     # Totais gerais
     col1, col2, col3 = st.columns(3)
@@ -227,31 +261,33 @@ elif modulo.startswith("🌞"):
         st.markdown(f"""
             <div class="kpi-card">
                 <div class="kpi-title">Geração de Energia (kWh)</div>
-                <div class="kpi-value">🌞{format_num(df_filt["Geração (kWh)"].sum(), 0)}</div>
+                <div class="kpi-value">🌞{format_num(totais["Geração (kWh)"], 0)}</div>
             </div>""", unsafe_allow_html=True)
     with col2:
         st.markdown(f"""
             <div class="kpi-card">
                 <div class="kpi-title">Receita (R$)</div>
-                <div class="kpi-value">💸{format_real(df_filt["Receita (R$)"].sum())}</div>
+                <div class="kpi-value">💸{format_real(totais["Receita (R$)"])}</div>
             </div>""", unsafe_allow_html=True)
     with col3:
         st.markdown(f"""
             <div class="kpi-card">
                 <div class="kpi-title">Redução GEE (tCO₂)</div>
-                <div class="kpi-value">🌱{format_num(df_filt["Redução GEE (tCO2)"].sum(), 2)}</div>
+                <div class="kpi-value">🌱{format_num(totais["Redução GEE (tCO2)"], 2)}</div>
             </div>""", unsafe_allow_html=True)
     st.write("")
     # Botão de download PDF dos KPIs
     periodo_desc = f"{ano_sel}" if not filtro_mes else f"{ano_sel} - {mes_sel}"
     if not df_filt.empty:
-        pdf_bytes = gerar_pdf_kpis(df_filt, periodo_desc)
-        st.download_button(
-            label="Baixar KPIs em PDF",
-            data=pdf_bytes,
-            file_name=f"KPIs_{periodo_desc}.pdf",
-            mime="application/pdf"
-        )
+        chave_pdf = (periodo_desc, dados.versao)
+        if st.session_state.get("pdf_kpis") == chave_pdf or st.button("Gerar PDF dos KPIs"):
+            st.session_state["pdf_kpis"] = chave_pdf
+            st.download_button(
+                label="Baixar KPIs em PDF",
+                data=pdf_kpis(df_filt, periodo_desc, dados.versao),
+                file_name=f"KPIs_{periodo_desc}.pdf",
+                mime="application/pdf"
+            )
     else:
         st.info("Não há dados para gerar o PDF dos KPIs.")
     # --- Gráfico de barras empilhadas ---
@@ -259,25 +295,7 @@ elif modulo.startswith("🌞"):
         '<div style="font-weight:700;font-size:1.13em;color:#473228;text-align:center;">Geração por Unidade (kWh)</div>',
         unsafe_allow_html=True)
     if not df_filt.empty:
-        df_pivot = df_filt.pivot_table(index="MesNum", columns="Unidade", values="Geração (kWh)", aggfunc="sum").fillna(0)
-        df_pivot = df_pivot.sort_index()
-        color_map = {unid: CORES_SISTEMAS.get(unid, "#cccccc") for unid in df_pivot.columns}
-        fig_stacked = px.bar(
-            df_pivot,
-            x=df_pivot.index,
-            y=df_pivot.columns,
-            labels={"value": "Geração (kWh)", "MesNum": "Mês"},
-            template="simple_white",
-            color_discrete_map=color_map
-        )
-        fig_stacked.update_layout(
-            barmode='stack', height=350, xaxis_title="Mês", yaxis_title="kWh",
-            legend_title="Unidade", margin=dict(t=45))
-        fig_stacked.update_xaxes(
-            tickvals=list(range(1,13)),
-            ticktext=["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-        )
-        st.plotly_chart(fig_stacked, use_container_width=True)
+        grafico(figura("empilhado", dados, metrica="Geração (kWh)", ano=ano_sel, mes=mes_num))
     else:
         st.info("Não há dados para o período selecionado.")
     # Gráfico empilhado — Receita por Unidade (R$)
@@ -285,27 +303,7 @@ elif modulo.startswith("🌞"):
         '<div style="font-weight:700;font-size:1.13em;color:#473228;text-align:center;">Receita por Unidade (R$)</div>',
         unsafe_allow_html=True)
     if not df_filt.empty:
-        df_pivot_receita = df_filt.pivot_table(index="MesNum", columns="Unidade", values="Receita (R$)", aggfunc="sum").fillna(0)
-        df_pivot_receita = df_pivot_receita.sort_index()
-        color_map = {unid: CORES_SISTEMAS.get(unid, "#cccccc") for unid in df_pivot_receita.columns}
-        fig_receita = px.bar(
-            df_pivot_receita,
-            x=df_pivot_receita.index,
-            y=df_pivot_receita.columns,
-            labels={"value": "Receita (R$)", "MesNum": "Mês"},
-            template="simple_white",
-            color_discrete_map=color_map
-        )
-        fig_receita.update_layout(
-            barmode='stack', height=350, xaxis_title="Mês", yaxis_title="R$",
-            legend_title="Unidade", margin=dict(t=45),
-            font=dict(family="Montserrat, Segoe UI, Arial, sans-serif", size=15, color=COR_TEXTO)
-        )
-        fig_receita.update_xaxes(
-            tickvals=list(range(1,13)),
-            ticktext=["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-        )
-        st.plotly_chart(fig_receita, use_container_width=True)
+        grafico(figura("empilhado", dados, metrica="Receita (R$)", ano=ano_sel, mes=mes_num))
     else:
         st.info("Não há dados para o período selecionado.")
 
@@ -314,50 +312,17 @@ elif modulo.startswith("🌞"):
         '<div style="font-weight:700;font-size:1.13em;color:#473228;text-align:center;">Redução GEE por Unidade (tCO₂)</div>',
         unsafe_allow_html=True)
     if not df_filt.empty:
-        df_pivot_gee = df_filt.pivot_table(index="MesNum", columns="Unidade", values="Redução GEE (tCO2)", aggfunc="sum").fillna(0)
-        df_pivot_gee = df_pivot_gee.sort_index()
-        color_map = {unid: CORES_SISTEMAS.get(unid, "#cccccc") for unid in df_pivot_gee.columns}
-        fig_gee = px.bar(
-            df_pivot_gee,
-            x=df_pivot_gee.index,
-            y=df_pivot_gee.columns,
-            labels={"value": "Redução GEE (tCO₂)", "MesNum": "Mês"},
-            template="simple_white",
-            color_discrete_map=color_map
-        )
-        fig_gee.update_layout(
-            barmode='stack', height=350, xaxis_title="Mês", yaxis_title="tCO₂",
-            legend_title="Unidade", margin=dict(t=45),
-            font=dict(family="Montserrat, Segoe UI, Arial, sans-serif", size=15, color=COR_TEXTO)
-        )
-        fig_gee.update_xaxes(
-            tickvals=list(range(1,13)),
-            ticktext=["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-        )
-        st.plotly_chart(fig_gee, use_container_width=True)
+        grafico(figura("empilhado", dados, metrica="Redução GEE (tCO2)", ano=ano_sel, mes=mes_num))
     else:
         st.info("Não há dados para o período selecionado.")
     # --- Gráfico de pizza/donut - Participação por unidade ---
     st.markdown(
         '<div style="font-weight:700;font-size:1.13em;color:#473228;text-align:center;">Participação de Cada Sistema</div>',
         unsafe_allow_html=True)
-    soma_sistemas = df_filt.groupby("Unidade")["Geração (kWh)"].sum().reset_index()
     unidades_excluir = ["Tarifa Fora Ponta (R$/kWh)", "Fator de Emissão de Gases do Efeito Estufa (tCO2/MWh)"]
-    soma_sistemas = soma_sistemas[~soma_sistemas["Unidade"].isin(unidades_excluir)]
-
-    if not soma_sistemas.empty and soma_sistemas["Geração (kWh)"].sum() > 0:
-        fig_pizza = px.pie(
-            soma_sistemas,
-            names="Unidade",
-            values="Geração (kWh)",
-            hole=0.45,
-            labels={"Unidade": "Sistema", "Geração (kWh)": "Geração"},
-            color="Unidade",
-            color_discrete_map=CORES_SISTEMAS
-        )
-        fig_pizza.update_traces(textinfo='percent+label', pull=[0.04]*len(soma_sistemas))
-        fig_pizza.update_layout(showlegend=True, height=340)
-        st.plotly_chart(fig_pizza, use_container_width=True)
+    fig_pizza = figura("participacao", dados, ano=ano_sel, mes=mes_num)
+    if fig_pizza is not None:
+        grafico(fig_pizza)
     else:
         st.info("Não há geração para exibir participação dos sistemas nesse período.")
 
@@ -370,33 +335,32 @@ elif modulo.startswith("🌞"):
     )
     unidades_opcoes = [u for u in df_fv["Unidade"].unique() if u not in unidades_excluir]
     unidade = st.selectbox("Selecione a Unidade:", unidades_opcoes)
-    df_uni = df_fv[df_fv["Unidade"] == unidade]
-    df_uni = df_uni[df_uni["Ano"] == ano_sel]
+    resumo_uni = cubo.resumo_unidade(unidade, ano_sel)
 
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         st.markdown(f"""
             <div class="kpi-card">
                 <div class="kpi-title">Geração Total (kWh)</div>
-                <div class="kpi-value">{format_num(df_uni["Geração (kWh)"].sum(), 0)}</div>
+                <div class="kpi-value">{format_num(resumo_uni["Geração (kWh)"], 0)}</div>
             </div>""", unsafe_allow_html=True)
     with col2:
         st.markdown(f"""
             <div class="kpi-card">
                 <div class="kpi-title">Receita Total (R$)</div>
-                <div class="kpi-value">{format_real(df_uni["Receita (R$)"].sum())}</div>
+                <div class="kpi-value">{format_real(resumo_uni["Receita (R$)"])}</div>
             </div>""", unsafe_allow_html=True)
     with col3:
         st.markdown(f"""
             <div class="kpi-card">
                 <div class="kpi-title">Redução GEE (tCO<sub>2</sub>)</div>
-                <div class="kpi-value">{format_num(df_uni["Redução GEE (tCO2)"].sum(), 2)}</div>
+                <div class="kpi-value">{format_num(resumo_uni["Redução GEE (tCO2)"], 2)}</div>
             </div>""", unsafe_allow_html=True)
     with col4:
         st.markdown(f"""
             <div class="kpi-card">
                 <div class="kpi-title">Tarifa Média (R$/kWh)</div>
-                <div class="kpi-value">{format_num(df_uni["Tarifa (R$/kWh)"].mean(), 4)}</div>
+                <div class="kpi-value">{format_num(resumo_uni["Tarifa (R$/kWh)"], 4)}</div>
             </div>""", unsafe_allow_html=True)
 
     st.write("")
@@ -405,52 +369,52 @@ elif modulo.startswith("🌞"):
         st.markdown(
             '<div style="font-weight:700;font-size:1.18em;color:#473228;text-align:center;margin-bottom:-16px;">Geração Mensal (kWh)</div>',
             unsafe_allow_html=True)
-        fig1 = px.bar(df_uni, x="MesNum", y="Geração (kWh)", color_discrete_sequence=[COR_CARD_CLARO])
-        fig1.update_layout(title="", height=340, margin=dict(t=45,b=25,l=0,r=0),
-                           plot_bgcolor=COR_BG, paper_bgcolor=COR_BG, font=dict(color=COR_TEXTO, size=15))
-        fig1.update_xaxes(
-            title_text="Mês",
-            tickvals=list(range(1,13)),
-            ticktext=["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-        )
-        fig1.update_yaxes(title_text="kWh")
-        st.plotly_chart(fig1, use_container_width=True)
+        grafico(figura("unidade_mensal", dados, metrica="Geração (kWh)", unidade=unidade, ano=ano_sel))
     with c2:
         st.markdown(
             '<div style="font-weight:700;font-size:1.18em;color:#473228;text-align:center;margin-bottom:-16px;">Receita Mensal (R$)</div>',
             unsafe_allow_html=True)
-        fig2 = px.bar(df_uni, x="MesNum", y="Receita (R$)", color_discrete_sequence=[COR_CARD_ESCURO])
-        fig2.update_layout(title="", height=340, margin=dict(t=45,b=25,l=0,r=0),
-                           plot_bgcolor=COR_BG, paper_bgcolor=COR_BG, font=dict(color=COR_TEXTO, size=15))
-        fig2.update_xaxes(
-            title_text="Mês",
-            tickvals=list(range(1,13)),
-            ticktext=["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-        )
-        fig2.update_yaxes(title_text="R$")
-        st.plotly_chart(fig2, use_container_width=True)
+        grafico(figura("unidade_mensal", dados, metrica="Receita (R$)", unidade=unidade, ano=ano_sel))
     with c3:
         st.markdown(
             '<div style="font-weight:700;font-size:1.18em;color:#473228;text-align:center;margin-bottom:-16px;">Redução GEE (tCO₂)</div>',
             unsafe_allow_html=True)
-        fig3 = px.bar(df_uni, x="MesNum", y="Redução GEE (tCO2)", color_discrete_sequence=[COR_CARD_CLARO])
-        fig3.update_layout(title="", height=340, margin=dict(t=45,b=25,l=0,r=0),
-                           plot_bgcolor=COR_BG, paper_bgcolor=COR_BG, font=dict(color=COR_TEXTO, size=15))
-        fig3.update_xaxes(
-            title_text="Mês",
-            tickvals=list(range(1,13)),
-            ticktext=["Jan", "Fev", "Mar", "Abr", "Mai", "Jun", "Jul", "Ago", "Set", "Out", "Nov", "Dez"]
-        )
-        fig3.update_yaxes(title_text="tCO₂")
-        st.plotly_chart(fig3, use_container_width=True)
+        grafico(figura("unidade_mensal", dados, metrica="Redução GEE (tCO2)", unidade=unidade, ano=ano_sel))
+
+    # --- Previsão da unidade (modelo ajustado uma vez por versão dos dados) ---
+    st.markdown(
+        f"""<h3 style='text-align:center; color:{COR_TEXTO}; font-size:1.25em; margin:1em 0;'>
+        Previsão para os Próximos 12 Meses
+        </h3>""", unsafe_allow_html=True
+    )
+    previsao_uni = dados.previsao.totais().reindex([unidade]).iloc[0]
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown(f"""
+            <div class="kpi-card">
+                <div class="kpi-title">Geração Prevista (kWh)</div>
+                <div class="kpi-value">{format_num(previsao_uni["Geração (kWh)"], 0)}</div>
+            </div>""", unsafe_allow_html=True)
+    with col2:
+        st.markdown(f"""
+            <div class="kpi-card">
+                <div class="kpi-title">Receita Prevista (R$)</div>
+                <div class="kpi-value">{format_real(previsao_uni["Receita (R$)"])}</div>
+            </div>""", unsafe_allow_html=True)
+    c1, c2 = st.columns(2)
+    with c1:
+        grafico(figura("previsao_unidade", dados, metrica="Geração (kWh)", unidade=unidade))
+    with c2:
+        grafico(figura("previsao_unidade", dados, metrica="Receita (R$)", unidade=unidade))
+    st.caption(
+        "Sazonalidade mensal × tendência ajustadas sobre toda a série; meses parados ficam fora do ajuste. "
+        f"Receita pela tarifa média dos últimos 12 meses ({format_num(dados.previsao.tarifa.get(unidade), 4)} R$/kWh)."
+    )
 # ------------------------------------
 #   Comparativo Anual (Fotovoltaico)
 # ------------------------------------
 elif modulo.startswith("📊"):
-    df_fv = carregar_dados_fotovoltaico(xlsx_path)
-    df_meta = carregar_dados_sistema(xlsx_path)
-    df_meta.columns = df_meta.columns.str.strip()
-    df_meta = df_meta.rename(columns={"Unnamed: 0": "Unidade"})
+    df_fv = dados.fotovoltaico
 
     st.markdown(
         f"""<h2 style='text-align:center; color:{COR_TEXTO}; font-size:1.55em; margin-bottom:1em;'>
@@ -460,19 +424,7 @@ elif modulo.startswith("📊"):
 
     anos_disp = sorted(df_fv["Ano"].unique())
     anos_sel = st.multiselect("Selecione anos para comparar:", anos_disp, default=anos_disp[-2:])
-    df_anos = df_fv[df_fv["Ano"].isin(anos_sel)]
-
-    tabela_anos = df_anos.groupby(["Unidade", "Ano"])[["Geração (kWh)", "Receita (R$)", "Redução GEE (tCO2)"]].sum().reset_index()
-    tabela_anos = tabela_anos.merge(df_meta, on="Unidade", how="left")
-    tabela_anos.columns = tabela_anos.columns.str.strip()
-    tabela_anos["Eficiência (kWh/kWp)"] = tabela_anos["Geração (kWh)"] / tabela_anos["Capacidade Instalada (kW)"]
-    if "Area" in tabela_anos.columns:
-        tabela_anos["Area"] = pd.to_numeric(tabela_anos["Area"], errors="coerce")
-        tabela_anos["Receita por área (R$/m²)"] = tabela_anos["Receita (R$)"] / tabela_anos["Area"]
-    else:
-        tabela_anos["Receita por área (R$/m²)"] = None
-
-    tabela_anos["Variação %"] = tabela_anos.groupby("Unidade")["Geração (kWh)"].pct_change().round(4) * 100
+    tabela_anos = dados.cubo.comparativo(anos_sel)
 
     # Texto explicativo: destaque do ano recorde de geração
     total_geracao = tabela_anos.groupby("Ano")["Geração (kWh)"].sum()
@@ -491,58 +443,34 @@ elif modulo.startswith("📊"):
 
     # Gráfico de barras - Geração
     st.markdown("**Geração anual por sistema:**")
-    fig_comp = px.bar(
-        tabela_anos, x="Unidade", y="Geração (kWh)", color="Ano", barmode="group",
-        text_auto=True, labels={"Geração (kWh)": "Geração Total (kWh)"}, template="simple_white")
-    fig_comp.update_layout(
-        font=dict(family="Montserrat, Segoe UI, Arial, sans-serif", size=17, color=COR_TEXTO),
-        height=380, xaxis_title="Sistema", yaxis_title="kWh", legend_title="Ano", margin=dict(t=50)
-    )
-    st.plotly_chart(fig_comp, use_container_width=True)
+    grafico(figura("comparativo", dados, metrica="Geração (kWh)", anos=tuple(anos_sel)))
 
     # Gráfico de barras - Eficiência
     st.markdown("**Eficiência (kWh/kWp) anual por sistema:**")
-    fig_eff = px.bar(
-        tabela_anos, x="Unidade", y="Eficiência (kWh/kWp)", color="Ano", barmode="group",
-        text_auto=True, labels={"Eficiência (kWh/kWp)": "kWh/kWp"}, template="simple_white")
-    fig_eff.update_layout(
-        font=dict(family="Montserrat, Segoe UI, Arial, sans-serif", size=17, color=COR_TEXTO),
-        height=350, xaxis_title="Sistema", yaxis_title="Eficiência (kWh/kWp)", legend_title="Ano", margin=dict(t=35)
-    )
-    st.plotly_chart(fig_eff, use_container_width=True)
+    grafico(figura("comparativo", dados, metrica="Eficiência (kWh/kWp)", anos=tuple(anos_sel)))
 
     # Radar/Polígono para comparar métricas normalizadas
     st.markdown("**Radar de comparação de desempenho (normalizado):**")
-    indic_cols = ["Geração (kWh)", "Eficiência (kWh/kWp)", "Receita (R$)", "Receita por área (R$/m²)", "Redução GEE (tCO2)"]
-    radardata = []
-    for ano in anos_sel:
-        df_rad = tabela_anos[tabela_anos["Ano"] == ano].copy()
-        if df_rad.empty: continue
-        for col in indic_cols:
-            max_val = df_rad[col].max()
-            df_rad[col + " N"] = df_rad[col] / max_val if max_val > 0 else 0
-        for idx, row in df_rad.iterrows():
-            radardata.append({
-                "Sistema": row["Unidade"],
-                "Ano": str(row["Ano"]),
-                **{col: row[col + " N"] for col in indic_cols}
-            })
-    if radardata:
-        df_radar = pd.DataFrame(radardata)
-        for ano in anos_sel:
-            df_radar_ano = df_radar[df_radar["Ano"] == str(ano)]
-            fig_radar = px.line_polar(
-                df_radar_ano.melt(id_vars=["Sistema"], value_vars=indic_cols, var_name="Indicador", value_name="Valor"),
-                r="Valor", theta="Indicador", color="Sistema", line_close=True,
-                title=f"Radar {ano}"
-            )
-            fig_radar.update_layout(
-                font=dict(family="Montserrat, Segoe UI, Arial, sans-serif", size=15, color=COR_TEXTO),
-                height=410
-            )
-            st.plotly_chart(fig_radar, use_container_width=True)
+    metodo = st.radio("Normalização:", list(METODOS_NORMALIZACAO), format_func=METODOS_NORMALIZACAO.get,
+                      horizontal=True)
+    radares = figura("radares", dados, anos=tuple(sorted(anos_sel)), metodo=metodo)
+    if radares:
+        for fig_radar in radares:
+            grafico(fig_radar)
     else:
         st.info("Não há dados suficientes para gerar o radar.")
+
+    # Previsão dos próximos 12 meses ao lado dos 12 meses mais recentes
+    st.markdown("**Previsão dos próximos 12 meses por sistema:**")
+    st.markdown(
+        tabela_formatada(
+            dados.previsao.comparativo(),
+            {"Últimos 12 meses (kWh)": 0, "Previsão (kWh)": 0, "Previsão Receita (R$)": "real", "Variação %": 2},
+            vazio="–"
+        ).to_html(index=False, classes="my-table", border=0),
+        unsafe_allow_html=True
+    )
+    grafico(figura("previsao_sistemas", dados))
 # ------------------------------------
 #            Equipe
 # ------------------------------------
@@ -600,4 +528,14 @@ elif modulo.startswith("👨‍💼"):
 st.markdown(
     f"<div style='text-align:center;font-size:1em;color:{COR_TEXTO};opacity:0.57;margin-top:4em;'>© Sistemas Fotovoltaicos e Mobilidade Elétrica - CEAMAZON — 2025</div>",
     unsafe_allow_html=True
-)
\ No newline at end of file
+)
+
+# ------------------------------------
+#   Painel de depuração
+# ------------------------------------
+if depurar:
+    with st.sidebar.expander("⏱️ Etapas desta rerun", expanded=True):
+        etapas = pd.DataFrame(registros()).reindex(
+            columns=["etapa", "tipo", "pai", "duracao_s", "linhas", "pico_alocado_mb", "rss_max_mb"])
+        st.caption(f"Rerun: {duracao_rodada():.3f} s, {len(etapas)} etapas medidas")
+        st.dataframe(etapas, hide_index=True, use_container_width=True)
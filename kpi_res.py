@@ -1,10 +1,7 @@
+import os
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import plotly.graph_objects as go
-import locale
-import numpy as np
-import statsmodels  
 
 # 1) Configuração da página
 st.set_page_config(layout="wide")
@@ -30,51 +27,34 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # 5) Locale pt_BR
-try:
-    locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
-except:
-    locale.setlocale(locale.LC_ALL, '')
-
-# 6) Helpers de formatação
-def format_real(v):
-    return f"R$ {v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-def format_num(v, casas=2):
-    s = f"{v:,.{casas}f}"
-    return s.replace(",", "X").replace(".", ",").replace("X", ".")
-
-# 7) Carregamento de dados
-xlsx_path = "kpis_energia_por_unidade.xlsx"
-
-@st.cache_data
-def carregar_dados_onibus(aba):
-    df = pd.read_excel(xlsx_path, sheet_name=aba)
-    df.columns = df.columns.str.strip()
-    if "Data" in df.columns:
-        df["Data"] = pd.to_datetime(df["Data"])
-    return df
-
-@st.cache_data
-def carregar_dados_fotovoltaico():
-    df = pd.read_excel(xlsx_path)
-    cols_gen = df.columns[1:-2].tolist()
-    col_tar  = df.columns[-2]
-    col_gee  = df.columns[-1]
-    dfm = df.melt(
-        id_vars=["Tempo", col_tar, col_gee],
-        value_vars=cols_gen,
-        var_name="Unidade", value_name="Geração (kWh)"
-    )
-    dfm["Tempo"] = pd.to_datetime(dfm["Tempo"])
-    dfm["Ano"]   = dfm["Tempo"].dt.year
-    dfm["Mês"]   = dfm["Tempo"].dt.strftime("%b")
-    dfm["Geração (kWh)"]      = pd.to_numeric(dfm["Geração (kWh)"], errors="coerce")
-    dfm[col_tar]              = pd.to_numeric(dfm[col_tar], errors="coerce")
-    dfm[col_gee]              = pd.to_numeric(dfm[col_gee], errors="coerce")
-    dfm["Receita (R$)"]       = dfm["Geração (kWh)"] * dfm[col_tar]
-    dfm["Redução GEE (tCO2)"] = (dfm["Geração (kWh)"] / 1000) * dfm[col_gee]
-    dfm.rename(columns={col_tar: "Tarifa (R$/kWh)"}, inplace=True)
-    return dfm
+from motor_kpis import configurar_locale
+configurar_locale()
+
+# 6) Helpers de formatação e dados (compartilhados com kpi.py)
+from motor_kpis import format_real, format_num, AtualizadorDados
+from figuras import figura_empilhada
+
+# 7) Carregamento de dados (um conjunto por processo, compartilhado pelas
+# sessões; com copy-on-write os recortes são vistas, não cópias)
+pd.set_option("mode.copy_on_write", True)
+# Planilha, pasta de planilhas (uma por campus) ou manifesto JSON de campi
+xlsx_path = os.environ.get("KPIS_FONTE", "kpis_energia_por_unidade.xlsx")
+
+# Dados do motor de KPIs: a série fotovoltaica inclui as leituras ingeridas
+# e a pirâmide hora/dia/mês/ano usada pelos gráficos de série temporal. Os
+# filtros de intervalo usam as somas acumuladas (busca binária + diferença).
+# Uma thread vigia a planilha e troca a versão já montada, sem travar reruns
+@st.cache_resource
+def atualizador():
+    return AtualizadorDados(xlsx_path, pasta_entrada="entrada").iniciar()
+
+dados = atualizador().atual()
+# Com vários campi, o painel mostra todos juntos ou um deles
+if dados.sites:
+    site = st.sidebar.selectbox("Campus:", ["Todos os campi", *dados.sites], key="site")
+    if site in dados.sites:
+        dados = dados.sites[site]
+NOMES_NIVEIS = {"hora": "horária", "dia": "diária", "mes": "mensal", "ano": "anual"}
 
 # 8) Cores e ícones
 cores = {"Rodoviário": "#2563eb", "Urbano": "#059669"}
@@ -84,18 +64,17 @@ icons = {"Rodoviário": "🚌 Ônibus Rodoviário", "Urbano": "🚍 Ônibus Urba
 relatorio = st.sidebar.radio("Selecione Relatório:", ["Mobilidade Elétrica", "Sistemas Fotovoltaicos"])
 
 if relatorio == "Mobilidade Elétrica":
-    linha     = st.sidebar.radio("Ônibus Elétrico:", ["Rodoviário", "Urbano"])
-    df_onibus = carregar_dados_onibus(linha)
-    cor_tema  = cores[linha]
-    emoji     = icons[linha]
+    linha     = st.sidebar.radio("Ônibus Elétrico:", list(dados.onibus))
+    somas     = dados.indice_onibus[linha]
+    cor_tema  = cores.get(linha, "#7c3aed")
+    emoji     = icons.get(linha, f"🚍 {linha}")
 
     # Filtro de intervalo de datas
-    if "Data" in df_onibus.columns:
-        data_min = df_onibus["Data"].min().to_pydatetime()
-        data_max = df_onibus["Data"].max().to_pydatetime()
-        intervalo = st.slider("Intervalo de Tempo:", min_value=data_min, max_value=data_max, value=(data_min, data_max))
-        df_onibus = df_onibus[(df_onibus["Data"] >= pd.to_datetime(intervalo[0])) & (df_onibus["Data"] <= pd.to_datetime(intervalo[1]))]
-        df_onibus["Mês"] = df_onibus["Data"].dt.strftime("%b")
+    data_min  = pd.Timestamp(somas.tempo[0]).to_pydatetime()
+    data_max  = pd.Timestamp(somas.tempo[-1]).to_pydatetime()
+    intervalo = st.slider("Intervalo de Tempo:", min_value=data_min, max_value=data_max, value=(data_min, data_max))
+    df_onibus = somas.recorte(*intervalo)
+    totais    = somas.totais(*intervalo)
 
     st.markdown(
         f"<h2 class='titulo' style='text-align:center; font-weight:bold;'>{emoji} — Mobilidade Elétrica</h2>",
@@ -108,11 +87,11 @@ if relatorio == "Mobilidade Elétrica":
 
     # KPIs principais
     c1, c2, c3, c4 = st.columns(4)
-    c1.metric("Total km Rodados", format_num(df_onibus["km"].sum(), 0))
-    c2.metric("Consumo Total (kWh)", format_num(df_onibus["kWh"].sum(), 0))
-    c3.metric("Dias de Operação", format_num(df_onibus["Dias"].sum(), 0))
-    if "Redução da Emissão" in df_onibus.columns:
-        c4.metric("Redução da Emissão (tCO2)", format_num(df_onibus["Redução da Emissão"].sum(), 2))
+    c1.metric("Total km Rodados", format_num(totais["km"], 0))
+    c2.metric("Consumo Total (kWh)", format_num(totais["kWh"], 0))
+    c3.metric("Dias de Operação", format_num(totais["Dias"], 0))
+    if "Redução da Emissão" in totais.index:
+        c4.metric("Redução da Emissão (tCO2)", format_num(totais["Redução da Emissão"], 2))
     else:
         c4.metric("Redução da Emissão (tCO2)", "N/A")
 
@@ -121,12 +100,12 @@ if relatorio == "Mobilidade Elétrica":
     # KPIs secundários
     ca, cb = st.columns(2)
     with ca:
-        ca.metric("Economia Total (R$)", format_real(df_onibus["Economia"].sum()))
-        ca.metric("Gasto em Energia (R$)", format_real(df_onibus["Gasto em Energia Elétrica"].sum()))
+        ca.metric("Economia Total (R$)", format_real(totais["Economia"]))
+        ca.metric("Gasto em Energia (R$)", format_real(totais["Gasto em Energia Elétrica"]))
     with cb:
-        cb.metric("Gasto em Diesel (R$)", format_real(df_onibus["Gasto em Diesel"].sum()))
-        if df_onibus["Percentual de Redução"].notnull().any():
-            p   = df_onibus["Percentual de Redução"].dropna().mean()
+        cb.metric("Gasto em Diesel (R$)", format_real(totais["Gasto em Diesel"]))
+        p = somas.medias(*intervalo)["Percentual de Redução"]
+        if pd.notna(p):
             txt = f"{p*100:.2f}%" if p <= 1 else f"{p:.2f}%"
             cb.metric("Redução de GEE (%)", txt.replace(".", ","))
         else:
@@ -155,18 +134,26 @@ if relatorio == "Mobilidade Elétrica":
         "<h4 class='titulo' style='text-align:center; font-weight:bold;'>Gráfico de Dispersão e Tendência: Consumo vs Distância</h4>",
         unsafe_allow_html=True
     )
+    # Reta e correlação vêm das somas acumuladas do tipo de ônibus, sem
+    # recalcular o corr nem ajustar um OLS (statsmodels) a cada rerun
     df_corr = df_onibus.dropna(subset=["kWh", "km"])
     if not df_corr.empty:
-        corr      = df_corr["km"].corr(df_corr["kWh"])
-        corr_text = f"Coef. correlação: {corr:.2f}"
+        ajuste    = dados.regressao_onibus[linha].ajuste(*intervalo)
+        corr_text = f"Coef. correlação: {ajuste.correlacao:.2f}"
         fig_corr  = px.scatter(
             df_corr, x="km", y="kWh",
             labels={"km":"Distância (km)", "kWh":"Consumo (kWh)"},
             color_discrete_sequence=[cor_tema],
-            template=plotly_template,
-            trendline="ols",
-            trendline_color_override=cor_tema
+            template=plotly_template
         )
+        if pd.notna(ajuste.inclinacao):
+            x_reta = [df_corr["km"].min(), df_corr["km"].max()]
+            fig_corr.add_scatter(
+                x=x_reta, y=ajuste.prever(x_reta), mode="lines", showlegend=False,
+                line=dict(color=cor_tema), name="Tendência (MQO)",
+                hovertemplate=(f"kWh = {ajuste.inclinacao:.4f} · km + {ajuste.intercepto:.2f}"
+                               f"<br>R² = {ajuste.r2:.3f}<extra></extra>")
+            )
         fig_corr.add_annotation(
             text=corr_text,
             xref="paper", yref="paper", x=0.05, y=0.95,
@@ -181,7 +168,10 @@ if relatorio == "Mobilidade Elétrica":
 
 else:
     modo = st.sidebar.radio("Sistemas Fotovoltaicos:", ["Sistemas Analisados", "Geral"])
-    df_fv = carregar_dados_fotovoltaico()
+    df_fv    = dados.fotovoltaico
+    piramide = dados.piramide
+    indice   = dados.indice_fotovoltaico
+    mn, mx   = (t.to_pydatetime() for t in piramide.intervalo())
 
     # Paleta de cores padronizada por unidade
     cores_unidades = {
@@ -196,34 +186,38 @@ else:
             "<h2 class='titulo' style='text-align:center; font-weight:bold;'>📊 Sistemas Fotovoltaicos – Analisados</h2>",
             unsafe_allow_html=True
         )
-        unidade = st.selectbox("Selecione Unidade:", df_fv["Unidade"].unique())
-        df_uni  = df_fv[df_fv["Unidade"] == unidade]
+        unidade   = st.selectbox("Selecione Unidade:", df_fv["Unidade"].unique())
+        intervalo = st.slider("Intervalo de Tempo:", min_value=mn, max_value=mx, value=(mn, mx))
+        totais    = indice.unidades[unidade].totais(*intervalo)
+        # Nível da pirâmide que cabe na janela: meses em históricos longos,
+        # horas ao aproximar um trecho com leituras de inversor
+        nivel, df_serie = piramide.serie(intervalo[0], intervalo[1], [unidade])
 
         c1, c2 = st.columns(2)
-        c1.metric("Geração (kWh)", format_num(df_uni["Geração (kWh)"].sum(), 0))
-        c2.metric("Receita (R$)", format_real(df_uni["Receita (R$)"].sum()))
+        c1.metric("Geração (kWh)", format_num(totais["Geração (kWh)"], 0))
+        c2.metric("Receita (R$)", format_real(totais["Receita (R$)"]))
         c3, c4 = st.columns(2)
-        c3.metric("Tarifa Média (R$/kWh)", format_num(df_uni["Tarifa (R$/kWh)"].mean(), 4))
-        c4.metric("Redução GEE (tCO2)", format_num(df_uni["Redução GEE (tCO2)"].sum(), 2))
+        c3.metric("Tarifa Média (R$/kWh)", format_num(dados.fatores_da_unidade(unidade).loc[intervalo[0]:intervalo[1], "Tarifa (R$/kWh)"].mean(), 4))
+        c4.metric("Redução GEE (tCO2)", format_num(totais["Redução GEE (tCO2)"], 2))
 
         st.divider()
 
         st.markdown(
-            "<h4 class='titulo' style='text-align:center; font-weight:bold;'>Gráficos Mensais</h4>",
+            f"<h4 class='titulo' style='text-align:center; font-weight:bold;'>Série {NOMES_NIVEIS[nivel]}</h4>",
             unsafe_allow_html=True
         )
         st.plotly_chart(px.line(
-            df_uni, x="Tempo", y="Geração (kWh)", color="Unidade",
+            df_serie, x="Tempo", y="Geração (kWh)", color="Unidade",
             template=plotly_template, color_discrete_map=cores_unidades
         ), use_container_width=True)
 
         st.plotly_chart(px.bar(
-            df_uni, x="Tempo", y="Receita (R$)", color="Unidade",
+            df_serie, x="Tempo", y="Receita (R$)", color="Unidade",
             template=plotly_template, color_discrete_map=cores_unidades
         ), use_container_width=True)
 
         st.plotly_chart(px.area(
-            df_uni, x="Tempo", y="Redução GEE (tCO2)", color="Unidade",
+            df_serie, x="Tempo", y="Redução GEE (tCO2)", color="Unidade",
             template=plotly_template, color_discrete_map=cores_unidades
         ), use_container_width=True)
 
@@ -232,23 +226,19 @@ else:
             "<h2 class='titulo' style='text-align:center; font-weight:bold;'>📈 Sistemas Fotovoltaicos – Geral</h2>",
             unsafe_allow_html=True
         )
-        mn = df_fv["Tempo"].min().to_pydatetime()
-        mx = df_fv["Tempo"].max().to_pydatetime()
         intervalo = st.slider("Intervalo de Tempo:", min_value=mn, max_value=mx, value=(mn, mx))
-        df_filtrado = df_fv[
-            (df_fv["Tempo"] >= pd.to_datetime(intervalo[0])) &
-            (df_fv["Tempo"] <= pd.to_datetime(intervalo[1]))
-        ]
+        totais    = indice.geral.totais(*intervalo)
 
         c1, c2, c3 = st.columns(3)
-        c1.metric("Geração (kWh)", format_num(df_filtrado["Geração (kWh)"].sum(), 0))
-        c2.metric("Receita (R$)", format_real(df_filtrado["Receita (R$)"].sum()))
-        c3.metric("Redução GEE (tCO2)", format_num(df_filtrado["Redução GEE (tCO2)"].sum(), 2))
+        c1.metric("Geração (kWh)", format_num(totais["Geração (kWh)"], 0))
+        c2.metric("Receita (R$)", format_real(totais["Receita (R$)"]))
+        c3.metric("Redução GEE (tCO2)", format_num(totais["Redução GEE (tCO2)"], 2))
 
         st.divider()
 
+        nivel, df_serie = piramide.serie(intervalo[0], intervalo[1])
         st.markdown(
-            "<h4 class='titulo' style='text-align:center; font-weight:bold;'>Gráficos Consolidados</h4>",
+            f"<h4 class='titulo' style='text-align:center; font-weight:bold;'>Gráficos Consolidados (série {NOMES_NIVEIS[nivel]})</h4>",
             unsafe_allow_html=True
         )
         indicadores = {
@@ -257,27 +247,15 @@ else:
             "Redução GEE (tCO2)": ("Redução","orange")
         }
         for campo, (ttl, cor) in indicadores.items():
-            df_stack = df_filtrado.groupby(["Tempo","Unidade"])[campo].sum().reset_index()
-            df_tot   = df_stack.groupby("Tempo")[campo].sum().reset_index()
-            fig = go.Figure()
-            for u in df_stack["Unidade"].unique():
-                tmp = df_stack[df_stack["Unidade"] == u]
-                fig.add_trace(go.Bar(x=tmp["Tempo"], y=tmp[campo], name=u,
-                                     marker=dict(opacity=0.85, color=cores_unidades.get(u, None))))
-            fig.add_trace(go.Scatter(x=df_tot["Tempo"], y=df_tot[campo], name="Total",
-                                     mode="lines+markers", line=dict(color=cor)))
-            fig.update_layout(
-                title=ttl, barmode="stack",
-                xaxis_title="Tempo", yaxis_title=campo,
-                template=plotly_template
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(figura_empilhada(
+                df_serie, campo, ttl, cor, cores=cores_unidades, template=plotly_template
+            ), use_container_width=True)
 
         st.markdown(
             "<h4 class='titulo' style='text-align:center; font-weight:bold;'>Comparativo Unidades</h4>",
             unsafe_allow_html=True
         )
-        df_uni_agg = df_filtrado.groupby("Unidade").agg({k:"sum" for k in indicadores}).reset_index()
+        df_uni_agg = indice.totais_unidades(*intervalo).reset_index()
         for k in indicadores:
             st.plotly_chart(px.bar(
                 df_uni_agg, x="Unidade", y=k, title=k,
@@ -0,0 +1,48 @@
+# Motor de KPIs sem dependência do Streamlit: carga da planilha, cubo de
+# KPIs, formatação pt-BR e relatórios. Os submódulos só são importados no
+# primeiro acesso a um nome (PEP 562), e FPDF/matplotlib só quando um PDF
+# é gerado, para manter rápida a partida do painel e dos scripts em lote.
+import importlib
+
+_NOMES = {
+    "formatacao": [
+        "configurar_locale", "format_real", "format_num", "format_real_serie",
+        "format_num_serie", "tabela_formatada",
+    ],
+    "cache": [
+        "CACHE_DIR", "assinatura_arquivo", "esquecer_assinaturas", "impressao_digital", "cache_colunar",
+        "pasta_cache", "arquivo_cache", "ler_cache", "salvar_cache",
+    ],
+    "cubo": ["METRICAS_FV", "CuboKPI", "montar_cubo", "atualizar_cubo"],
+    "dados": [
+        "ABAS_ONIBUS", "COL_TARIFA", "COL_GEE", "DadosKPI", "carregar_dados",
+        "carregar_dados_frota", "carregar_dados_fotovoltaico", "carregar_dados_sistema",
+        "arquivo_incrementos", "arquivo_leituras", "arquivo_anterior", "ingerir_lote", "esquecer_conjuntos",
+    ],
+    "piramide": ["NIVEIS", "MAX_PONTOS", "PiramideKPI", "montar_piramide"],
+    "intervalos": ["SomasAcumuladas", "IndiceTemporal", "somas_acumuladas", "indice_temporal"],
+    "regressao": ["Ajuste", "SomasRegressao", "somas_regressao"],
+    "previsao": ["HORIZONTE", "ModeloSazonal", "matriz_mensal", "ajustar_sazonal", "modelo_previsao"],
+    "normalizacao": ["METODOS_NORMALIZACAO", "normalizar", "normalizar_longo"],
+    "sites": ["THREADS_SITES", "listar_sites", "carregar_sites", "federar"],
+    "atualizacao": ["AtualizadorDados"],
+    "medicao": ["ARQUIVO_RASTRO", "medir", "iniciar_rodada", "encerrar_rodada", "registros", "duracao_rodada", "medindo"],
+    "leitores": ["MOTORES", "Planilha", "motores_disponiveis", "escolher_motor", "exportar_abas"],
+    "frota": ["COLUNAS_FROTA", "ler_frota", "montar_frota", "totais_frota"],
+    "esquemas": ["ErroEsquema", "Coluna", "EsquemaAba", "ler_aba"],
+    "api": ["ConsultasKPI", "ServidorKPI", "criar_servidor"],
+    "relatorio": ["LOGO_PDF", "gerar_pdf_kpis", "versao_modelo"],
+}
+_MODULO_DE = {nome: modulo for modulo, nomes in _NOMES.items() for nome in nomes}
+
+__all__ = sorted(_MODULO_DE)
+
+def __getattr__(nome):
+    if nome not in _MODULO_DE:
+        raise AttributeError(f"module {__name__!r} has no attribute {nome!r}")
+    valor = getattr(importlib.import_module(f".{_MODULO_DE[nome]}", __name__), nome)
+    globals()[nome] = valor
+    return valor
+
+def __dir__():
+    return __all__
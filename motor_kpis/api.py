@@ -0,0 +1,278 @@
+import datetime as dt
+import hashlib
+import json
+import math
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl
+import pandas as pd
+from .frota import totais_frota
+from .medicao import medir
+
+# -------------------------------
+#   API de consulta dos KPIs
+# -------------------------------
+# Os mesmos totais dos cartões do painel em JSON, sem sessão do Streamlit:
+#   GET /                         versão, unidades, veículos, tipos, anos e campi
+#   GET /fotovoltaico             Geração, Receita e Redução GEE (?unidade=)
+#   GET /fotovoltaico/unidades    os mesmos totais por unidade
+#   GET /onibus?tipo=Urbano       km, kWh, Economia, gastos e Redução de um
+#                                 veículo (aba da planilha)
+#   GET /frota?por=Tipo           os totais da frota por Tipo ou Veiculo
+# Com vários campi (motor_kpis.sites), ?site=Belém restringe qualquer rota
+# a um campus; sem ele, os totais são de todos os campi juntos.
+# Período: ?ano=2024[&mes=3] ou ?inicio=2024-01-01&fim=2024-06-30 (fechado);
+# sem filtro, toda a série. Os totais saem das somas acumuladas já montadas
+# pelo atualizador. Cada resposta fica num LRU por (versão, caminho,
+# parâmetros) e leva um ETag da versão e da consulta: um If-None-Match igual
+# responde 304 sem tocar nos dados.
+COLUNAS_MEDIA = ("Percentual de Redução",)
+
+class ErroConsulta(ValueError):
+    def __init__(self, mensagem, status=400):
+        super().__init__(mensagem)
+        self.status = status
+
+def _inteiro(parametros, nome, minimo=None, maximo=None):
+    valor = parametros.get(nome)
+    if valor is None:
+        return None
+    try:
+        valor = int(valor)
+    except ValueError:
+        raise ErroConsulta(f"Parâmetro {nome!r} deve ser inteiro") from None
+    if (minimo is not None and valor < minimo) or (maximo is not None and valor > maximo):
+        raise ErroConsulta(f"Parâmetro {nome!r} fora do intervalo")
+    return valor
+
+# Anos representáveis em Timestamp (ns)
+ANO_MINIMO = pd.Timestamp.min.year + 1
+ANO_MAXIMO = pd.Timestamp.max.year - 1
+
+def _data(parametros, nome):
+    valor = parametros.get(nome)
+    if valor is None:
+        return None
+    try:
+        data = pd.Timestamp(dt.date.fromisoformat(valor))
+    except (ValueError, OverflowError):
+        raise ErroConsulta(f"Parâmetro {nome!r} deve ser uma data AAAA-MM-DD entre {ANO_MINIMO} e {ANO_MAXIMO}") from None
+    if not ANO_MINIMO <= data.year <= ANO_MAXIMO:
+        raise ErroConsulta(f"Parâmetro {nome!r} fora do intervalo")
+    return data
+
+def _periodo(parametros):
+    # Intervalo fechado [inicio, fim] em Tempo; None deixa o lado aberto.
+    # Valores inválidos ou fora do alcance do Timestamp são erro 400
+    ano = _inteiro(parametros, "ano", ANO_MINIMO, ANO_MAXIMO)
+    mes = _inteiro(parametros, "mes", 1, 12)
+    if ano is not None:
+        periodo = pd.Period(year=ano, month=mes or 1, freq="M" if mes else "Y")
+        return periodo.start_time, periodo.end_time
+    if mes is not None:
+        raise ErroConsulta("Parâmetro 'mes' exige 'ano'")
+    inicio = _data(parametros, "inicio")
+    fim = _data(parametros, "fim")
+    if fim is not None:
+        fim = fim + pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+    if inicio is not None and fim is not None and inicio > fim:
+        raise ErroConsulta("Parâmetro 'inicio' posterior a 'fim'")
+    return inicio, fim
+
+def _numero(valor):
+    valor = float(valor)
+    return None if math.isnan(valor) else valor
+
+def _totais(somas, inicio, fim):
+    if len(somas.tempo):
+        inicio = somas.tempo[0] if inicio is None else inicio
+        fim = somas.tempo[-1] if fim is None else fim
+    else:
+        inicio = fim = pd.Timestamp(0)
+    totais = somas.totais(inicio, fim)
+    medias = somas.medias(inicio, fim)
+    return {
+        coluna: _numero(medias[coluna] if coluna in COLUNAS_MEDIA else totais[coluna])
+        for coluna in somas.colunas
+    }
+
+def _filtro(parametros, inicio, fim):
+    filtro = {nome: parametros[nome] for nome in ("unidade", "tipo") if nome in parametros}
+    if inicio is not None:
+        filtro["inicio"] = inicio.isoformat()
+    if fim is not None:
+        filtro["fim"] = fim.isoformat()
+    return filtro
+
+def _resumo(dados, parametros):
+    anos = sorted(int(ano) for ano in dados.fotovoltaico["Ano"].dropna().unique())
+    return {
+        "versao": dados.versao,
+        "unidades": list(dados.indice_fotovoltaico.unidades),
+        "veiculos": list(dados.indice_onibus),
+        "tipos_veiculo": [str(tipo) for tipo in dados.frota["Tipo"].cat.categories],
+        "anos": anos,
+        "sites": list(dados.sites),
+    }
+
+def _site(dados, parametros):
+    site = parametros.get("site")
+    if site is None:
+        return dados
+    if site not in dados.sites:
+        raise ErroConsulta(f"Campus desconhecido: {site!r}", 404)
+    return dados.sites[site]
+
+def _fotovoltaico(dados, parametros):
+    inicio, fim = _periodo(parametros)
+    indice = dados.indice_fotovoltaico
+    unidade = parametros.get("unidade")
+    if unidade is None:
+        somas = indice.geral
+    elif unidade in indice.unidades:
+        somas = indice.unidades[unidade]
+    else:
+        raise ErroConsulta(f"Unidade desconhecida: {unidade!r}", 404)
+    return {"versao": dados.versao, "filtro": _filtro(parametros, inicio, fim), "totais": _totais(somas, inicio, fim)}
+
+def _fotovoltaico_unidades(dados, parametros):
+    inicio, fim = _periodo(parametros)
+    return {
+        "versao": dados.versao,
+        "filtro": _filtro(parametros, inicio, fim),
+        "unidades": {
+            unidade: _totais(somas, inicio, fim) for unidade, somas in dados.indice_fotovoltaico.unidades.items()
+        },
+    }
+
+def _onibus(dados, parametros):
+    inicio, fim = _periodo(parametros)
+    tipo = parametros.get("tipo")
+    if tipo is None:
+        raise ErroConsulta(f"Parâmetro 'tipo' obrigatório ({', '.join(dados.indice_onibus)})")
+    if tipo not in dados.indice_onibus:
+        raise ErroConsulta(f"Tipo de ônibus desconhecido: {tipo!r}", 404)
+    return {
+        "versao": dados.versao,
+        "filtro": _filtro(parametros, inicio, fim),
+        "totais": _totais(dados.indice_onibus[tipo], inicio, fim),
+    }
+
+def _frota(dados, parametros):
+    inicio, fim = _periodo(parametros)
+    por = parametros.get("por", "Tipo")
+    if por not in ("Tipo", "Veiculo"):
+        raise ErroConsulta("Parâmetro 'por' deve ser 'Tipo' ou 'Veiculo'")
+    frota = dados.frota
+    if inicio is not None or fim is not None:
+        tempo = frota["Tempo"]
+        frota = frota[tempo.between(inicio or tempo.min(), fim or tempo.max())]
+    totais = totais_frota(frota, por)
+    return {
+        "versao": dados.versao,
+        "filtro": {**_filtro(parametros, inicio, fim), "por": por},
+        "grupos": {str(nome): {col: _numero(v) for col, v in linha.items()} for nome, linha in totais.iterrows()},
+        "total": {col: _numero(v) for col, v in totais.sum().items()},
+    }
+
+ROTAS = {
+    "/": _resumo,
+    "/fotovoltaico": _fotovoltaico,
+    "/fotovoltaico/unidades": _fotovoltaico_unidades,
+    "/onibus": _onibus,
+    "/frota": _frota,
+}
+
+class ConsultasKPI:
+    # atual: função que devolve o DadosKPI vigente (AtualizadorDados.atual)
+    def __init__(self, atual, max_itens=1024):
+        self.atual = atual
+        self.max_itens = max_itens
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def etag(self, versao, caminho, parametros):
+        consulta = json.dumps([caminho, sorted(parametros.items())], ensure_ascii=False)
+        return f'"{versao}-{hashlib.sha1(consulta.encode("utf-8")).hexdigest()[:12]}"'
+
+    def responder(self, caminho, parametros, etag_cliente=None):
+        # (status, etag, corpo); corpo None no 304
+        caminho = caminho.rstrip("/") or "/"
+        if caminho not in ROTAS:
+            return 404, None, _json({"erro": f"Rota desconhecida: {caminho}"})
+        try:
+            dados = self.atual()
+        except RuntimeError as e:
+            # Sem dados carregados ainda (planilha inválida ou ausente)
+            return 503, None, _json({"erro": str(e)})
+        etag = self.etag(dados.versao, caminho, parametros)
+        if etag_cliente is not None and etag in (e.strip() for e in etag_cliente.split(",")):
+            return 304, etag, None
+        chave = (dados.versao, caminho, tuple(sorted(parametros.items())))
+        with self._lock:
+            if chave in self._cache:
+                self._cache.move_to_end(chave)
+                return 200, etag, self._cache[chave]
+        try:
+            with medir("api", rota=caminho):
+                corpo = _json(ROTAS[caminho](_site(dados, parametros), parametros))
+        except ErroConsulta as e:
+            return e.status, None, _json({"erro": str(e)})
+        with self._lock:
+            self._cache[chave] = corpo
+            while len(self._cache) > self.max_itens:
+                self._cache.popitem(last=False)
+        return 200, etag, corpo
+
+    def limpar(self):
+        with self._lock:
+            self._cache.clear()
+
+def _json(objeto):
+    return json.dumps(objeto, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+class _Manipulador(BaseHTTPRequestHandler):
+    # Conexões persistentes: o cliente reaproveita o socket entre consultas.
+    # Cabeçalho e corpo saem em escritas separadas; sem o Nagle, a resposta
+    # não espera o ACK atrasado do cliente (~40 ms por requisição)
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_version = "KPIs"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        parametros = dict(parse_qsl(url.query))
+        try:
+            status, etag, corpo = self.server.consultas.responder(
+                url.path, parametros, self.headers.get("If-None-Match"))
+        except Exception as e:
+            self.log_error("Erro em %s: %r", self.path, e)
+            status, etag, corpo = 500, None, _json({"erro": "Erro interno"})
+        self.send_response(status)
+        if etag is not None:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if corpo is None:
+            self.send_header("Content-Length", "0")
+        else:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        if corpo is not None:
+            self.wfile.write(corpo)
+
+    def log_message(self, formato, *args):
+        if self.server.registrar:
+            super().log_message(formato, *args)
+
+class ServidorKPI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, endereco, consultas, registrar=False):
+        super().__init__(endereco, _Manipulador)
+        self.consultas = consultas
+        self.registrar = registrar
+
+def criar_servidor(atualizador, host="127.0.0.1", porta=8502, max_itens=1024, registrar=False):
+    return ServidorKPI((host, porta), ConsultasKPI(atualizador.atual, max_itens), registrar)
@@ -0,0 +1,141 @@
+import os
+import shutil
+import threading
+import time
+from .dados import ingerir_lote, arquivo_incrementos, arquivo_leituras
+from .sites import carregar_sites, listar_sites, varias_planilhas
+
+# -------------------------------
+#   Atualização em segundo plano
+# -------------------------------
+# Uma thread vigia a planilha, os arquivos de leituras ingeridas e, se
+# houver, uma pasta de entrada de lotes. Quando algo muda (e fica estável
+# por um ciclo, para não pegar um arquivo no meio da gravação), ela monta a
+# nova versão, roda os aquecimentos (figuras, PDFs...) e só então troca a
+# referência servida às sessões. Uma rerun nunca espera por uma montagem,
+# exceto a primeira do processo. Com uma pasta ou manifesto de campi
+# (motor_kpis.sites), vigia todas as planilhas, e os lotes de cada campus
+# ficam em pasta_entrada/<campus>/.
+SUFIXOS_LOTE = (".csv", ".jsonl", ".ndjson", ".json", ".xlsx", ".xls")
+
+class AtualizadorDados:
+    def __init__(self, fonte, intervalo=2.0, pasta_entrada=None, aquecimentos=()):
+        self.fonte = fonte
+        self.intervalo = intervalo
+        self.pasta_entrada = pasta_entrada
+        self.aquecimentos = list(aquecimentos)
+        self.ultimo_erro = None
+        self.tempo_aquecimento = None
+        self._dados = None
+        self._pronto = threading.Event()
+        self._parar = threading.Event()
+        self._thread = None
+
+    def atual(self):
+        # Versão vigente; só bloqueia até a primeira montagem terminar
+        if self._thread is None:
+            if self._dados is None:
+                self._atualizar()
+        else:
+            self._pronto.wait()
+        if self._dados is None:
+            raise RuntimeError(f"Não foi possível carregar {self.fonte}: {self.ultimo_erro}")
+        return self._dados
+
+    def iniciar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._vigiar, name="atualizador-kpis", daemon=True)
+            self._thread.start()
+        return self
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _lotes(self):
+        # [(planilha, lote)]
+        if not (self.pasta_entrada and os.path.isdir(self.pasta_entrada)):
+            return []
+        lotes = []
+        for site, xlsx_path in listar_sites(self.fonte).items():
+            pasta = os.path.join(self.pasta_entrada, site) if varias_planilhas(self.fonte) else self.pasta_entrada
+            if os.path.isdir(pasta):
+                lotes += [
+                    (xlsx_path, os.path.join(pasta, nome)) for nome in sorted(os.listdir(pasta))
+                    if nome.lower().endswith(SUFIXOS_LOTE)
+                ]
+        return lotes
+
+    def _arquivos(self):
+        # O manifesto e a própria pasta (mtime muda quando entra ou sai um campus)
+        arquivos = [self.fonte] if varias_planilhas(self.fonte) else []
+        for xlsx_path in listar_sites(self.fonte).values():
+            arquivos += [xlsx_path, arquivo_incrementos(xlsx_path), arquivo_leituras(xlsx_path)]
+        return arquivos + [lote for _, lote in self._lotes()]
+
+    def _assinatura(self):
+        # Só metadados (mtime/tamanho): o hash do conteúdo fica para a montagem
+        assinatura = []
+        for arquivo in self._arquivos():
+            try:
+                info = os.stat(arquivo)
+                assinatura.append((arquivo, info.st_mtime_ns, info.st_size))
+            except OSError:
+                pass
+        return tuple(assinatura)
+
+    def _vigiar(self):
+        # A assinatura é tirada antes de cada montagem: um arquivo gravado ou
+        # um lote que chega durante a montagem aparece como mudança no ciclo
+        # seguinte (e os arquivos que a própria montagem grava custam só mais
+        # uma volta sem troca de versão)
+        vista = self._assinatura()
+        self._atualizar()
+        estavel = True
+        while not self._parar.wait(self.intervalo):
+            assinatura = self._assinatura()
+            if assinatura != vista:
+                vista, estavel = assinatura, False
+            elif not estavel:
+                estavel = True
+                self._atualizar()
+
+    def _ingerir_entrada(self):
+        # Lotes soltos na pasta de entrada vão para processados/ (ou
+        # rejeitados/, quando a ingestão falha)
+        erros = []
+        for xlsx_path, arquivo in self._lotes():
+            try:
+                ingerir_lote(xlsx_path, arquivo)
+                destino = "processados"
+            except Exception as e:
+                erros.append(f"{os.path.basename(arquivo)}: {e}")
+                destino = "rejeitados"
+            pasta = os.path.join(os.path.dirname(arquivo), destino)
+            os.makedirs(pasta, exist_ok=True)
+            shutil.move(arquivo, os.path.join(pasta, os.path.basename(arquivo)))
+        return erros
+
+    def _atualizar(self):
+        try:
+            erros = self._ingerir_entrada()
+            dados = carregar_sites(self.fonte)
+            if self._dados is None or dados.versao != self._dados.versao:
+                inicio = time.perf_counter()
+                dados.aquecer()
+                for aquecer in self.aquecimentos:
+                    # Um aquecimento que falha não impede a troca de versão
+                    try:
+                        aquecer(dados)
+                    except Exception as e:
+                        erros.append(f"{getattr(aquecer, '__name__', aquecer)}: {e}")
+                self.tempo_aquecimento = time.perf_counter() - inicio
+                self._dados = dados
+            self.ultimo_erro = "; ".join(erros) or None
+        except Exception as e:
+            # Planilha inválida ou no meio de uma gravação: continua servindo
+            # a versão anterior e tenta de novo na próxima mudança
+            self.ultimo_erro = str(e)
+        finally:
+            self._pronto.set()
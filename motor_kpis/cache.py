@@ -0,0 +1,122 @@
+import hashlib
+import logging
+import os
+import shutil
+from functools import wraps
+import pandas as pd
+
+# -------------------------------
+#   Cache colunar da planilha
+# -------------------------------
+# Os dados derivados de cada aba são gravados em Feather (Arrow) em
+# CACHE_DIR/<planilha>/<hash do conteúdo>/. Uma edição na planilha gera um
+# novo hash, e as versões antigas da mesma planilha são descartadas. Com
+# lotes ingeridos, o estado completo fica em <hash>-<hash dos incrementos>/.
+CACHE_DIR = os.environ.get("KPIS_CACHE_DIR", ".cache_kpis")
+# Com KPIS_MMAP=1 o Feather é gravado sem compressão e lido por memory map:
+# os processos do servidor que abrem a mesma versão dividem as páginas do
+# arquivo, e as colunas chegam somente leitura, sem cópia para a memória
+MAPEAR_CACHE = os.environ.get("KPIS_MMAP", "") not in ("", "0")
+
+_assinaturas = {}
+_log = logging.getLogger(__name__)
+
+def assinatura_arquivo(caminho):
+    # Hash do conteúdo, recalculado apenas quando mtime/tamanho mudam
+    info = os.stat(caminho)
+    chave = (os.path.abspath(caminho), info.st_mtime_ns, info.st_size)
+    if chave not in _assinaturas:
+        h = hashlib.sha256()
+        with open(caminho, "rb") as f:
+            for bloco in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloco)
+        _assinaturas[chave] = h.hexdigest()[:16]
+    return _assinaturas[chave]
+
+def esquecer_assinaturas():
+    # Força o hash do conteúdo na próxima assinatura_arquivo (benchmarks)
+    _assinaturas.clear()
+
+def impressao_digital(df):
+    # Hash do conteúdo de um DataFrame (independe do índice)
+    valores = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    h = hashlib.sha256(valores.tobytes())
+    h.update("|".join(map(str, df.columns)).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def pasta_cache(xlsx_path):
+    caminho = os.path.abspath(xlsx_path)
+    nome = os.path.splitext(os.path.basename(caminho))[0]
+    sufixo = hashlib.sha1(caminho.encode("utf-8")).hexdigest()[:8]
+    return os.path.join(CACHE_DIR, f"{nome}-{sufixo}")
+
+def _tabela_mapeavel(df):
+    # NaN de float fica como valor e não como nulo do Arrow: a coluna volta
+    # do arquivo mapeado sem ser copiada para preencher os nulos
+    import pyarrow as pa
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    for i, col in enumerate(df.columns):
+        if df[col].dtype.kind == "f":
+            tabela = tabela.set_column(i, tabela.field(i), pa.array(df[col].to_numpy(), from_pandas=False))
+    return tabela
+
+def _gravar_cache(df, arquivo):
+    pasta_versao = os.path.dirname(arquivo)
+    pasta_planilha = os.path.dirname(pasta_versao)
+    os.makedirs(pasta_versao, exist_ok=True)
+    # Remove versões antigas da mesma planilha. A pasta-base (<hash>) convive
+    # com o estado mesclado mais recente (<hash>-<incrementos>)
+    atual = os.path.basename(pasta_versao)
+    base = atual.split("-")[0]
+    for antiga in os.listdir(pasta_planilha):
+        caminho = os.path.join(pasta_planilha, antiga)
+        mantida = antiga in (atual, base) or (atual == base and antiga.startswith(base + "-"))
+        if os.path.isdir(caminho) and not mantida:
+            shutil.rmtree(caminho, ignore_errors=True)
+    tmp = f"{arquivo}.{os.getpid()}.tmp"
+    if MAPEAR_CACHE:
+        from pyarrow import feather
+        feather.write_feather(_tabela_mapeavel(df), tmp, compression="uncompressed")
+    else:
+        df.to_feather(tmp)
+    os.replace(tmp, arquivo)
+
+def arquivo_cache(xlsx_path, versao, nome):
+    return os.path.join(pasta_cache(xlsx_path), versao, nome + ".feather")
+
+def ler_cache(arquivo):
+    if os.path.exists(arquivo):
+        try:
+            if MAPEAR_CACHE:
+                from pyarrow import feather
+                return feather.read_table(arquivo, memory_map=True).to_pandas(split_blocks=True)
+            return pd.read_feather(arquivo)
+        except Exception:
+            pass
+    return None
+
+def salvar_cache(df, arquivo):
+    try:
+        _gravar_cache(df, arquivo)
+    except Exception as e:
+        # pyarrow ausente, disco cheio ou coluna não serializável: segue sem
+        # cache, mas registra o motivo
+        _log.warning("Cache não gravado em %s: %r", arquivo, e)
+
+def cache_colunar(nome):
+    def decorador(func):
+        @wraps(func)
+        def wrapper(xlsx_path, *args):
+            try:
+                versao = assinatura_arquivo(xlsx_path)
+            except (OSError, TypeError):
+                # Arquivo enviado em memória: sem cache
+                return func(xlsx_path, *args)
+            arquivo = arquivo_cache(xlsx_path, versao, "_".join([nome, *map(str, args)]))
+            df = ler_cache(arquivo)
+            if df is None:
+                df = func(xlsx_path, *args)
+                salvar_cache(df, arquivo)
+            return df
+        return wrapper
+    return decorador
@@ -0,0 +1,83 @@
+from dataclasses import dataclass
+import pandas as pd
+from .medicao import medir
+
+METRICAS_FV = ["Geração (kWh)", "Receita (R$)", "Redução GEE (tCO2)"]
+
+@dataclass(frozen=True)
+class CuboKPI:
+    # mensal: índice (Unidade, Ano, MesNum); anual: índice (Unidade, Ano)
+    mensal: pd.DataFrame
+    anual: pd.DataFrame
+
+    def _meses(self, ano, mes=None):
+        try:
+            df = self.mensal.xs(ano, level="Ano")
+        except KeyError:
+            # Ano sem leituras: período vazio, totais zerados
+            df = self.mensal.iloc[:0].droplevel("Ano")
+        if mes is not None:
+            df = df[df.index.get_level_values("MesNum") == mes]
+        return df
+
+    @medir("pivot_mensal")
+    def pivot_mensal(self, metrica, ano, mes=None):
+        # Equivalente ao pivot_table(index="MesNum", columns="Unidade") do período
+        return self._meses(ano, mes)[metrica].unstack("Unidade", fill_value=0).sort_index()
+
+    def totais_unidade(self, ano, mes=None):
+        return self._meses(ano, mes)[METRICAS_FV].groupby(level="Unidade").sum()
+
+    def totais(self, ano, mes=None):
+        return self._meses(ano, mes)[METRICAS_FV].sum()
+
+    def serie_unidade(self, unidade, ano):
+        try:
+            return self.mensal.xs((unidade, ano), level=("Unidade", "Ano")).reset_index()
+        except KeyError:
+            return self.mensal.iloc[:0].reset_index()
+
+    def resumo_unidade(self, unidade, ano):
+        return self.anual.reindex([(unidade, ano)]).iloc[0]
+
+    @medir("comparativo")
+    def comparativo(self, anos):
+        tabela = self.anual[self.anual.index.get_level_values("Ano").isin(anos)].reset_index()
+        # A variação é relativa ao ano anterior entre os anos selecionados
+        tabela["Variação %"] = tabela.groupby("Unidade")["Geração (kWh)"].pct_change().round(4) * 100
+        return tabela
+
+def _unidade_texto(df):
+    # Unidade categórica no frame longo; no cubo o nível volta a ser texto
+    return df.set_index(df.index.set_levels(df.index.levels[0].astype(object), level=0))
+
+@medir("montar_cubo")
+def montar_cubo(df_fv, df_meta, fatores):
+    agregacoes = {col: "sum" for col in METRICAS_FV}
+    agregacoes["Tarifa (R$/kWh)"] = "mean"
+    df_fv = df_fv.assign(**{"Tarifa (R$/kWh)": df_fv["Tempo"].map(fatores["Tarifa (R$/kWh)"])})
+    mensal = _unidade_texto(df_fv.groupby(["Unidade", "Ano", "MesNum"], observed=True).agg(agregacoes))
+    anual = _unidade_texto(df_fv.groupby(["Unidade", "Ano"], observed=True).agg(agregacoes)).reset_index()
+    anual = anual.merge(df_meta, on="Unidade", how="left")
+    anual["Eficiência (kWh/kWp)"] = anual["Geração (kWh)"] / anual["Capacidade Instalada (kW)"]
+    if "Area" in anual.columns:
+        anual["Area"] = pd.to_numeric(anual["Area"], errors="coerce")
+        anual["Receita por área (R$/m²)"] = anual["Receita (R$)"] / anual["Area"]
+    else:
+        anual["Receita por área (R$/m²)"] = None
+    return CuboKPI(mensal=mensal, anual=anual.set_index(["Unidade", "Ano"]))
+
+def indice_colunas(df, colunas):
+    return pd.MultiIndex.from_frame(df[colunas])
+
+@medir("atualizar_cubo")
+def atualizar_cubo(cubo, df_fv, afetados, df_meta, fatores):
+    # Refaz só os grupos (Unidade, Ano) afetados e mantém o resto do cubo
+    grupos = indice_colunas(afetados, ["Unidade", "Ano"]).unique()
+    parcial = montar_cubo(df_fv[indice_colunas(df_fv, ["Unidade", "Ano"]).isin(grupos)], df_meta, fatores)
+    mensal = cubo.mensal[~cubo.mensal.index.droplevel("MesNum").isin(grupos)]
+    anual = cubo.anual[~cubo.anual.index.isin(grupos)]
+    return CuboKPI(
+        mensal=pd.concat([mensal, parcial.mensal]).sort_index(),
+        anual=pd.concat([anual, parcial.anual]).sort_index(),
+    )
@@ -0,0 +1,542 @@
+import os
+import shutil
+import threading
+from dataclasses import dataclass, field
+from functools import cached_property
+from types import MappingProxyType
+from typing import Mapping
+import numpy as np
+import pandas as pd
+from .formatacao import configurar_locale
+from . import cache
+from .cache import (
+    assinatura_arquivo, impressao_digital, cache_colunar,
+    pasta_cache, arquivo_cache, ler_cache, salvar_cache,
+)
+from .leitores import Planilha
+from .esquemas import COL_TARIFA, COL_GEE, ESQUEMA_FOTOVOLTAICO, ESQUEMA_SISTEMA, ler_aba
+from .cubo import METRICAS_FV, CuboKPI, montar_cubo, atualizar_cubo, indice_colunas
+from .medicao import medir
+from .intervalos import indice_temporal, somas_acumuladas
+from .regressao import somas_regressao
+from .previsao import modelo_previsao
+from .frota import ler_frota
+from .piramide import NIVEIS, PiramideKPI, montar_piramide, piramide_de_niveis, truncar
+
+# -------------------------------
+#   Preparação de cada aba
+# -------------------------------
+# As abas chegam de ler_aba já projetadas e tipadas pelo esquema
+def _preparar_onibus(df):
+    configurar_locale()
+    df["Ano"] = df["Tempo"].dt.year
+    df["MesNum"] = df["Tempo"].dt.month
+    df["Mês"] = df["Tempo"].dt.strftime("%b %Y")
+    return df
+
+COLUNAS_LEITURA = ["Tempo", COL_TARIFA, COL_GEE, "Unidade", "Geração (kWh)"]
+
+def _colunas_geracao(df):
+    return [
+        col for col in df.columns
+        if col not in ["Tempo", COL_TARIFA, COL_GEE] and not col.startswith("Unnamed")
+    ]
+
+@medir("melt")
+def fundir_fotovoltaico(df):
+    # Aba larga (uma coluna por unidade) -> uma leitura por (Tempo, Unidade)
+    return df.melt(
+        id_vars=["Tempo", COL_TARIFA, COL_GEE],
+        value_vars=_colunas_geracao(df),
+        var_name="Unidade", value_name="Geração (kWh)"
+    )
+
+def _rotulos_mes(tempo):
+    # "%b %Y" calculado só uma vez por Tempo distinto, já como categoria
+    codigos, unicos = pd.factorize(tempo, sort=True)
+    codigos_rotulo, rotulos = pd.factorize(pd.DatetimeIndex(unicos).strftime("%b %Y"))
+    return pd.Categorical.from_codes(codigos_rotulo[codigos], categories=rotulos)
+
+def compactar_leituras(dfm):
+    # Unidade e Mês como categorias e Ano/MesNum em inteiros pequenos. Depois
+    # de um concat as categorias diferentes viram object e são refeitas aqui;
+    # meses ou unidades removidos não ficam como categorias vazias
+    dfm["Unidade"] = dfm["Unidade"].astype("category").cat.remove_unused_categories()
+    if isinstance(dfm["Mês"].dtype, pd.CategoricalDtype):
+        dfm["Mês"] = dfm["Mês"].cat.remove_unused_categories()
+    else:
+        dfm["Mês"] = _rotulos_mes(dfm["Tempo"])
+    return dfm.astype({"Ano": "int16", "MesNum": "int8"})
+
+@medir("colunas_derivadas")
+def derivar_fotovoltaico(dfm):
+    # Leituras no formato COLUNAS_LEITURA -> frame longo compacto. Tarifa e
+    # fator de emissão só entram no cálculo: ficam na tabela de fatores
+    configurar_locale()
+    dfm["Tempo"] = pd.to_datetime(dfm["Tempo"], errors="coerce")
+    dfm = dfm[dfm["Tempo"].notna()]
+    geracao = pd.to_numeric(dfm["Geração (kWh)"], errors="coerce")
+    fv = pd.DataFrame({
+        "Tempo": dfm["Tempo"],
+        "Unidade": dfm["Unidade"],
+        "Geração (kWh)": geracao,
+        "Ano": dfm["Tempo"].dt.year,
+        "MesNum": dfm["Tempo"].dt.month,
+        "Mês": _rotulos_mes(dfm["Tempo"]),
+        "Receita (R$)": geracao * pd.to_numeric(dfm[COL_TARIFA], errors="coerce"),
+        "Redução GEE (tCO2)": (geracao / 1000) * pd.to_numeric(dfm[COL_GEE], errors="coerce"),
+    })
+    return compactar_leituras(fv.reset_index(drop=True))
+
+def _fatores(df):
+    # Tarifa e fator de emissão por Tempo: iguais para todas as unidades
+    fatores = pd.DataFrame({
+        "Tempo": pd.to_datetime(df["Tempo"], errors="coerce"),
+        "Tarifa (R$/kWh)": pd.to_numeric(df[COL_TARIFA], errors="coerce"),
+        COL_GEE: pd.to_numeric(df[COL_GEE], errors="coerce"),
+    })
+    fatores = fatores.dropna(subset=["Tempo"]).drop_duplicates("Tempo", keep="last")
+    return fatores.set_index("Tempo").sort_index()
+
+def _juntar_fatores(fatores, novos):
+    # Valores de novos têm prioridade sobre os já conhecidos
+    return novos.combine_first(fatores).sort_index()
+
+def _preparar_fotovoltaico(df):
+    return derivar_fotovoltaico(fundir_fotovoltaico(df))
+
+@cache_colunar("frota")
+def carregar_dados_frota(xlsx_path):
+    return _preparar_onibus(ler_frota(xlsx_path))
+
+@cache_colunar("fotovoltaico")
+def carregar_dados_fotovoltaico(xlsx_path):
+    return _preparar_fotovoltaico(ler_aba(xlsx_path, ESQUEMA_FOTOVOLTAICO))
+
+@cache_colunar("sistema")
+def carregar_dados_sistema(xlsx_path):
+    return ler_aba(xlsx_path, ESQUEMA_SISTEMA)
+
+# -------------------------------
+#   Conjunto completo de dados
+# -------------------------------
+# Abas de ônibus da planilha original; a frota completa é descoberta nas
+# abas da planilha (motor_kpis.frota)
+ABAS_ONIBUS = ("Rodoviário", "Urbano")
+
+# Propriedades calculadas no primeiro uso que o atualizador monta em segundo plano
+PROPRIEDADES_AQUECIDAS = ("indice_fotovoltaico", "indice_onibus", "regressao_onibus", "previsao")
+
+@dataclass(frozen=True)
+class DadosKPI:
+    # Uma instância por versão da planilha, compartilhada por todas as
+    # sessões do processo: os quadros não devem ser modificados
+    versao: str
+    fotovoltaico: pd.DataFrame
+    sistema: pd.DataFrame
+    # Todos os veículos num frame longo (Veiculo, Tipo, Tempo, métricas)
+    frota: pd.DataFrame
+    cubo: CuboKPI
+    piramide: PiramideKPI
+    # Tarifa (R$/kWh) e fator de emissão por Tempo (com a coluna Site quando
+    # junta vários campi: um Tempo para cada campus)
+    fatores: pd.DataFrame
+    # Conjunto de cada campus quando este junta várias planilhas (sites.py)
+    sites: Mapping[str, "DadosKPI"] = field(default_factory=lambda: MappingProxyType({}))
+
+    # Linhas de cada veículo, na ordem das abas
+    @cached_property
+    def onibus(self):
+        return MappingProxyType({
+            str(veiculo): df.reset_index(drop=True)
+            for veiculo, df in self.frota.groupby("Veiculo", observed=True, sort=False)
+        })
+
+    # Somas acumuladas para os filtros por intervalo, montadas no primeiro uso
+    @cached_property
+    def indice_fotovoltaico(self):
+        return indice_temporal(self.fotovoltaico, METRICAS_FV)
+
+    @cached_property
+    def indice_onibus(self):
+        indices = {}
+        for tipo, df in self.onibus.items():
+            colunas = [col for col in df.select_dtypes("number").columns if col not in ("Ano", "MesNum")]
+            indices[tipo] = somas_acumuladas(df, colunas)
+        return MappingProxyType(indices)
+
+    # Campus de cada unidade; None com uma planilha só
+    @cached_property
+    def site_das_unidades(self):
+        if "Site" not in self.fotovoltaico.columns:
+            return None
+        pares = self.fotovoltaico[["Unidade", "Site"]].drop_duplicates("Unidade")
+        return pd.Series(pares["Site"].astype(str).to_numpy(), index=pares["Unidade"].astype(str).to_numpy())
+
+    def fatores_da_unidade(self, unidade):
+        if self.site_das_unidades is None:
+            return self.fatores
+        return self.fatores[self.fatores["Site"] == self.site_das_unidades[unidade]]
+
+    # Sazonalidade × tendência de todas as unidades, ajustada uma vez por versão
+    @cached_property
+    def previsao(self):
+        return modelo_previsao(self.cubo, self.fatores, self.site_das_unidades)
+
+    # Reta kWh × km de cada tipo de ônibus para qualquer intervalo
+    @cached_property
+    def regressao_onibus(self):
+        return MappingProxyType({
+            tipo: somas_regressao(df, "km", "kWh") for tipo, df in self.onibus.items()
+        })
+
+    def aquecer(self):
+        # Monta as somas acumuladas dos filtros por intervalo, as retas e o
+        # modelo de previsão antes de servir a versão, também de cada campus
+        for conjunto in (self, *self.sites.values()):
+            for nome in PROPRIEDADES_AQUECIDAS:
+                getattr(conjunto, nome)
+        return self
+
+_conjuntos = {}
+# Uma montagem por planilha de cada vez: o vigia em segundo plano e as
+# sessões não refazem o mesmo estado em paralelo, mas planilhas diferentes
+# (os campi de motor_kpis.sites) montam ao mesmo tempo
+_travas = {}
+_trava_travas = threading.Lock()
+
+def _trava(xlsx_path):
+    with _trava_travas:
+        return _travas.setdefault(os.path.abspath(xlsx_path), threading.RLock())
+
+def esquecer_conjuntos():
+    # Descarta os conjuntos em memória: a próxima carga vem do disco
+    _conjuntos.clear()
+
+NOMES_QUADROS = ["fotovoltaico", "fatores", "sistema", "frota"]
+# Guardados só no estado-base, para reaproveitar a revisão seguinte da planilha
+EXTRAS_BASE = ["linhas_planilha", "colunas_planilha"]
+CHAVE_LEITURA = ["Tempo", "Unidade"]
+
+def _concatenar(partes, **opcoes):
+    # Partes vazias ficam de fora: no caso comum de só acrescentar linhas o
+    # concat misturaria um frame vazio (aviso de dtype do pandas)
+    cheias = [parte for parte in partes if len(parte)]
+    return pd.concat(cheias or partes[:1], **opcoes)
+
+def _juntar_leituras(partes):
+    # Mesma ordem do melt: unidade (na ordem em que aparece) e depois Tempo
+    df = compactar_leituras(_concatenar(partes, ignore_index=True))
+    ordem = pd.Index(df["Unidade"].unique()).get_indexer(df["Unidade"])
+    return df.iloc[np.lexsort((df["Tempo"].to_numpy(), ordem))].reset_index(drop=True)
+
+@medir("leitura_excel")
+def ler_planilha(xlsx_path, motor=None):
+    # Abre a planilha uma única vez; a aba fotovoltaica volta no formato largo
+    with Planilha(xlsx_path, motor) as planilha:
+        larga = ler_aba(planilha, ESQUEMA_FOTOVOLTAICO)
+        quadros = {"sistema": ler_aba(planilha, ESQUEMA_SISTEMA), "frota": _preparar_onibus(ler_frota(planilha))}
+    return larga, quadros
+
+def _linhas_planilha(larga):
+    # Hash de cada linha da aba larga, para detectar meses alterados
+    return pd.DataFrame({
+        "Tempo": pd.to_datetime(larga["Tempo"], errors="coerce"),
+        "hash": pd.util.hash_pandas_object(larga, index=False).to_numpy(),
+    })
+
+@medir("ler_cache", linhas=lambda quadros: quadros and len(quadros["fotovoltaico"]))
+def _ler_estado(xlsx_path, versao, extras=()):
+    nomes = [*NOMES_QUADROS, "cubo_mensal", "cubo_anual", *extras]
+    quadros = {nome: ler_cache(arquivo_cache(xlsx_path, versao, nome)) for nome in nomes}
+    if any(df is None for df in quadros.values()):
+        return None
+    quadros["cubo"] = CuboKPI(
+        mensal=quadros.pop("cubo_mensal").set_index(["Unidade", "Ano", "MesNum"]),
+        anual=quadros.pop("cubo_anual").set_index(["Unidade", "Ano"]),
+    )
+    quadros["fatores"] = quadros["fatores"].set_index("Tempo")
+    return quadros
+
+@medir("gravar_cache")
+def _salvar_estado(xlsx_path, versao, quadros):
+    for nome, df in quadros.items():
+        if nome == "fatores":
+            salvar_cache(df.reset_index(), arquivo_cache(xlsx_path, versao, nome))
+        elif nome != "cubo":
+            salvar_cache(df, arquivo_cache(xlsx_path, versao, nome))
+    # O cubo vai por último: um estado sem ele é tratado como incompleto
+    salvar_cache(quadros["cubo"].mensal.reset_index(), arquivo_cache(xlsx_path, versao, "cubo_mensal"))
+    salvar_cache(quadros["cubo"].anual.reset_index(), arquivo_cache(xlsx_path, versao, "cubo_anual"))
+
+def _mapear_estado(xlsx_path, versao, quadros):
+    # Com o cache mapeado, o estado recém-montado é trocado pelas páginas do
+    # arquivo: todos os processos passam a ler a mesma cópia somente leitura
+    if not cache.MAPEAR_CACHE:
+        return quadros
+    return _ler_estado(xlsx_path, versao) or quadros
+
+def _base_anterior(xlsx_path, versao):
+    # Estado-base mais recente de outra revisão da mesma planilha
+    pasta = pasta_cache(xlsx_path)
+    if not os.path.isdir(pasta):
+        return None
+    candidatas = [nome for nome in os.listdir(pasta) if "-" not in nome and nome != versao]
+    candidatas.sort(key=lambda nome: os.path.getmtime(os.path.join(pasta, nome)), reverse=True)
+    for nome in candidatas:
+        quadros = _ler_estado(xlsx_path, nome, EXTRAS_BASE)
+        if quadros is not None:
+            return quadros
+    return None
+
+def _montar_base(xlsx_path, versao):
+    larga, quadros = ler_planilha(xlsx_path)
+    linhas = _linhas_planilha(larga)
+    quadros["linhas_planilha"] = linhas
+    quadros["colunas_planilha"] = pd.DataFrame({"coluna": list(larga.columns)})
+    quadros["fatores"] = fatores = _fatores(larga)
+    anterior = _base_anterior(xlsx_path, versao)
+    if anterior is None or anterior["colunas_planilha"]["coluna"].tolist() != list(larga.columns):
+        quadros["fotovoltaico"] = _preparar_fotovoltaico(larga)
+        quadros["cubo"] = montar_cubo(quadros["fotovoltaico"], quadros["sistema"], fatores)
+        return quadros
+    # Nova revisão com as mesmas colunas: só os meses novos ou alterados
+    # passam pelo melt e pelas colunas derivadas
+    velhas = anterior["linhas_planilha"]
+    novas = ~indice_colunas(linhas, ["Tempo", "hash"]).isin(indice_colunas(velhas, ["Tempo", "hash"]))
+    removidas = ~indice_colunas(velhas, ["Tempo", "hash"]).isin(indice_colunas(linhas, ["Tempo", "hash"]))
+    tempos = _concatenar([linhas.loc[novas, "Tempo"], velhas.loc[removidas, "Tempo"]])
+    recalculadas = _preparar_fotovoltaico(larga[novas].copy())
+    fv = anterior["fotovoltaico"]
+    trocadas = fv["Tempo"].isin(tempos)
+    afetados = _concatenar([fv.loc[trocadas, ["Unidade", "Ano"]], recalculadas[["Unidade", "Ano"]]])
+    fv = _juntar_leituras([fv[~trocadas], recalculadas])
+    quadros["fotovoltaico"] = fv
+    if impressao_digital(quadros["sistema"]) == impressao_digital(anterior["sistema"]):
+        quadros["cubo"] = atualizar_cubo(anterior["cubo"], fv, afetados, quadros["sistema"], fatores)
+    else:
+        quadros["cubo"] = montar_cubo(fv, quadros["sistema"], fatores)
+    return quadros
+
+def _aplicar_lote(quadros, lote):
+    # Leituras do lote (formato COLUNAS_LEITURA) substituem as de mesmo
+    # (Tempo, Unidade); tarifa e fator do lote atualizam a tabela de fatores
+    fv = quadros["fotovoltaico"]
+    fatores = _juntar_fatores(quadros["fatores"], _fatores(lote))
+    lote = derivar_fotovoltaico(lote.copy())
+    substituidas = indice_colunas(fv, CHAVE_LEITURA).isin(indice_colunas(lote, CHAVE_LEITURA))
+    afetados = _concatenar([fv.loc[substituidas, ["Unidade", "Ano"]], lote[["Unidade", "Ano"]]])
+    fv = _juntar_leituras([fv[~substituidas], lote])
+    novos = {nome: df for nome, df in quadros.items() if nome not in EXTRAS_BASE}
+    novos["fotovoltaico"] = fv
+    novos["fatores"] = fatores
+    novos["cubo"] = atualizar_cubo(quadros["cubo"], fv, afetados, quadros["sistema"], fatores)
+    return novos
+
+def arquivo_incrementos(xlsx_path):
+    # Leituras ingeridas depois da planilha: ficam ao lado dela, fora do cache
+    return os.path.splitext(xlsx_path)[0] + ".incrementos.feather"
+
+def arquivo_leituras(xlsx_path):
+    # Leituras de inversor em alta resolução (15 min, horárias...)
+    return os.path.splitext(xlsx_path)[0] + ".leituras.feather"
+
+def arquivo_anterior(xlsx_path):
+    # Revisão substituída pela última planilha ingerida (sem a extensão .xlsx,
+    # para não ser lida como mais um campus numa pasta de planilhas)
+    return xlsx_path + ".anterior"
+
+def _versao(xlsx_path):
+    partes = [assinatura_arquivo(xlsx_path)]
+    for arquivo in (arquivo_incrementos(xlsx_path), arquivo_leituras(xlsx_path)):
+        if os.path.exists(arquivo):
+            partes.append(assinatura_arquivo(arquivo))
+    return "-".join(partes)
+
+def _valorar_leituras(leituras, fatores):
+    # Receita e GEE de cada leitura com a tarifa e o fator do seu mês
+    fatores = fatores.groupby(truncar(fatores.index.to_series(), "mes")).first()
+    mes = truncar(leituras["Tempo"], "mes")
+    return leituras.assign(**{
+        "Receita (R$)": leituras["Geração (kWh)"] * mes.map(fatores["Tarifa (R$/kWh)"]),
+        "Redução GEE (tCO2)": leituras["Geração (kWh)"] / 1000 * mes.map(fatores[COL_GEE]),
+    })
+
+@medir("carregar_piramide", linhas=lambda piramide: sum(map(len, piramide.niveis.values())))
+def _carregar_piramide(xlsx_path, versao, df_fv, fatores):
+    niveis = {nome: ler_cache(arquivo_cache(xlsx_path, versao, f"piramide_{nome}")) for nome in NIVEIS}
+    niveis = {nome: df for nome, df in niveis.items() if df is not None}
+    if "mes" in niveis and "ano" in niveis:
+        return piramide_de_niveis(niveis)
+    leituras = None
+    if os.path.exists(arquivo_leituras(xlsx_path)):
+        leituras = _valorar_leituras(pd.read_feather(arquivo_leituras(xlsx_path)), fatores)
+    piramide = montar_piramide(df_fv, leituras)
+    for nome, df in piramide.niveis.items():
+        salvar_cache(df, arquivo_cache(xlsx_path, versao, f"piramide_{nome}"))
+    if cache.MAPEAR_CACHE:
+        mapeados = {nome: ler_cache(arquivo_cache(xlsx_path, versao, f"piramide_{nome}")) for nome in piramide.niveis}
+        if all(df is not None for df in mapeados.values()):
+            return piramide_de_niveis(mapeados)
+    return piramide
+
+def _registrar(xlsx_path, versao, quadros):
+    chave = (os.path.abspath(xlsx_path), versao)
+    dados = DadosKPI(
+        versao=versao,
+        fotovoltaico=quadros["fotovoltaico"],
+        sistema=quadros["sistema"],
+        frota=quadros["frota"],
+        cubo=quadros["cubo"],
+        piramide=_carregar_piramide(xlsx_path, versao, quadros["fotovoltaico"], quadros["fatores"]),
+        fatores=quadros["fatores"],
+    )
+    # Mantém apenas a versão mais recente de cada planilha em memória
+    for antiga in [c for c in list(_conjuntos) if c[0] == chave[0]]:
+        _conjuntos.pop(antiga, None)
+    _conjuntos[chave] = dados
+    return dados
+
+@medir("carregar_dados", linhas=lambda dados: len(dados.fotovoltaico))
+def carregar_dados(xlsx_path):
+    versao = _versao(xlsx_path)
+    chave = (os.path.abspath(xlsx_path), versao)
+    if chave in _conjuntos:
+        return _conjuntos[chave]
+    with _trava(xlsx_path):
+        if chave in _conjuntos:
+            return _conjuntos[chave]
+        return _montar_dados(xlsx_path, versao)
+
+def _montar_dados(xlsx_path, versao):
+    quadros = _ler_estado(xlsx_path, versao)
+    if quadros is None:
+        base = versao.split("-")[0]
+        quadros = _ler_estado(xlsx_path, base, EXTRAS_BASE)
+        if quadros is None:
+            quadros = _montar_base(xlsx_path, base)
+            _salvar_estado(xlsx_path, base, quadros)
+        if versao != base:
+            quadros = _aplicar_lote(quadros, pd.read_feather(arquivo_incrementos(xlsx_path)))
+            _salvar_estado(xlsx_path, versao, quadros)
+        quadros = _mapear_estado(xlsx_path, versao, quadros)
+    return _registrar(xlsx_path, versao, quadros)
+
+# -------------------------------
+#   Ingestão incremental
+# -------------------------------
+# Lotes CSV/JSONL com leituras mensais (Tempo, Unidade, Geração e, se
+# quiser, tarifa e fator de emissão) entram no arquivo de incrementos e são
+# aplicados sobre o estado já carregado: só os grupos (Unidade, Ano) tocados
+# são reagregados. Tarifa e fator ausentes vêm do mesmo mês já existente ou,
+# num mês novo, do último mês conhecido.
+#
+# Lotes com leituras abaixo do mês (exportações de inversor) vão para o
+# arquivo de leituras, que alimenta os níveis hora/dia da pirâmide; o total
+# de cada (mês, unidade) tocado entra como leitura mensal e substitui o
+# valor da planilha naquele mês.
+ALIASES_LOTE = {
+    "kWh": "Geração (kWh)",
+    "Geração": "Geração (kWh)",
+    "Tarifa": COL_TARIFA,
+    "Tarifa (R$/kWh)": COL_TARIFA,
+    "Fator": COL_GEE,
+}
+
+def _ler_lote(caminho):
+    extensao = os.path.splitext(caminho)[1].lower()
+    if extensao == ".csv":
+        df = pd.read_csv(caminho, sep=None, engine="python")
+    elif extensao in (".jsonl", ".ndjson"):
+        df = pd.read_json(caminho, lines=True)
+    elif extensao == ".json":
+        df = pd.read_json(caminho)
+    else:
+        raise ValueError(f"Formato de lote não suportado: {caminho}")
+    df.columns = df.columns.str.strip()
+    return df.rename(columns=ALIASES_LOTE)
+
+def _validar_lote(df):
+    faltando = [col for col in ("Tempo", "Unidade", "Geração (kWh)") if col not in df.columns]
+    if faltando:
+        raise ValueError(f"Colunas ausentes no lote: {', '.join(faltando)}")
+    lote = df.reindex(columns=COLUNAS_LEITURA)
+    lote["Tempo"] = pd.to_datetime(lote["Tempo"], errors="coerce")
+    invalidas = lote["Tempo"].isna() | lote["Unidade"].isna()
+    if invalidas.any():
+        raise ValueError(f"{int(invalidas.sum())} linha(s) do lote sem Tempo ou Unidade válidos")
+    return lote
+
+def _gravar_upsert(arquivo, novos):
+    # Regrava o arquivo com as linhas de novos substituindo as de mesma chave
+    if os.path.exists(arquivo):
+        anteriores = pd.read_feather(arquivo)
+        anteriores = anteriores[~indice_colunas(anteriores, CHAVE_LEITURA).isin(indice_colunas(novos, CHAVE_LEITURA))]
+        novos = _concatenar([anteriores, novos], ignore_index=True)
+    tmp = f"{arquivo}.{os.getpid()}.tmp"
+    novos.to_feather(tmp)
+    os.replace(tmp, arquivo)
+    return novos
+
+def _ingerir_leituras(xlsx_path, lote):
+    # Guarda as leituras de alta resolução e devolve o total mensal de cada
+    # (mês, unidade) tocado pelo lote, somando tudo o que já foi ingerido
+    lote = lote[["Tempo", "Unidade", "Geração (kWh)"]].drop_duplicates(CHAVE_LEITURA, keep="last")
+    lote["Geração (kWh)"] = pd.to_numeric(lote["Geração (kWh)"], errors="coerce")
+    leituras = _gravar_upsert(arquivo_leituras(xlsx_path), lote.reset_index(drop=True))
+    meses = truncar(leituras["Tempo"], "mes")
+    tocados = indice_colunas(pd.DataFrame({"Tempo": truncar(lote["Tempo"], "mes"), "Unidade": lote["Unidade"]}), CHAVE_LEITURA)
+    mensal = leituras.groupby([meses, "Unidade"])["Geração (kWh)"].sum(min_count=1).reset_index()
+    return mensal[indice_colunas(mensal, CHAVE_LEITURA).isin(tocados)].reindex(columns=COLUNAS_LEITURA)
+
+def _preparar_lote(lote, fatores):
+    for col, col_fatores in ((COL_TARIFA, "Tarifa (R$/kWh)"), (COL_GEE, COL_GEE)):
+        conhecidos = fatores[col_fatores].dropna()
+        lote[col] = lote[col].fillna(pd.Series(
+            conhecidos.reindex(lote["Tempo"], method="ffill").to_numpy(), index=lote.index))
+    return lote.drop_duplicates(CHAVE_LEITURA, keep="last").reset_index(drop=True)
+
+@medir("ingerir_lote", linhas=lambda dados: len(dados.fotovoltaico))
+def ingerir_lote(xlsx_path, caminho):
+    with _trava(xlsx_path):
+        return _ingerir_lote(xlsx_path, caminho)
+
+def _substituir_planilha(xlsx_path, caminho):
+    # A revisão é lida e validada pelos esquemas no próprio caminho (um
+    # arquivo corrompido ou fora do esquema levanta aqui, com a planilha
+    # intacta); depois vai para um temporário ao lado da planilha e troca de
+    # lugar com os.replace, guardando a revisão anterior
+    ler_planilha(caminho)
+    tmp = f"{xlsx_path}.{os.getpid()}.tmp"
+    try:
+        shutil.copyfile(caminho, tmp)
+        if os.path.exists(xlsx_path):
+            shutil.copy2(xlsx_path, arquivo_anterior(xlsx_path))
+        os.replace(tmp, xlsx_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+def _ingerir_lote(xlsx_path, caminho):
+    # Uma nova revisão da própria planilha substitui o arquivo; o
+    # carregamento seguinte refaz só os meses que mudaram
+    if caminho.lower().endswith((".xlsx", ".xls")):
+        _substituir_planilha(xlsx_path, caminho)
+        return carregar_dados(xlsx_path)
+    dados = carregar_dados(xlsx_path)
+    lote = _validar_lote(_ler_lote(caminho))
+    if (lote["Tempo"] != truncar(lote["Tempo"], "mes")).any():
+        lote = _ingerir_leituras(xlsx_path, lote)
+    lote = _preparar_lote(lote, dados.fatores)
+    _gravar_upsert(arquivo_incrementos(xlsx_path), lote)
+    quadros = {
+        "fotovoltaico": dados.fotovoltaico,
+        "fatores": dados.fatores,
+        "sistema": dados.sistema,
+        "cubo": dados.cubo,
+        "frota": dados.frota,
+    }
+    quadros = _aplicar_lote(quadros, lote)
+    versao = _versao(xlsx_path)
+    _salvar_estado(xlsx_path, versao, quadros)
+    return _registrar(xlsx_path, versao, _mapear_estado(xlsx_path, versao, quadros))
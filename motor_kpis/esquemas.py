@@ -0,0 +1,133 @@
+from dataclasses import dataclass
+import pandas as pd
+from .leitores import NA_PLANILHA, Planilha
+
+# -------------------------------
+#   Esquema de cada aba
+# -------------------------------
+# Cada aba declara as colunas que o painel usa e o tipo de cada uma. A
+# leitura passa só essas colunas ao parser (usecols), com "-" já como NaN
+# (na_values), e confere o resultado contra o esquema: coluna obrigatória
+# ausente, data que não veio como data ou número que veio como texto é erro
+# de esquema, não um NaN silencioso nem um pd.to_numeric depois.
+#
+# Os números não vão como dtype= para o parser: no leitor de Excel do
+# pandas isso vira um astype de objetos coluna a coluna, mais lento que a
+# inferência numérica que ele já faz; o tipo inferido é só verificado e
+# depois fixado (float64, datetime64[ns]), para que todo motor de leitura
+# entregue as mesmas colunas.
+COL_TARIFA = "Tarifa Fora Ponta (R$/kWh)"
+COL_GEE = "Fator de Emissão de Gases do Efeito Estufa (tCO2/MWh)"
+
+DTYPES = {"data": "datetime64[ns]", "numero": "float64"}
+
+class ErroEsquema(ValueError):
+    def __init__(self, mensagem, ausentes=()):
+        super().__init__(mensagem)
+        # Colunas obrigatórias que faltaram no cabeçalho
+        self.ausentes = tuple(ausentes)
+
+@dataclass(frozen=True)
+class Coluna:
+    nome: str
+    tipo: str  # "data", "numero" ou "texto"
+    obrigatoria: bool = True
+    # Outros nomes aceitos no cabeçalho (ex.: "Unnamed: 0" sem título)
+    aliases: tuple = ()
+
+@dataclass(frozen=True)
+class EsquemaAba:
+    aba: object  # nome ou posição da aba
+    colunas: tuple
+    # Tipo das colunas não declaradas (uma por unidade na aba fotovoltaica);
+    # None descarta essas colunas
+    demais: str = None
+
+ESQUEMA_FOTOVOLTAICO = EsquemaAba(
+    aba=0,
+    colunas=(
+        Coluna("Tempo", "data"),
+        Coluna(COL_TARIFA, "numero"),
+        Coluna(COL_GEE, "numero"),
+    ),
+    demais="numero",
+)
+
+ESQUEMA_SISTEMA = EsquemaAba(
+    aba="dados_sistema",
+    colunas=(
+        Coluna("Unidade", "texto", aliases=("Unnamed: 0",)),
+        Coluna("Capacidade Instalada (kW)", "numero"),
+        Coluna("Area", "numero", obrigatoria=False),
+    ),
+)
+
+COLUNAS_ONIBUS = (
+    Coluna("Tempo", "data"),
+    Coluna("km", "numero"),
+    Coluna("kWh", "numero"),
+    Coluna("Dias", "numero"),
+    Coluna("Economia", "numero"),
+    Coluna("Gasto em Diesel", "numero"),
+    Coluna("Gasto em Energia Elétrica", "numero"),
+    Coluna("Redução da Emissão", "numero", obrigatoria=False),
+    Coluna("Percentual de Redução", "numero", obrigatoria=False),
+    # Tipo do veículo (Rodoviário, Urbano...); sem a coluna, o nome da aba
+    Coluna("Tipo", "texto", obrigatoria=False),
+)
+
+def esquema_onibus(aba):
+    return EsquemaAba(aba=aba, colunas=COLUNAS_ONIBUS)
+
+def _sem_titulo(nome):
+    return nome.startswith("Unnamed")
+
+def _seletor(esquema):
+    # usecols chamável: decide pelo nome do cabeçalho, sem lê-lo antes
+    declarados = {nome for coluna in esquema.colunas for nome in (coluna.nome, *coluna.aliases)}
+    def usar(nome):
+        nome = str(nome).strip()
+        return nome in declarados or (esquema.demais is not None and not _sem_titulo(nome))
+    return usar
+
+def _conferir(df, esquema):
+    tipos = {}
+    ausentes = []
+    for coluna in esquema.colunas:
+        presente = next((n for n in (coluna.nome, *coluna.aliases) if n in df.columns), None)
+        if presente is None:
+            if coluna.obrigatoria:
+                ausentes.append(coluna.nome)
+            continue
+        if presente != coluna.nome:
+            df = df.rename(columns={presente: coluna.nome})
+        tipos[coluna.nome] = coluna.tipo
+    if ausentes:
+        raise ErroEsquema(f"Aba {esquema.aba!r}: colunas obrigatórias ausentes: {ausentes}", ausentes)
+    for nome in df.columns:
+        tipos.setdefault(nome, esquema.demais)
+    fixos = {}
+    for nome, tipo in tipos.items():
+        serie = df[nome]
+        if tipo == "data" and not pd.api.types.is_datetime64_dtype(serie):
+            invalidos = serie[pd.to_datetime(serie, errors="coerce").isna() & serie.notna()]
+            raise ErroEsquema(f"Aba {esquema.aba!r}: coluna {nome!r} com valores que não são datas: "
+                              f"{invalidos.head(3).tolist()}")
+        if tipo == "numero" and not (pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)):
+            invalidos = serie[pd.to_numeric(serie, errors="coerce").isna() & serie.notna()]
+            raise ErroEsquema(f"Aba {esquema.aba!r}: coluna {nome!r} com valores não numéricos: "
+                              f"{invalidos.head(3).tolist()}")
+        fixo = DTYPES.get(tipo)
+        if fixo is not None and serie.dtype != fixo:
+            fixos[nome] = fixo
+    return df.astype(fixos) if fixos else df
+
+def ler_aba(fonte, esquema, motor=None):
+    # fonte: Planilha já aberta (várias abas numa abertura) ou caminho
+    if not isinstance(fonte, Planilha):
+        with Planilha(fonte, motor) as planilha:
+            return ler_aba(planilha, esquema)
+    datas = [coluna.nome for coluna in esquema.colunas if coluna.tipo == "data"]
+    df = fonte.ler(esquema.aba, usecols=_seletor(esquema), na_values=NA_PLANILHA, datas=datas)
+    df.columns = df.columns.map(lambda nome: str(nome).strip())
+    return _conferir(df, esquema)
@@ -0,0 +1,65 @@
+import locale
+from functools import cache
+import numpy as np
+import pandas as pd
+
+@cache
+def configurar_locale():
+    # Locale brasileiro (nomes de meses em "%b %Y"), aplicado uma única vez
+    # por processo quando algum dado é preparado, e não na importação
+    try:
+        locale.setlocale(locale.LC_ALL, 'pt_BR.UTF-8')
+    except locale.Error:
+        locale.setlocale(locale.LC_ALL, '')
+
+# Troca "," <-> "." numa única passada (padrão pt-BR)
+_PT_BR = str.maketrans({",": ".", ".": ","})
+
+# Texto de valores não finitos (±inf; NaN também nos lotes)
+NAO_DISPONIVEL = "N/A"
+
+def format_real(v):
+    if pd.isna(v):
+        return "R$ 0,00"
+    if not np.isfinite(v):
+        return NAO_DISPONIVEL
+    return f"R$ {v:,.2f}".translate(_PT_BR)
+
+def format_num(v, casas=2):
+    if pd.isna(v):
+        return "0"
+    if not np.isfinite(v):
+        return NAO_DISPONIVEL
+    return f"{v:,.{casas}f}".translate(_PT_BR)
+
+def _formatar_lote(valores, modelo, vazio):
+    # Formata todos os valores e converte o lote inteiro para pt-BR com um
+    # único translate sobre o texto concatenado
+    serie = valores if isinstance(valores, pd.Series) else None
+    nums = pd.to_numeric(pd.Series(np.asarray(valores).ravel()), errors="coerce").to_numpy(dtype=float)
+    nulos = ~np.isfinite(nums)
+    texto = "\n".join(map(modelo.format, np.where(nulos, 0.0, nums).tolist()))
+    saida = np.array(texto.translate(_PT_BR).split("\n") if len(nums) else [], dtype=object)
+    saida[nulos] = vazio
+    if serie is not None:
+        return pd.Series(saida, index=serie.index, name=serie.name)
+    return saida
+
+def format_real_serie(valores, vazio=NAO_DISPONIVEL):
+    return _formatar_lote(valores, "R$ {:,.2f}", vazio)
+
+def format_num_serie(valores, casas=2, vazio=NAO_DISPONIVEL):
+    return _formatar_lote(valores, f"{{:,.{casas}f}}", vazio)
+
+def tabela_formatada(df, formatos, vazio=None):
+    # formatos: {coluna: casas decimais ou "real"}; demais colunas viram texto
+    tabela = df.astype(str)
+    for col, fmt in formatos.items():
+        if col not in df.columns:
+            continue
+        extra = {} if vazio is None else {"vazio": vazio}
+        if fmt == "real":
+            tabela[col] = format_real_serie(df[col], **extra)
+        else:
+            tabela[col] = format_num_serie(df[col], fmt, **extra)
+    return tabela
@@ -0,0 +1,77 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from .esquemas import COLUNAS_ONIBUS, ESQUEMA_SISTEMA, ErroEsquema, esquema_onibus, ler_aba
+from .leitores import Planilha
+
+# -------------------------------
+#   Frota de mobilidade elétrica
+# -------------------------------
+# Cada veículo é uma aba da planilha (além da fotovoltaica, a primeira, e de
+# dados_sistema) com as colunas de ônibus; uma aba sem nenhuma delas (notas,
+# resumos) é ignorada, e uma com só parte delas é erro de esquema. As abas
+# são lidas por um pool de threads, cada uma com a planilha aberta uma vez,
+# e empilhadas num único frame longo com Veiculo (nome da aba) e Tipo
+# (coluna Tipo da aba ou, sem ela, o nome da aba) categóricos. Os totais da
+# frota saem de um único groupby sobre esse frame.
+COLUNAS_FROTA = ["km", "kWh", "Economia", "Gasto em Diesel", "Gasto em Energia Elétrica", "Redução da Emissão"]
+# Threads de leitura das abas (KPIS_THREADS_FROTA; 1 lê em sequência)
+THREADS_FROTA = int(os.environ.get("KPIS_THREADS_FROTA", 0)) or min(4, os.cpu_count() or 1)
+
+_OBRIGATORIAS = {coluna.nome for coluna in COLUNAS_ONIBUS if coluna.obrigatoria}
+
+def abas_candidatas(planilha):
+    # Todas as abas menos a fotovoltaica e a de sistema
+    return [aba for aba in planilha.abas()[1:] if aba != ESQUEMA_SISTEMA.aba]
+
+def _ler_veiculo(planilha, aba):
+    try:
+        df = ler_aba(planilha, esquema_onibus(aba))
+    except ErroEsquema as e:
+        if set(e.ausentes) == _OBRIGATORIAS:
+            return None
+        raise
+    tipo = df.pop("Tipo").fillna(aba).astype(str) if "Tipo" in df.columns else aba
+    df.insert(0, "Tipo", tipo)
+    df.insert(0, "Veiculo", aba)
+    return df
+
+def _ler_veiculos(fonte, motor, abas):
+    with Planilha(fonte, motor) as planilha:
+        return [_ler_veiculo(planilha, aba) for aba in abas]
+
+def ler_frota(fonte, abas=None, motor=None, threads=None):
+    # fonte: Planilha já aberta ou caminho; abas: None descobre os veículos
+    if not isinstance(fonte, Planilha):
+        with Planilha(fonte, motor) as planilha:
+            return ler_frota(planilha, abas, threads=threads)
+    abas = abas_candidatas(fonte) if abas is None else list(abas)
+    threads = min(threads or THREADS_FROTA, len(abas))
+    if threads <= 1 or not isinstance(fonte.fonte, (str, os.PathLike)):
+        # Arquivo enviado em memória: um único leitor
+        partes = [_ler_veiculo(fonte, aba) for aba in abas]
+    else:
+        # Cada thread abre a própria cópia da planilha e lê uma fatia das abas
+        fatias = [abas[i::threads] for i in range(threads)]
+        with ThreadPoolExecutor(threads, thread_name_prefix="leitura-frota") as pool:
+            lidas = list(pool.map(lambda fatia: _ler_veiculos(fonte.fonte, fonte.motor, fatia), fatias))
+        por_aba = {aba: df for fatia, dfs in zip(fatias, lidas) for aba, df in zip(fatia, dfs)}
+        partes = [por_aba[aba] for aba in abas]
+    return montar_frota([df for df in partes if df is not None])
+
+def montar_frota(partes):
+    if not partes:
+        vazio = {coluna.nome: pd.Series(dtype="datetime64[ns]" if coluna.tipo == "data" else "float64")
+                 for coluna in COLUNAS_ONIBUS if coluna.obrigatoria}
+        partes = [pd.DataFrame({"Veiculo": pd.Series(dtype=str), "Tipo": pd.Series(dtype=str), **vazio})]
+    frota = pd.concat(partes, ignore_index=True)
+    # Categorias na ordem das abas
+    for coluna in ("Veiculo", "Tipo"):
+        frota[coluna] = pd.Categorical(frota[coluna], categories=pd.unique(frota[coluna]))
+    return frota
+
+def totais_frota(frota, por="Tipo"):
+    # Totais por Tipo ou Veiculo do frame (já filtrado pelo período)
+    colunas = [col for col in COLUNAS_FROTA if col in frota.columns]
+    totais = frota.groupby(por, observed=True, sort=False)[colunas].sum()
+    return totais.set_axis(totais.index.astype(str).rename(por))
@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+from typing import Mapping
+from types import MappingProxyType
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+#   Totais por intervalo de tempo
+# -------------------------------
+# Linhas ordenadas por Tempo com somas acumuladas (e contagens de valores
+# não nulos) de cada coluna. Um intervalo vira duas buscas binárias e o
+# total é a diferença entre duas linhas das somas: o slider não varre mais
+# o frame inteiro a cada movimento.
+@dataclass(frozen=True)
+class SomasAcumuladas:
+    linhas: pd.DataFrame
+    tempo: np.ndarray
+    colunas: tuple
+    somas: np.ndarray
+    contagens: np.ndarray
+
+    def posicoes(self, inicio, fim):
+        # Intervalo fechado [inicio, fim], como no filtro por máscara
+        i = np.searchsorted(self.tempo, np.datetime64(pd.Timestamp(inicio)), side="left")
+        j = np.searchsorted(self.tempo, np.datetime64(pd.Timestamp(fim)), side="right")
+        return i, j
+
+    def recorte(self, inicio, fim):
+        i, j = self.posicoes(inicio, fim)
+        return self.linhas.iloc[i:j]
+
+    def totais(self, inicio, fim):
+        i, j = self.posicoes(inicio, fim)
+        return pd.Series(self.somas[j] - self.somas[i], index=list(self.colunas))
+
+    def medias(self, inicio, fim):
+        i, j = self.posicoes(inicio, fim)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            valores = (self.somas[j] - self.somas[i]) / (self.contagens[j] - self.contagens[i])
+        return pd.Series(valores, index=list(self.colunas))
+
+def somas_acumuladas(df, colunas):
+    df = df.iloc[np.argsort(df["Tempo"].to_numpy(), kind="stable")]
+    valores = df[list(colunas)].to_numpy(dtype=float)
+    validos = ~np.isnan(valores)
+    zeros = np.zeros((1, len(colunas)))
+    return SomasAcumuladas(
+        linhas=df,
+        tempo=df["Tempo"].to_numpy(dtype="datetime64[ns]"),
+        colunas=tuple(colunas),
+        somas=np.vstack([zeros, np.cumsum(np.where(validos, valores, 0.0), axis=0)]),
+        contagens=np.vstack([zeros, np.cumsum(validos, axis=0)]),
+    )
+
+@dataclass(frozen=True)
+class IndiceTemporal:
+    # Somas de todas as unidades juntas e de cada unidade separadamente
+    geral: SomasAcumuladas
+    unidades: Mapping[str, SomasAcumuladas]
+
+    def totais_unidades(self, inicio, fim):
+        return pd.DataFrame(
+            {unidade: somas.totais(inicio, fim) for unidade, somas in self.unidades.items()}
+        ).T.rename_axis("Unidade")
+
+def indice_temporal(df, colunas):
+    return IndiceTemporal(
+        geral=somas_acumuladas(df, colunas),
+        unidades=MappingProxyType({
+            str(unidade): somas_acumuladas(grupo, colunas)
+            for unidade, grupo in df.groupby("Unidade", observed=True, sort=False)
+        }),
+    )
@@ -0,0 +1,132 @@
+import importlib.util
+import json
+import os
+import pandas as pd
+from .cache import assinatura_arquivo
+
+# -------------------------------
+#   Motores de leitura da planilha
+# -------------------------------
+# As abas podem vir de quatro motores com a mesma saída:
+#   calamine  leitor em Rust (python-calamine), usado quando instalado
+#   openpyxl  fallback; o pandas já o abre em modo somente leitura (streaming)
+#   parquet   exportação das abas feita por exportar_abas
+#   csv       idem, em CSV
+# Na escolha automática, uma exportação em dia com a planilha (mesmo hash de
+# conteúdo) vem primeiro; depois calamine e, por último, openpyxl. KPIS_MOTOR
+# (ou o parâmetro motor) força um deles.
+MOTOR_PLANILHA = os.environ.get("KPIS_MOTOR", "auto")
+NA_PLANILHA = ["-"]
+MANIFESTO = "abas.json"
+
+def _instalado(modulo):
+    return importlib.util.find_spec(modulo) is not None
+
+MOTORES = {
+    "calamine": lambda: _instalado("python_calamine"),
+    "openpyxl": lambda: _instalado("openpyxl"),
+    "parquet": lambda: _instalado("pyarrow"),
+    "csv": lambda: True,
+}
+MOTORES_EXCEL = ("calamine", "openpyxl")
+
+def motores_disponiveis():
+    return [motor for motor, disponivel in MOTORES.items() if disponivel()]
+
+def pasta_exportacao(xlsx_path):
+    raiz, _ = os.path.splitext(xlsx_path)
+    return raiz + "_abas"
+
+def _manifesto(xlsx_path):
+    # Manifesto da exportação, se ela for da versão atual da planilha
+    try:
+        with open(os.path.join(pasta_exportacao(xlsx_path), MANIFESTO), encoding="utf-8") as f:
+            manifesto = json.load(f)
+        if manifesto["planilha"] == assinatura_arquivo(xlsx_path):
+            return manifesto
+    except (OSError, TypeError, ValueError, KeyError):
+        pass
+    return None
+
+def escolher_motor(fonte, motor=None):
+    motor = motor or MOTOR_PLANILHA
+    if motor != "auto":
+        if motor not in MOTORES:
+            raise ValueError(f"Motor de leitura desconhecido: {motor!r} (opções: {', '.join(MOTORES)})")
+        return motor
+    manifesto = _manifesto(fonte)
+    if manifesto is not None and MOTORES[manifesto["formato"]]():
+        return manifesto["formato"]
+    return "calamine" if MOTORES["calamine"]() else "openpyxl"
+
+def exportar_abas(xlsx_path, formato="parquet", motor=None):
+    # Grava cada aba em <planilha>_abas/, já com "-" como NaN, e o manifesto
+    # com o hash da planilha de origem. O manifesto vai por último: uma
+    # exportação interrompida não é usada
+    if formato not in ("parquet", "csv"):
+        raise ValueError(f"Formato de exportação inválido: {formato!r}")
+    pasta = pasta_exportacao(xlsx_path)
+    os.makedirs(pasta, exist_ok=True)
+    versao = assinatura_arquivo(xlsx_path)
+    with Planilha(xlsx_path, motor or ("calamine" if MOTORES["calamine"]() else "openpyxl")) as planilha:
+        abas = planilha.abas()
+        arquivos = {}
+        for i, aba in enumerate(abas):
+            df = planilha.ler(aba, na_values=NA_PLANILHA)
+            arquivos[aba] = f"{i}.{formato}"
+            caminho = os.path.join(pasta, arquivos[aba])
+            if formato == "parquet":
+                df.to_parquet(caminho, index=False)
+            else:
+                df.to_csv(caminho, index=False)
+    with open(os.path.join(pasta, MANIFESTO), "w", encoding="utf-8") as f:
+        json.dump({"planilha": versao, "formato": formato, "abas": abas, "arquivos": arquivos}, f, ensure_ascii=False)
+    return pasta
+
+class Planilha:
+    # Planilha aberta uma vez para ler várias abas com o mesmo motor
+    def __init__(self, fonte, motor=None):
+        self.fonte = fonte
+        self.motor = escolher_motor(fonte, motor)
+        self._xls = None
+        self._manifesto = None
+        if self.motor in MOTORES_EXCEL:
+            self._xls = pd.ExcelFile(fonte, engine=self.motor)
+        else:
+            self._manifesto = _manifesto(fonte)
+            if self._manifesto is None or self._manifesto["formato"] != self.motor:
+                raise FileNotFoundError(f"Sem exportação {self.motor} atualizada de {fonte}; use exportar_abas")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *erro):
+        self.fechar()
+        return False
+
+    def fechar(self):
+        if self._xls is not None:
+            self._xls.close()
+
+    def abas(self):
+        return list(self._xls.sheet_names) if self._xls is not None else list(self._manifesto["abas"])
+
+    def ler(self, aba, usecols=None, na_values=None, datas=()):
+        # usecols: chamável sobre o nome do cabeçalho; datas: colunas que o
+        # CSV devolve como texto
+        if self._xls is not None:
+            return self._xls.parse(aba, usecols=usecols, na_values=na_values)
+        nome = self._manifesto["abas"][aba] if isinstance(aba, int) else aba
+        if nome not in self._manifesto["arquivos"]:
+            raise ValueError(f"Worksheet named '{nome}' not found")
+        caminho = os.path.join(pasta_exportacao(self.fonte), self._manifesto["arquivos"][nome])
+        # Na exportação o "-" já virou NaN
+        if self.motor == "parquet":
+            import pyarrow.parquet as pq
+            nomes = pq.read_schema(caminho).names
+            return pd.read_parquet(caminho, columns=[c for c in nomes if usecols is None or usecols(c)])
+        df = pd.read_csv(caminho, usecols=usecols, float_precision="round_trip")
+        for coluna in datas:
+            if coluna in df.columns:
+                df[coluna] = pd.to_datetime(df[coluna], format="ISO8601")
+        return df
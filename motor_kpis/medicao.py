@@ -0,0 +1,148 @@
+import json
+import os
+import socket
+import threading
+import time
+import tracemalloc
+import uuid
+from functools import wraps
+from datetime import datetime, timezone
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Windows: sem pico de RSS
+    resource = None
+
+# -------------------------------
+#   Medição das etapas
+# -------------------------------
+# medir("etapa") funciona como bloco with ou como decorador e registra
+# duração, linhas e memória de cada etapa. Só mede dentro de uma rodada
+# (iniciar_rodada, chamada pelo painel a cada rerun com o painel de
+# depuração ligado) ou com KPIS_RASTRO apontando para um arquivo JSONL,
+# onde cada etapa vira uma linha. Fora disso o custo é um teste por chamada.
+# O pico de memória alocada vem do tracemalloc e só aparece quando ele
+# está ligado (python -X tracemalloc ou PYTHONTRACEMALLOC=1).
+ARQUIVO_RASTRO = os.environ.get("KPIS_RASTRO")
+
+_local = threading.local()
+_trava_rastro = threading.Lock()
+_HOST = socket.gethostname()
+
+def iniciar_rodada(rotulo=None):
+    _local.rodada = uuid.uuid4().hex[:12]
+    _local.rotulo = rotulo
+    _local.registros = []
+    _local.pilha = []
+    _local.inicio = time.perf_counter()
+
+def encerrar_rodada():
+    for nome in ("rodada", "rotulo", "registros", "pilha", "inicio"):
+        if hasattr(_local, nome):
+            delattr(_local, nome)
+
+def registros():
+    return list(getattr(_local, "registros", ()))
+
+def duracao_rodada():
+    inicio = getattr(_local, "inicio", None)
+    return None if inicio is None else time.perf_counter() - inicio
+
+def medindo():
+    return ARQUIVO_RASTRO is not None or hasattr(_local, "registros")
+
+def _linhas(resultado):
+    if isinstance(resultado, (pd.DataFrame, pd.Series)):
+        return len(resultado)
+    if isinstance(resultado, tuple) and resultado and isinstance(resultado[0], pd.DataFrame):
+        return len(resultado[0])
+    return None
+
+def _rss_max_mb():
+    if resource is None:
+        return None
+    # ru_maxrss em KiB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _gravar_rastro(registro):
+    with _trava_rastro:
+        with open(ARQUIVO_RASTRO, "a", encoding="utf-8") as f:
+            f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+
+def medir(etapa, linhas=None, **info):
+    # linhas: função que conta as linhas do valor devolvido (decorador)
+    return Medida(etapa, linhas, info)
+
+class Medida:
+    def __init__(self, etapa, contar, info):
+        self.etapa = etapa
+        self.contar = contar
+        self.info = info
+        self.linhas = None
+
+    def __call__(self, func):
+        @wraps(func)
+        def medida(*args, **kwargs):
+            with Medida(self.etapa, self.contar, self.info) as m:
+                resultado = func(*args, **kwargs)
+                if m.ativa:
+                    m.linhas = self.contar(resultado) if self.contar else _linhas(resultado)
+                return resultado
+        return medida
+
+    def __enter__(self):
+        self.ativa = medindo()
+        if not self.ativa:
+            return self
+        pilha = getattr(_local, "pilha", None)
+        if pilha is None:
+            pilha = _local.pilha = []
+        self.pai = pilha[-1].etapa if pilha else None
+        if tracemalloc.is_tracing():
+            # O pico do tracemalloc é global: a etapa de fora guarda o pico
+            # que já tinha antes de a de dentro zerá-lo
+            atual, pico = tracemalloc.get_traced_memory()
+            if pilha:
+                pilha[-1].pico = max(getattr(pilha[-1], "pico", 0), pico)
+            tracemalloc.reset_peak()
+            self.alocado_inicio, self.pico = atual, atual
+        pilha.append(self)
+        self.data = datetime.now(timezone.utc).isoformat(timespec="milliseconds")
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, tipo, erro, tb):
+        if not self.ativa:
+            return False
+        duracao = time.perf_counter() - self.inicio
+        pilha = _local.pilha
+        pilha.pop()
+        pico_mb = None
+        if tracemalloc.is_tracing() and hasattr(self, "alocado_inicio"):
+            pico = max(self.pico, tracemalloc.get_traced_memory()[1])
+            pico_mb = (pico - self.alocado_inicio) / 2**20
+            if pilha:
+                pilha[-1].pico = max(getattr(pilha[-1], "pico", 0), pico)
+        registro = {
+            "data": self.data,
+            "rodada": getattr(_local, "rodada", None),
+            "rotulo": getattr(_local, "rotulo", None),
+            "etapa": self.etapa,
+            "pai": self.pai,
+            "duracao_s": duracao,
+            "linhas": self.linhas,
+            "pico_alocado_mb": pico_mb,
+            "rss_max_mb": _rss_max_mb(),
+            "erro": None if tipo is None else tipo.__name__,
+            "pid": os.getpid(),
+            "host": _HOST,
+            "thread": threading.current_thread().name,
+            **self.info,
+        }
+        if hasattr(_local, "registros"):
+            _local.registros.append(registro)
+        if ARQUIVO_RASTRO:
+            _gravar_rastro(registro)
+        return False
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+#   Normalização de indicadores
+# -------------------------------
+# Cada indicador é normalizado dentro do seu grupo (por padrão, o ano) numa
+# única passada agrupada: todas as unidades e anos de uma vez, sem laço por
+# ano ou por coluna. Grupos sem variação (máximo <= 0, amplitude ou desvio
+# zero) ficam com 0, como no radar original.
+METODOS_NORMALIZACAO = {
+    "maximo": "Fração do maior valor",
+    "minmax": "Mínimo–máximo",
+    "posto": "Posto percentual",
+    "zscore": "Escore z",
+}
+
+def _dividir(numerador, denominador):
+    denominador = denominador.where(denominador > 0)
+    return (numerador / denominador).where(denominador.notna(), 0.0)
+
+def normalizar(tabela, indicadores, metodo="maximo", por="Ano"):
+    if metodo not in METODOS_NORMALIZACAO:
+        raise ValueError(f"Método de normalização desconhecido: {metodo!r}")
+    valores = tabela[list(indicadores)].apply(pd.to_numeric, errors="coerce")
+    grupos = valores.groupby(tabela[por], sort=False)
+    if metodo == "maximo":
+        normalizado = _dividir(valores, grupos.transform("max"))
+    elif metodo == "minmax":
+        minimo = grupos.transform("min")
+        normalizado = _dividir(valores - minimo, grupos.transform("max") - minimo)
+    elif metodo == "posto":
+        normalizado = grupos.rank(pct=True)
+    else:
+        normalizado = _dividir(valores - grupos.transform("mean"), grupos.transform("std", ddof=0))
+    return tabela.assign(**{col: normalizado[col].to_numpy(dtype=float) for col in indicadores})
+
+def normalizar_longo(tabela, indicadores, metodo="maximo", por="Ano", id_col="Unidade"):
+    # Formato longo (por, id_col, Indicador, Valor) pronto para o px.line_polar
+    normalizado = normalizar(tabela, indicadores, metodo, por)
+    valores = normalizado[list(indicadores)].to_numpy(dtype=float)
+    n, k = valores.shape
+    return pd.DataFrame({
+        por: np.repeat(normalizado[por].to_numpy(), k),
+        id_col: np.repeat(normalizado[id_col].to_numpy(), k),
+        "Indicador": np.tile(np.asarray(indicadores, dtype=object), n),
+        "Valor": valores.ravel(),
+    })
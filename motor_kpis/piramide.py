@@ -0,0 +1,105 @@
+from dataclasses import dataclass
+from typing import Mapping
+import pandas as pd
+from .cubo import METRICAS_FV
+from .medicao import medir
+
+# -------------------------------
+#   Pirâmide de agregações
+# -------------------------------
+# Totais por (Unidade, Tempo) em hora, dia, mês e ano. Hora e dia só existem
+# quando há leituras de inversor em alta resolução; mês e ano vêm da série
+# mensal. Os gráficos pedem uma janela e recebem o nível mais detalhado que
+# cobre a janela sem passar de MAX_PONTOS pontos por unidade. Hora e dia só
+# têm as unidades com leituras de inversor: um desses níveis só é escolhido
+# quando tem, para cada unidade pedida, leituras em todos os meses da janela
+# em que a unidade aparece na série mensal.
+NIVEIS = ("hora", "dia", "mes", "ano")
+PASSOS = {
+    "hora": pd.Timedelta(hours=1),
+    "dia": pd.Timedelta(days=1),
+    "mes": pd.Timedelta(days=30.44),
+    "ano": pd.Timedelta(days=365.25),
+}
+MAX_PONTOS = 1500
+
+def truncar(tempo, nivel):
+    # Início do período de cada instante (Series ou Timestamp)
+    if isinstance(tempo, pd.Series):
+        if nivel in ("hora", "dia"):
+            return tempo.dt.floor("h" if nivel == "hora" else "D")
+        return tempo.dt.to_period("M" if nivel == "mes" else "Y").dt.to_timestamp()
+    return truncar(pd.Series([pd.Timestamp(tempo)]), nivel).iloc[0]
+
+def _agregar(df, nivel):
+    return df.groupby(["Unidade", truncar(df["Tempo"], nivel)], observed=True)[METRICAS_FV].sum().reset_index()
+
+@dataclass(frozen=True)
+class PiramideKPI:
+    # niveis: nome -> frame (Unidade, Tempo, métricas), do mais detalhado ao
+    # mais agregado; inicio/fim: primeiro e último período de cada nível
+    niveis: Mapping[str, pd.DataFrame]
+    inicio: Mapping[str, pd.Timestamp]
+    fim: Mapping[str, pd.Timestamp]
+    # nome -> primeiro e último mês de cada unidade no nível (índice Unidade)
+    cobertura: Mapping[str, pd.DataFrame]
+
+    def intervalo(self):
+        return min(self.inicio.values()), max(self.fim.values())
+
+    def _cobre_unidades(self, nome, inicio, fim, unidades):
+        # Níveis mensal e anual vêm da série mensal e têm todas as unidades
+        if nome not in ("hora", "dia") or "mes" not in self.cobertura:
+            return True
+        referencia = self.cobertura["mes"]
+        if unidades is not None:
+            referencia = referencia[referencia.index.isin(unidades)]
+        # Meses da janela em que cada unidade tem valor na série mensal
+        desde = referencia["inicio"].clip(lower=truncar(inicio, "mes"))
+        ate = referencia["fim"].clip(upper=truncar(fim, "mes"))
+        nivel = self.cobertura[nome].reindex(referencia.index)
+        cobertas = (nivel["inicio"] <= desde) & (nivel["fim"] >= ate)
+        return bool((cobertas | (desde > ate)).all())
+
+    def nivel_para(self, inicio, fim, max_pontos=MAX_PONTOS, unidades=None):
+        inicio, fim = pd.Timestamp(inicio), pd.Timestamp(fim)
+        for nome in self.niveis:
+            cobre = pd.notna(self.inicio[nome]) and self.inicio[nome] <= truncar(inicio, nome)
+            if (cobre and (fim - inicio) / PASSOS[nome] <= max_pontos
+                    and self._cobre_unidades(nome, inicio, fim, unidades)):
+                return nome
+        return list(self.niveis)[-1]
+
+    def serie(self, inicio, fim, unidades=None, max_pontos=MAX_PONTOS):
+        nivel = self.nivel_para(inicio, fim, max_pontos, unidades)
+        df = self.niveis[nivel]
+        filtro = (df["Tempo"] >= truncar(inicio, nivel)) & (df["Tempo"] <= pd.Timestamp(fim))
+        if unidades is not None:
+            filtro &= df["Unidade"].isin(unidades)
+        return nivel, df[filtro]
+
+def _cobertura(df):
+    meses = truncar(df["Tempo"], "mes")
+    cobertura = meses.groupby(df["Unidade"], observed=True).agg(["min", "max"])
+    cobertura = cobertura.rename(columns={"min": "inicio", "max": "fim"})
+    return cobertura.set_axis(cobertura.index.astype(str).rename("Unidade"))
+
+def piramide_de_niveis(niveis):
+    niveis = {nome: niveis[nome] for nome in NIVEIS if nome in niveis}
+    return PiramideKPI(
+        niveis=niveis,
+        inicio={nome: df["Tempo"].min() for nome, df in niveis.items()},
+        fim={nome: df["Tempo"].max() for nome, df in niveis.items()},
+        cobertura={nome: _cobertura(df) for nome, df in niveis.items() if nome in ("hora", "dia", "mes")},
+    )
+
+@medir("montar_piramide", linhas=lambda piramide: sum(map(len, piramide.niveis.values())))
+def montar_piramide(df_fv, leituras=None):
+    # leituras: alta resolução com Tempo, Unidade e as métricas já valoradas
+    niveis = {}
+    if leituras is not None and not leituras.empty:
+        niveis["hora"] = _agregar(leituras, "hora")
+        niveis["dia"] = _agregar(niveis["hora"], "dia")
+    niveis["mes"] = _agregar(df_fv, "mes")
+    niveis["ano"] = _agregar(niveis["mes"], "ano")
+    return piramide_de_niveis(niveis)
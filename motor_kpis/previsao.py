@@ -0,0 +1,166 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from .medicao import medir
+
+# -------------------------------
+#   Previsão de geração por unidade
+# -------------------------------
+# Modelo multiplicativo y = (a + b·t)·s[mês] ajustado para todas as unidades
+# de uma vez sobre a matriz Unidade × mês. Meses sem leitura, antes da
+# instalação ou com o sistema parado ficam de fora. Cada iteração tira a
+# sazonalidade, ajusta as retas de todas as linhas por mínimos quadrados e
+# refaz os perfis sazonais com a razão y / tendência somada por mês do ano
+# (produto por uma matriz 0/1 de meses). O perfil de cada unidade é puxado
+# para o perfil de todas as unidades juntas conforme o número de anos de
+# leitura, e a inclinação só entra com MESES_TENDENCIA meses: sistemas
+# novos seguem o perfil comum e a média das leituras. A Receita prevista usa a
+# tarifa média dos últimos 12 meses; com vários campi, a do campus da unidade.
+HORIZONTE = 12
+ITERACOES = 3
+# Meses equivalentes do perfil comum no perfil de cada unidade
+PESO_PERFIL_COMUM = 2.0
+MESES_TENDENCIA = 24
+FRACAO_PARADA = 0.2
+
+@dataclass(frozen=True)
+class ModeloSazonal:
+    unidades: pd.Index
+    # Primeiro mês da matriz (t = 0) e último mês com leitura
+    inicio: pd.Timestamp
+    fim: pd.Timestamp
+    nivel: np.ndarray
+    inclinacao: np.ndarray
+    # Unidade × 12, média 1 em cada linha
+    sazonal: np.ndarray
+    # Tarifa (R$/kWh) de cada unidade
+    tarifa: pd.Series
+    # Geração e Receita de cada unidade nos 12 meses até fim
+    ultimos: pd.DataFrame
+
+    def matriz(self, horizonte=HORIZONTE):
+        # Unidade × mês previsto, a partir do mês seguinte a fim
+        passos = np.arange(1, horizonte + 1)
+        t = _meses_desde(self.inicio, self.fim) + passos
+        meses = (self.fim.month - 1 + passos) % 12
+        tendencia = np.maximum(self.nivel[:, None] + self.inclinacao[:, None] * t, 0.0)
+        return tendencia * self.sazonal[:, meses]
+
+    @medir("prever")
+    def prever(self, horizonte=HORIZONTE):
+        # Frame longo Tempo, Unidade, Geração (kWh), Receita (R$)
+        geracao = self.matriz(horizonte)
+        receita = geracao * self.tarifa.to_numpy()[:, None]
+        tempo = pd.date_range(self.fim + pd.DateOffset(months=1), periods=horizonte, freq="MS")
+        return pd.DataFrame({
+            "Tempo": np.tile(tempo, len(self.unidades)),
+            "Unidade": pd.Categorical(np.repeat(self.unidades, horizonte), categories=self.unidades),
+            "Geração (kWh)": geracao.ravel(),
+            "Receita (R$)": receita.ravel(),
+        })
+
+    def totais(self, horizonte=HORIZONTE):
+        geracao = self.matriz(horizonte).sum(axis=1)
+        return pd.DataFrame(
+            {"Geração (kWh)": geracao, "Receita (R$)": geracao * self.tarifa.to_numpy()},
+            index=self.unidades.rename("Unidade"),
+        )
+
+    def comparativo(self, horizonte=HORIZONTE):
+        # Previsão ao lado dos 12 meses observados mais recentes
+        totais = self.totais(horizonte)
+        tabela = pd.DataFrame({
+            "Últimos 12 meses (kWh)": self.ultimos["Geração (kWh)"],
+            "Previsão (kWh)": totais["Geração (kWh)"],
+            "Previsão Receita (R$)": totais["Receita (R$)"],
+        })
+        base = tabela["Últimos 12 meses (kWh)"]
+        tabela["Variação %"] = ((tabela["Previsão (kWh)"] / base.where(base > 0) - 1) * 100).round(2)
+        return tabela.reset_index()
+
+def _meses_desde(inicio, tempo):
+    return (tempo.year - inicio.year) * 12 + tempo.month - inicio.month
+
+def matriz_mensal(cubo, metrica="Geração (kWh)"):
+    # (unidades, primeiro mês, matriz Unidade × mês com NaN onde não há leitura)
+    serie = cubo.mensal[metrica]
+    unidades, linhas = np.unique(serie.index.get_level_values("Unidade").astype(str), return_inverse=True)
+    anos = serie.index.get_level_values("Ano").to_numpy(dtype=int)
+    meses = serie.index.get_level_values("MesNum").to_numpy(dtype=int)
+    posicao = anos * 12 + meses - 1
+    primeiro = posicao.min()
+    matriz = np.full((len(unidades), posicao.max() - primeiro + 1), np.nan)
+    matriz[linhas, posicao - primeiro] = serie.to_numpy(dtype=float)
+    inicio = pd.Timestamp(year=int(primeiro // 12), month=int(primeiro % 12) + 1, day=1)
+    return pd.Index(unidades, name="Unidade"), inicio, matriz
+
+def _retas(t, z, pesos, minimo):
+    # Mínimos quadrados de z ~ a + b·t em cada linha, só onde pesos = 1
+    n = pesos.sum(axis=1)
+    com_dados = n > 0
+    n_seguro = np.where(com_dados, n, 1.0)
+    tm = (pesos * t).sum(axis=1) / n_seguro
+    zm = (pesos * z).sum(axis=1) / n_seguro
+    dt = np.where(pesos > 0, t - tm[:, None], 0.0)
+    sxx = (dt * dt).sum(axis=1)
+    sxy = (dt * np.where(pesos > 0, z - zm[:, None], 0.0)).sum(axis=1)
+    inclinacao = np.where((n >= minimo) & (sxx > 0), sxy / np.where(sxx > 0, sxx, 1.0), 0.0)
+    nivel = np.where(com_dados, zm - inclinacao * tm, 0.0)
+    return nivel, inclinacao
+
+@medir("ajustar_sazonal")
+def ajustar_sazonal(matriz, mes_inicial, iteracoes=ITERACOES, peso_comum=PESO_PERFIL_COMUM,
+                    meses_tendencia=MESES_TENDENCIA, fracao_parada=FRACAO_PARADA):
+    # matriz: Unidade × mês; mes_inicial: mês do ano (1-12) da primeira coluna
+    unidades, colunas = matriz.shape
+    t = np.arange(colunas, dtype=float)[None, :]
+    mes = (mes_inicial - 1 + np.arange(colunas)) % 12
+    mes_do_ano = np.eye(12)[mes]
+    # Meses parados ou parciais (abaixo de FRACAO_PARADA da mediana da
+    # unidade) não entram: a previsão é da geração com o sistema operando
+    valores = np.nan_to_num(matriz, nan=0.0)
+    positivos = np.where(valores > 0, valores, np.nan)
+    com_geracao = ~np.isnan(positivos).all(axis=1)
+    mediana = np.zeros(unidades)
+    mediana[com_geracao] = np.nanmedian(positivos[com_geracao], axis=1)
+    pesos = ((valores > 0) & (valores >= fracao_parada * mediana[:, None])).astype(float)
+    sazonal = np.ones((unidades, 12))
+    for _ in range(iteracoes):
+        nivel, inclinacao = _retas(t, valores / sazonal[:, mes], pesos, meses_tendencia)
+        tendencia = nivel[:, None] + inclinacao[:, None] * t
+        validos = pesos * (tendencia > 0)
+        razao = np.where(validos > 0, valores / np.where(tendencia > 0, tendencia, 1.0), 0.0)
+        soma = razao @ mes_do_ano
+        contagem = validos @ mes_do_ano
+        total = contagem.sum(axis=0)
+        comum = np.where(total > 0, soma.sum(axis=0) / np.where(total > 0, total, 1.0), 1.0)
+        comum /= comum.mean()
+        sazonal = (soma + peso_comum * comum) / (contagem + peso_comum)
+        sazonal /= sazonal.mean(axis=1, keepdims=True)
+    nivel, inclinacao = _retas(t, valores / sazonal[:, mes], pesos, meses_tendencia)
+    return nivel, inclinacao, sazonal
+
+def _tarifas(unidades, fatores, fim, site_das_unidades=None):
+    tarifas = fatores.loc[fatores["Tarifa (R$/kWh)"].notna()]
+    if not len(tarifas):
+        return pd.Series(0.0, index=unidades)
+    recentes = tarifas[tarifas.index > fim - pd.DateOffset(months=12)]
+    if site_das_unidades is None:
+        return pd.Series(float(recentes["Tarifa (R$/kWh)"].mean()), index=unidades)
+    # Fatores de vários campi (coluna Site): cada unidade com a do seu campus
+    por_site = recentes.groupby("Site", observed=True)["Tarifa (R$/kWh)"].mean()
+    return site_das_unidades.reindex(unidades).map(por_site).astype(float)
+
+def modelo_previsao(cubo, fatores, site_das_unidades=None):
+    unidades, inicio, matriz = matriz_mensal(cubo)
+    _, _, receita = matriz_mensal(cubo, "Receita (R$)")
+    nivel, inclinacao, sazonal = ajustar_sazonal(matriz, inicio.month)
+    fim = inicio + pd.DateOffset(months=matriz.shape[1] - 1)
+    return ModeloSazonal(
+        unidades=unidades, inicio=inicio, fim=fim, nivel=nivel, inclinacao=inclinacao,
+        sazonal=sazonal, tarifa=_tarifas(unidades, fatores, fim, site_das_unidades),
+        ultimos=pd.DataFrame({
+            "Geração (kWh)": np.nansum(matriz[:, -12:], axis=1),
+            "Receita (R$)": np.nansum(receita[:, -12:], axis=1),
+        }, index=unidades),
+    )
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+
+# -------------------------------
+#   Regressão por intervalo de tempo
+# -------------------------------
+# Reta de mínimos quadrados y = a + b·x e correlação de Pearson de um
+# intervalo de Tempo a partir de somas acumuladas de n, x, y, x², y² e x·y
+# (só linhas com x e y preenchidos, como no dropna antes do corr). Os
+# valores são centrados na média geral antes das somas, o que evita o
+# cancelamento entre Σx² e (Σx)²/n. Um intervalo custa duas buscas binárias.
+@dataclass(frozen=True)
+class Ajuste:
+    n: int
+    inclinacao: float
+    intercepto: float
+    r2: float
+    correlacao: float
+
+    def prever(self, x):
+        return self.intercepto + self.inclinacao * np.asarray(x, dtype=float)
+
+@dataclass(frozen=True)
+class SomasRegressao:
+    x: str
+    y: str
+    tempo: np.ndarray
+    centro: tuple
+    # Colunas: n, Σx, Σy, Σx², Σy², Σxy (valores centrados)
+    somas: np.ndarray
+
+    def ajuste(self, inicio, fim):
+        # Intervalo fechado [inicio, fim], como em SomasAcumuladas
+        i = np.searchsorted(self.tempo, np.datetime64(pd.Timestamp(inicio)), side="left")
+        j = np.searchsorted(self.tempo, np.datetime64(pd.Timestamp(fim)), side="right")
+        n, sx, sy, sxx, syy, sxy = self.somas[j] - self.somas[i]
+        cx, cy = self.centro
+        if n < 2:
+            return Ajuste(int(n), np.nan, np.nan, np.nan, np.nan)
+        vxx = sxx - sx * sx / n
+        vyy = syy - sy * sy / n
+        vxy = sxy - sx * sy / n
+        inclinacao = vxy / vxx if vxx > 0 else np.nan
+        correlacao = vxy / np.sqrt(vxx * vyy) if vxx > 0 and vyy > 0 else np.nan
+        intercepto = cy + sy / n - inclinacao * (cx + sx / n)
+        return Ajuste(int(n), float(inclinacao), float(intercepto), float(correlacao ** 2), float(correlacao))
+
+def somas_regressao(df, x, y):
+    df = df.iloc[np.argsort(df["Tempo"].to_numpy(), kind="stable")]
+    vx = df[x].to_numpy(dtype=float)
+    vy = df[y].to_numpy(dtype=float)
+    validos = ~(np.isnan(vx) | np.isnan(vy))
+    cx = float(vx[validos].mean()) if validos.any() else 0.0
+    cy = float(vy[validos].mean()) if validos.any() else 0.0
+    dx = np.where(validos, vx - cx, 0.0)
+    dy = np.where(validos, vy - cy, 0.0)
+    termos = np.column_stack([validos, dx, dy, dx * dx, dy * dy, dx * dy]).astype(float)
+    return SomasRegressao(
+        x=x,
+        y=y,
+        tempo=df["Tempo"].to_numpy(dtype="datetime64[ns]"),
+        centro=(cx, cy),
+        somas=np.vstack([np.zeros((1, termos.shape[1])), np.cumsum(termos, axis=0)]),
+    )
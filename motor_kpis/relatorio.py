@@ -0,0 +1,141 @@
+import hashlib
+import os
+import numpy as np
+from . import formatacao
+from .cache import CACHE_DIR, assinatura_arquivo
+from .medicao import medir
+from .formatacao import configurar_locale, format_real, format_num, format_real_serie, format_num_serie
+
+LOGO_PDF = "logo-ceamazon-preta.png"
+
+def versao_modelo():
+    # Hash do código que desenha o PDF e da logo: PDFs gerados por outra
+    # versão do modelo não contam como atualizados
+    arquivos = [__file__, formatacao.__file__, LOGO_PDF]
+    assinaturas = [assinatura_arquivo(a) if os.path.exists(a) else "-" for a in arquivos]
+    return hashlib.sha1("|".join(assinaturas).encode("utf-8")).hexdigest()[:12]
+
+def _logo_pdf(caminho, largura=480):
+    # Versão RGB reduzida da logo sobre o fundo da faixa do PDF, gerada uma
+    # vez no diretório de cache (a logo original é RGBA em 2362px)
+    from PIL import Image
+    destino = os.path.join(CACHE_DIR, f"logo-{assinatura_arquivo(caminho)}-{largura}.png")
+    if not os.path.exists(destino):
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        logo = Image.open(caminho).convert("RGBA")
+        logo = logo.resize((largura, round(logo.height * largura / logo.width)), Image.LANCZOS)
+        fundo = Image.new("RGBA", logo.size, (248, 244, 239, 255))
+        tmp = f"{destino}.{os.getpid()}.tmp"
+        Image.alpha_composite(fundo, logo).convert("RGB").save(tmp, format="PNG")
+        os.replace(tmp, destino)
+    return destino
+
+def gerar_pdf_kpis(df, periodo_desc):
+    with medir("gerar_pdf_kpis", periodo=periodo_desc) as medida:
+        medida.linhas = len(df)
+        return _montar_pdf(df, periodo_desc)
+
+def _montar_pdf(df, periodo_desc):
+    # FPDF e matplotlib só são importados quando um PDF é de fato gerado
+    from fpdf import FPDF
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from PIL import Image
+    import tempfile
+    configurar_locale()
+    pdf = FPDF()
+    pdf.add_page()
+    # Faixa colorida no topo
+    pdf.set_fill_color(248, 244, 239)  # cor de fundo institucional
+    pdf.rect(0, 0, 210, 30, 'F')
+    try:
+        pdf.image(_logo_pdf(LOGO_PDF), x=85, y=5, w=40)
+    except Exception:
+        pass
+    pdf.set_y(32)
+    pdf.set_font("Arial", 'B', 20)
+    pdf.set_text_color(71, 50, 40)
+    pdf.cell(0, 14, f"KPIs - {periodo_desc}", ln=True, align="C")
+    pdf.set_draw_color(205, 183, 151)
+    pdf.set_line_width(0.7)
+    pdf.line(15, pdf.get_y(), 195, pdf.get_y())
+    pdf.ln(8)
+    # KPIs em blocos
+    pdf.set_font("Arial", 'B', 13)
+    pdf.set_fill_color(243, 231, 215)
+    pdf.set_text_color(61, 41, 28)
+    pdf.cell(65, 18, f"Geração: {format_num(df['Geração (kWh)'].sum(), 0)} kWh", border=0, ln=0, align="C", fill=True)
+    pdf.cell(65, 18, f"Receita: {format_real(df['Receita (R$)'].sum())}", border=0, ln=0, align="C", fill=True)
+    if 'Redução GEE (tCO2)' in df.columns:
+        pdf.cell(65, 18, f"GEE: {format_num(df['Redução GEE (tCO2)'].sum(), 2)} tCO2", border=0, ln=1, align="C", fill=True)
+    else:
+        pdf.cell(65, 18, "", border=0, ln=1, align="C", fill=True)
+    pdf.ln(6)
+    pdf.set_draw_color(205, 183, 151)
+    pdf.set_line_width(0.5)
+    pdf.line(15, pdf.get_y(), 195, pdf.get_y())
+    pdf.ln(6)
+    # Resumo por mês
+    pdf.set_font("Arial", 'B', 12)
+    pdf.set_text_color(71, 50, 40)
+    pdf.cell(0, 10, "Resumo por mês:", ln=True)
+    pdf.set_font("Arial", size=10)
+    pdf.set_text_color(61, 41, 28)
+    meses = df.groupby(['Ano', 'MesNum']).agg({
+        'Geração (kWh)': 'sum',
+        'Receita (R$)': 'sum',
+        'Redução GEE (tCO2)': 'sum'
+    }).reset_index()
+    linhas = (
+        meses['Ano'].astype(str) + "/" + meses['MesNum'].fillna(0).astype(int).map("{:02d}".format)
+        + " - Energia: " + format_num_serie(meses['Geração (kWh)'], 0)
+        + ", Receita: " + format_real_serie(meses['Receita (R$)'])
+        + ", GEE: " + format_num_serie(meses['Redução GEE (tCO2)'], 2)
+    )
+    for linha in linhas:
+        pdf.cell(0, 8, linha, ln=True)
+    pdf.ln(8)
+    # Gráficos com borda e melhorias visuais
+    def add_graph(data, col, color, title, ylabel):
+        import calendar
+        meses_labels = [calendar.month_abbr[m].capitalize() for m in data['MesNum']]
+        # Figure sem pyplot: não registra a figura no estado global
+        fig = Figure(figsize=(7, 4.2))
+        ax = fig.subplots()
+        bars = ax.bar(meses_labels, data[col], color=color, edgecolor='#473228', linewidth=1.2)
+        ax.set_title(title, fontsize=12, color='#473228', pad=12)
+        ax.set_xlabel('Mês', fontsize=10)
+        ax.set_ylabel(ylabel, fontsize=10)
+        ax.grid(axis='y', linestyle='--', alpha=0.25)
+        ax.tick_params(axis='x', labelsize=10)
+        ax.tick_params(axis='y', labelsize=10)
+        # Adiciona rótulos de valor em cada barra
+        for bar, rotulo in zip(bars, format_num_serie(data[col], 0)):
+            ax.text(bar.get_x() + bar.get_width()/2, bar.get_height(), rotulo,
+                    ha='center', va='bottom', fontsize=10, color='#473228', fontweight='bold')
+        # Legenda fora do gráfico, canto superior esquerdo
+        ax.legend(["Sistemas Fotovoltaicos Prefeitura"], loc='upper left', bbox_to_anchor=(0, 1.08), fontsize=10, frameon=False)
+        # Ajusta margens para alinhamento perfeito
+        fig.subplots_adjust(left=0.15, right=0.97, top=0.85, bottom=0.22)
+        ax.set_position([0.15, 0.22, 0.75, 0.63])
+        # Renderiza em memória e grava um PNG RGB: a FPDF separa o canal
+        # alfa de imagens RGBA em Python puro, o que dominava o tempo do PDF.
+        # A FPDF só lê imagens a partir de arquivos, por isso o PNG passa por
+        # uma pasta temporária apagada ao fim da geração
+        fig.set_dpi(180)
+        canvas = FigureCanvasAgg(fig)
+        canvas.draw()
+        arquivo = os.path.join(pasta_tmp, f"grafico_{len(pdf.images)}.png")
+        Image.fromarray(np.asarray(canvas.buffer_rgba())).convert("RGB").save(arquivo)
+        pdf.image(arquivo, x=25, w=160)
+    with tempfile.TemporaryDirectory(prefix="kpis_pdf_") as pasta_tmp:
+        add_graph(meses, 'Geração (kWh)', '#FFC93C', 'Geração de Energia (kWh) por Mês', 'kWh')
+        add_graph(meses, 'Receita (R$)', '#8d6052', 'Receita (R$) por Mês', 'R$')
+        if 'Redução GEE (tCO2)' in meses.columns:
+            add_graph(meses, 'Redução GEE (tCO2)', '#3A9425', 'Redução GEE (tCO2) por Mês', 'tCO2')
+    pdf.set_y(-30)
+    pdf.set_font("Arial", size=9)
+    pdf.set_text_color(120, 120, 120)
+    pdf.cell(0, 10, "© Sistemas Fotovoltaicos e Mobilidade Elétrica - CEAMAZON - 2025", align="C")
+    pdf_bytes = pdf.output(dest='S').encode('latin1')
+    return pdf_bytes
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+import pandas as pd
+from .cubo import CuboKPI
+from .dados import DadosKPI, carregar_dados, compactar_leituras
+from .frota import montar_frota
+from .piramide import NIVEIS, piramide_de_niveis
+
+# -------------------------------
+#   Vários campi
+# -------------------------------
+# A fonte dos dados pode ser uma planilha, uma pasta de planilhas (uma por
+# campus, com o nome do arquivo como nome do campus) ou um manifesto JSON
+# {"Campus": "caminho.xlsx", ...} com caminhos relativos ao manifesto. Cada
+# planilha é carregada por carregar_dados, em paralelo, com o próprio cache
+# e a própria versão: uma planilha alterada não recarrega as outras, só
+# refaz a junção. O conjunto junto tem a coluna Site nos quadros e, com mais
+# de um campus, unidades e veículos com o campus no nome ("ICB (Belém)"),
+# para que cubo, pirâmide e figuras continuem agrupando por Unidade.
+THREADS_SITES = int(os.environ.get("KPIS_THREADS_SITES", 0)) or min(4, os.cpu_count() or 1)
+
+_federados = {}
+_trava = threading.Lock()
+
+def listar_sites(fonte):
+    # {campus: planilha}
+    if os.path.isdir(fonte):
+        return {
+            os.path.splitext(nome)[0]: os.path.join(fonte, nome)
+            for nome in sorted(os.listdir(fonte))
+            if nome.lower().endswith(".xlsx") and not nome.startswith("~$")
+        }
+    if fonte.lower().endswith(".json"):
+        with open(fonte, encoding="utf-8") as f:
+            manifesto = json.load(f)
+        pasta = os.path.dirname(os.path.abspath(fonte))
+        return {str(site): os.path.join(pasta, caminho) for site, caminho in manifesto.items()}
+    return {os.path.splitext(os.path.basename(fonte))[0]: fonte}
+
+def varias_planilhas(fonte):
+    return os.path.isdir(fonte) or fonte.lower().endswith(".json")
+
+def carregar_sites(fonte, threads=None):
+    # Uma planilha sozinha volta como está, sem a coluna Site
+    if not varias_planilhas(fonte):
+        return carregar_dados(fonte)
+    sites = listar_sites(fonte)
+    if not sites:
+        raise FileNotFoundError(f"Nenhuma planilha em {fonte}")
+    threads = min(threads or THREADS_SITES, len(sites))
+    if threads <= 1:
+        carregados = [carregar_dados(caminho) for caminho in sites.values()]
+    else:
+        with ThreadPoolExecutor(threads, thread_name_prefix="carga-sites") as pool:
+            carregados = list(pool.map(carregar_dados, sites.values()))
+    conjuntos = dict(zip(sites, carregados))
+    versao = hashlib.sha1("|".join(f"{site}={d.versao}" for site, d in conjuntos.items()).encode("utf-8")).hexdigest()[:16]
+    chave = (os.path.abspath(fonte), versao)
+    with _trava:
+        if chave not in _federados:
+            for antiga in [c for c in _federados if c[0] == chave[0]]:
+                del _federados[antiga]
+            _federados[chave] = federar(conjuntos, versao)
+        return _federados[chave]
+
+def _rotulos(conjuntos):
+    if len(conjuntos) == 1:
+        return lambda site, nome: nome
+    return lambda site, nome: f"{nome} ({site})"
+
+def _com_site(df, site, rotulo, coluna):
+    serie = df[coluna]
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.cat.rename_categories([rotulo(site, str(nome)) for nome in serie.cat.categories])
+    else:
+        serie = serie.map(lambda nome: rotulo(site, nome))
+    return df.assign(**{coluna: serie}, Site=site)
+
+def _juntar(conjuntos, nome, coluna, rotulo):
+    partes = [_com_site(getattr(d, nome), site, rotulo, coluna) for site, d in conjuntos.items()]
+    df = pd.concat(partes, ignore_index=True)
+    df["Site"] = pd.Categorical(df["Site"], categories=list(conjuntos))
+    return df
+
+def _juntar_cubo(conjuntos, rotulo):
+    partes = {"mensal": [], "anual": []}
+    for site, d in conjuntos.items():
+        for nivel in partes:
+            df = getattr(d.cubo, nivel)
+            mapa = {u: rotulo(site, u) for u in df.index.get_level_values("Unidade").unique()}
+            partes[nivel].append(df.rename(index=mapa, level="Unidade"))
+    return CuboKPI(**{nivel: pd.concat(dfs).sort_index() for nivel, dfs in partes.items()})
+
+def _juntar_piramide(conjuntos, rotulo):
+    # Cada nível junta os campi que o têm; hora/dia de um campus só são
+    # escolhidos pela pirâmide apenas para as unidades que eles cobrem
+    niveis = {}
+    for nivel in NIVEIS:
+        partes = [
+            _com_site(d.piramide.niveis[nivel], site, rotulo, "Unidade")
+            for site, d in conjuntos.items() if nivel in d.piramide.niveis
+        ]
+        if partes:
+            df = pd.concat(partes, ignore_index=True)
+            df["Unidade"] = df["Unidade"].astype("category")
+            niveis[nivel] = df.drop(columns="Site")
+    return piramide_de_niveis(niveis)
+
+def federar(conjuntos, versao):
+    rotulo = _rotulos(conjuntos)
+    fotovoltaico = compactar_leituras(_juntar(conjuntos, "fotovoltaico", "Unidade", rotulo))
+    frota = montar_frota([_juntar(conjuntos, "frota", "Veiculo", rotulo)])
+    # Tarifa e fator de emissão de cada campus, sem misturar: Receita já vem
+    # de cada planilha e a previsão usa a tarifa do campus da unidade
+    fatores = pd.concat([d.fatores.assign(Site=site) for site, d in conjuntos.items()]).sort_index(kind="stable")
+    fatores["Site"] = pd.Categorical(fatores["Site"], categories=list(conjuntos))
+    return DadosKPI(
+        versao=versao,
+        fotovoltaico=fotovoltaico,
+        sistema=_juntar(conjuntos, "sistema", "Unidade", rotulo),
+        frota=frota,
+        cubo=_juntar_cubo(conjuntos, rotulo),
+        piramide=_juntar_piramide(conjuntos, rotulo),
+        fatores=fatores,
+        sites=MappingProxyType(dict(conjuntos)),
+    )
@@ -0,0 +1,17 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor_kpis import cache
+from benchmarks.planilha_sintetica import gerar_planilha
+
+@pytest.fixture(autouse=True)
+def cache_temporario(tmp_path, monkeypatch):
+    # Cada teste com o próprio cache em disco
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "cache"))
+
+@pytest.fixture
+def planilha(tmp_path):
+    return gerar_planilha(str(tmp_path / "kpis.xlsx"), unidades=4, anos=2)
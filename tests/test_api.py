@@ -0,0 +1,36 @@
+import json
+import pytest
+from motor_kpis import carregar_dados
+from motor_kpis.api import ConsultasKPI
+
+@pytest.fixture
+def consultas(planilha):
+    dados = carregar_dados(planilha)
+    return ConsultasKPI(lambda: dados)
+
+@pytest.mark.parametrize("parametros", [
+    {"ano": "99999"},
+    {"ano": "-5"},
+    {"ano": "2024", "mes": "13"},
+    {"inicio": "99999-01-01"},
+    {"inicio": "1500-01-01"},
+    {"fim": "2024-02-30"},
+    {"inicio": "2024-06-30", "fim": "2024-01-01"},
+])
+def test_periodo_invalido_responde_400(consultas, parametros):
+    for caminho in ("/fotovoltaico", "/fotovoltaico/unidades", "/frota"):
+        status, etag, corpo = consultas.responder(caminho, parametros)
+        assert status == 400, (caminho, parametros, corpo)
+        assert "erro" in json.loads(corpo)
+
+def test_periodo_valido(consultas):
+    status, _, corpo = consultas.responder("/fotovoltaico", {"inicio": "2021-01-01", "fim": "2021-01-31"})
+    assert status == 200
+    assert json.loads(corpo)["filtro"]["fim"].startswith("2021-01-31T23:59:59")
+
+def test_sem_dados_responde_503():
+    def atual():
+        raise RuntimeError("Dados ainda não carregados")
+    status, _, corpo = ConsultasKPI(atual).responder("/fotovoltaico", {})
+    assert status == 503
+    assert json.loads(corpo)["erro"] == "Dados ainda não carregados"
@@ -0,0 +1,54 @@
+import os
+import time
+import pandas as pd
+from motor_kpis import AtualizadorDados, carregar_dados
+from motor_kpis.dados import PROPRIEDADES_AQUECIDAS
+
+def _esperar(condicao, limite=10.0):
+    fim = time.monotonic() + limite
+    while time.monotonic() < fim:
+        if condicao():
+            return True
+        time.sleep(0.05)
+    return condicao()
+
+def _lote(caminho, unidade, mes, valor):
+    pd.DataFrame({"Tempo": [mes], "Unidade": [unidade], "Geração (kWh)": [valor]}).to_csv(caminho, index=False)
+
+def test_lote_que_chega_durante_a_montagem(planilha, tmp_path):
+    entrada = tmp_path / "entrada"
+    entrada.mkdir()
+    _lote(entrada / "l1.csv", "Unidade 001", "2021-01-01", 111.0)
+    chamadas = []
+
+    def soltar_lote(dados):
+        # Aquecimento da primeira montagem: o segundo lote chega no meio dela
+        if not chamadas:
+            _lote(entrada / "l2.csv", "Unidade 002", "2021-01-01", 222.0)
+        chamadas.append(dados.versao)
+
+    atualizador = AtualizadorDados(planilha, intervalo=0.05, pasta_entrada=str(entrada), aquecimentos=[soltar_lote])
+    atualizador.iniciar()
+    try:
+        processado = entrada / "processados" / "l2.csv"
+        assert _esperar(processado.exists), os.listdir(entrada)
+        assert _esperar(lambda: 222.0 in atualizador.atual().fotovoltaico["Geração (kWh)"].tolist())
+        assert 111.0 in atualizador.atual().fotovoltaico["Geração (kWh)"].tolist()
+        assert atualizador.ultimo_erro is None
+    finally:
+        atualizador.parar()
+
+def test_planilha_gravada_e_trocada(planilha, tmp_path):
+    from benchmarks.planilha_sintetica import gerar_planilha
+    atualizador = AtualizadorDados(planilha, intervalo=0.05).iniciar()
+    try:
+        versao = atualizador.atual().versao
+        gerar_planilha(planilha, unidades=4, anos=2, semente=7)
+        assert _esperar(lambda: atualizador.atual().versao != versao)
+    finally:
+        atualizador.parar()
+
+def test_aquecer_monta_as_propriedades(planilha):
+    dados = carregar_dados(planilha)
+    assert dados.aquecer() is dados
+    assert all(nome in vars(dados) for nome in PROPRIEDADES_AQUECIDAS)
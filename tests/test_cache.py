@@ -0,0 +1,36 @@
+import logging
+import os
+import pandas as pd
+from motor_kpis import arquivo_cache, assinatura_arquivo, cache, carregar_dados_fotovoltaico, salvar_cache
+from benchmarks.planilha_sintetica import gerar_planilha
+
+def _arquivo(planilha):
+    return arquivo_cache(planilha, assinatura_arquivo(planilha), "fotovoltaico")
+
+def test_planilha_editada_invalida_o_cache(planilha):
+    antes = carregar_dados_fotovoltaico(planilha)
+    arquivo_antigo = _arquivo(planilha)
+    assert os.path.exists(arquivo_antigo)
+    gerar_planilha(planilha, unidades=5, anos=2, semente=7)
+    depois = carregar_dados_fotovoltaico(planilha)
+    assert _arquivo(planilha) != arquivo_antigo and os.path.exists(_arquivo(planilha))
+    # A versão antiga da mesma planilha é descartada
+    assert not os.path.exists(os.path.dirname(arquivo_antigo))
+    assert depois["Unidade"].nunique() == 5 and antes["Unidade"].nunique() == 4
+    pd.testing.assert_frame_equal(carregar_dados_fotovoltaico(planilha), depois)
+
+def test_cache_corrompido_e_refeito(planilha):
+    esperado = carregar_dados_fotovoltaico(planilha)
+    arquivo = _arquivo(planilha)
+    with open(arquivo, "wb") as f:
+        f.write(b"isto nao e feather")
+    pd.testing.assert_frame_equal(carregar_dados_fotovoltaico(planilha), esperado)
+    pd.testing.assert_frame_equal(pd.read_feather(arquivo), esperado)
+
+def test_falha_ao_gravar_e_registrada(tmp_path, monkeypatch, caplog):
+    def falhar(df, arquivo):
+        raise OSError("disco cheio")
+    monkeypatch.setattr(cache, "_gravar_cache", falhar)
+    with caplog.at_level(logging.WARNING, logger="motor_kpis.cache"):
+        salvar_cache(pd.DataFrame({"a": [1]}), str(tmp_path / "x.feather"))
+    assert "disco cheio" in caplog.text and "x.feather" in caplog.text
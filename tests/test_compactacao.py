@@ -0,0 +1,44 @@
+import pandas as pd
+from motor_kpis import carregar_dados, montar_cubo
+
+def _sem_compactar(fv):
+    # Como antes da compactação: texto e inteiros de 64 bits
+    return fv.astype({"Unidade": object, "Mês": object, "Ano": "int64", "MesNum": "int64"})
+
+def _valores(df):
+    tabela = df.reset_index()
+    return tabela.astype({col: "int64" for col in ("Ano", "MesNum") if col in tabela.columns})
+
+def test_tipos_compactos(planilha):
+    dados = carregar_dados(planilha)
+    fv = dados.fotovoltaico
+    assert isinstance(fv["Unidade"].dtype, pd.CategoricalDtype)
+    assert isinstance(fv["Mês"].dtype, pd.CategoricalDtype)
+    assert fv["Ano"].dtype == "int16" and fv["MesNum"].dtype == "int8"
+    assert fv["Tempo"].dtype == "datetime64[ns]"
+    assert set(fv["Unidade"].cat.categories) == set(fv["Unidade"].unique())
+    fatores = dados.fatores
+    assert fatores.index.name == "Tempo" and fatores.index.is_monotonic_increasing and fatores.index.is_unique
+    assert (fatores.dtypes == "float64").all()
+
+def test_cubo_igual_ao_do_frame_sem_compactar(planilha):
+    dados = carregar_dados(planilha)
+    compacto = montar_cubo(dados.fotovoltaico, dados.sistema, dados.fatores)
+    largo = montar_cubo(_sem_compactar(dados.fotovoltaico), dados.sistema, dados.fatores)
+    pd.testing.assert_frame_equal(_valores(compacto.mensal), _valores(largo.mensal))
+    pd.testing.assert_frame_equal(_valores(compacto.anual), _valores(largo.anual))
+    ano = int(dados.fotovoltaico["Ano"].max())
+    pd.testing.assert_series_equal(compacto.totais(ano), largo.totais(ano))
+    pd.testing.assert_frame_equal(compacto.pivot_mensal("Geração (kWh)", ano),
+                                  largo.pivot_mensal("Geração (kWh)", ano), check_index_type=False)
+
+def test_unidade_removida_nao_vira_grupo_vazio(planilha):
+    dados = carregar_dados(planilha)
+    fv = dados.fotovoltaico
+    # A categoria continua no dtype, mas observed=True não cria linhas dela
+    parte = fv[fv["Unidade"] != "Unidade 001"]
+    assert "Unidade 001" in parte["Unidade"].cat.categories
+    cubo = montar_cubo(parte, dados.sistema, dados.fatores)
+    largo = montar_cubo(_sem_compactar(parte), dados.sistema, dados.fatores)
+    assert "Unidade 001" not in cubo.anual.index.get_level_values("Unidade")
+    pd.testing.assert_frame_equal(_valores(cubo.anual), _valores(largo.anual))
@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+from motor_kpis import METRICAS_FV, carregar_dados
+
+@pytest.mark.parametrize("ano, mes", [(1999, None), (1999, 3), (2100, None)])
+def test_ano_sem_leituras(planilha, ano, mes):
+    cubo = carregar_dados(planilha).cubo
+    totais = cubo.totais(ano, mes)
+    assert list(totais.index) == METRICAS_FV and (totais == 0).all()
+    assert cubo.totais_unidade(ano, mes).empty
+    assert cubo.pivot_mensal("Geração (kWh)", ano, mes).empty
+
+def test_mes_sem_leituras_num_ano_com_leituras(planilha):
+    dados = carregar_dados(planilha)
+    cubo = dados.cubo
+    fv = dados.fotovoltaico
+    ano = int(fv["Ano"].max())
+    esperado = fv.loc[fv["Ano"] == ano, METRICAS_FV].sum()
+    pd.testing.assert_series_equal(cubo.totais(ano), esperado, check_names=False)
+    assert (cubo.totais(ano, 13) == 0).all()
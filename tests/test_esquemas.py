@@ -0,0 +1,60 @@
+import pandas as pd
+import pytest
+from motor_kpis import COL_TARIFA, ErroEsquema, carregar_dados, ler_aba
+from motor_kpis.esquemas import ESQUEMA_FOTOVOLTAICO, ESQUEMA_SISTEMA, esquema_onibus
+from benchmarks.planilha_sintetica import quadros_sinteticos
+
+def _gravar(caminho, quadros):
+    with pd.ExcelWriter(caminho, engine="openpyxl") as escritor:
+        for aba, df in quadros.items():
+            df.to_excel(escritor, sheet_name=aba, index=False)
+    return str(caminho)
+
+@pytest.fixture
+def quadros():
+    return quadros_sinteticos(unidades=3, anos=1)
+
+def test_coluna_renomeada(quadros, tmp_path):
+    quadros["dados_sistema"] = quadros["dados_sistema"].rename(columns={"Capacidade Instalada (kW)": "Potência"})
+    caminho = _gravar(tmp_path / "kpis.xlsx", quadros)
+    with pytest.raises(ErroEsquema) as erro:
+        ler_aba(caminho, ESQUEMA_SISTEMA)
+    assert "'dados_sistema'" in str(erro.value) and "Capacidade Instalada (kW)" in str(erro.value)
+    assert erro.value.ausentes == ("Capacidade Instalada (kW)",)
+    # A carga falha logo, em vez de seguir com a coluna vazia
+    with pytest.raises(ErroEsquema, match="Capacidade Instalada"):
+        carregar_dados(caminho)
+
+def test_coluna_removida(quadros, tmp_path):
+    quadros["Urbano"] = quadros["Urbano"].drop(columns="km")
+    quadros["Sheet1"] = quadros["Sheet1"].drop(columns=COL_TARIFA)
+    caminho = _gravar(tmp_path / "kpis.xlsx", quadros)
+    with pytest.raises(ErroEsquema, match=r"Aba 'Urbano'.*'km'") as erro:
+        ler_aba(caminho, esquema_onibus("Urbano"))
+    assert erro.value.ausentes == ("km",)
+    with pytest.raises(ErroEsquema) as erro:
+        ler_aba(caminho, ESQUEMA_FOTOVOLTAICO)
+    assert erro.value.ausentes == (COL_TARIFA,)
+
+def test_texto_em_coluna_numerica(quadros, tmp_path):
+    onibus = quadros["Rodoviário"].astype({"kWh": object})
+    onibus.loc[2, "kWh"] = "sem leitura"
+    quadros["Rodoviário"] = onibus
+    caminho = _gravar(tmp_path / "kpis.xlsx", quadros)
+    with pytest.raises(ErroEsquema, match=r"Aba 'Rodoviário'.*'kWh'.*sem leitura"):
+        ler_aba(caminho, esquema_onibus("Rodoviário"))
+
+def test_demais_colunas_numericas(quadros, tmp_path):
+    fv = quadros["Sheet1"]
+    # Unidade só com inteiros e unidade com "-" (sem leitura) em todo o ano
+    fv["Inteiros"] = range(len(fv))
+    fv["Sem leitura"] = "-"
+    fv["Unidade 002"] = fv["Unidade 002"].astype(object)
+    fv.loc[[0, 5], "Unidade 002"] = "-"
+    caminho = _gravar(tmp_path / "kpis.xlsx", quadros)
+    df = ler_aba(caminho, ESQUEMA_FOTOVOLTAICO)
+    unidades = ["Unidade 001", "Unidade 002", "Unidade 003", "Inteiros", "Sem leitura"]
+    assert (df[unidades].dtypes == "float64").all()
+    assert df["Tempo"].dtype == "datetime64[ns]"
+    assert df["Unidade 002"].isna().sum() == 2 and df["Sem leitura"].isna().all()
+    assert df["Inteiros"].tolist() == [float(i) for i in range(len(fv))]
@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from figuras import figura_empilhada
+
+def _serie():
+    tempo = pd.date_range("2024-01-01", periods=6, freq="h")
+    df = pd.DataFrame({
+        "Tempo": np.tile(tempo, 3),
+        "Unidade": np.repeat(["A", "B", "C"], len(tempo)),
+        "Geração (kWh)": np.arange(18, dtype="float64"),
+    })
+    # B sem a última leitura e C com uma leitura vazia
+    df = df.drop(index=11)
+    df.loc[12, "Geração (kWh)"] = np.nan
+    return df
+
+def test_webgl_empilha_por_tempo():
+    df = _serie()
+    fig = figura_empilhada(df, "Geração (kWh)", "Geração", "red", limite_webgl=5)
+    *unidades, total = fig.data
+    assert [t.type for t in fig.data] == ["scattergl"] * 4
+    esperado = (df.pivot(index="Tempo", columns="Unidade", values="Geração (kWh)")
+                  .fillna(0).cumsum(axis=1))
+    for traco in unidades:
+        np.testing.assert_allclose(traco.y, esperado[traco.name].to_numpy())
+    # O topo da pilha coincide com o total
+    np.testing.assert_allclose(unidades[-1].y, total.y)
+
+def test_barras_empilhadas_abaixo_do_limite():
+    df = _serie()
+    fig = figura_empilhada(df, "Geração (kWh)", "Geração", "red")
+    assert fig.layout.barmode == "stack"
+    assert [t.type for t in fig.data] == ["bar"] * 3 + ["scatter"]
+    np.testing.assert_allclose(fig.data[1].y, df.loc[df["Unidade"] == "B", "Geração (kWh)"])
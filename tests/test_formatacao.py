@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+import pytest
+from motor_kpis import format_num, format_num_serie, format_real, format_real_serie, tabela_formatada
+
+@pytest.mark.parametrize("v", [np.nan, None, pd.NA])
+def test_escalar_ausente_e_zero(v):
+    assert format_real(v) == "R$ 0,00"
+    assert format_num(v, 0) == "0"
+
+@pytest.mark.parametrize("v", [np.inf, -np.inf, float("inf")])
+def test_escalar_infinito(v):
+    assert format_real(v) == "N/A"
+    assert format_num(v, 0) == "N/A"
+
+def test_lote_igual_ao_escalar_nos_finitos():
+    serie = pd.Series([1234.5, -0.125, 0.0, 1e7], index=list("abcd"), name="x")
+    reais = format_real_serie(serie)
+    assert reais.tolist() == [format_real(v) for v in serie]
+    assert reais.index.equals(serie.index) and reais.name == "x"
+    assert list(format_num_serie(serie.to_numpy(), 1)) == [format_num(v, 1) for v in serie]
+    assert reais.tolist()[:3] == ["R$ 1.234,50", "R$ -0,12", "R$ 0,00"]
+
+def test_lote_nao_finito():
+    valores = [np.inf, -np.inf, np.nan, None, 2.5]
+    assert format_real_serie(pd.Series(valores)).tolist() == ["N/A"] * 4 + ["R$ 2,50"]
+    assert list(format_num_serie(np.array(valores, dtype=float), 0)) == ["N/A"] * 4 + ["2"]
+
+def test_tabela_formatada_vazio():
+    df = pd.DataFrame({"Unidade": ["A", "B"], "Receita (R$)": [np.inf, 10.0]})
+    tabela = tabela_formatada(df, {"Receita (R$)": "real"}, vazio="–")
+    assert tabela["Receita (R$)"].tolist() == ["–", "R$ 10,00"]
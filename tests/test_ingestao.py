@@ -0,0 +1,98 @@
+import os
+import shutil
+import openpyxl
+import pandas as pd
+import pytest
+from motor_kpis import carregar_dados, ingerir_lote, arquivo_anterior
+from motor_kpis import cache
+from motor_kpis.cache import assinatura_arquivo
+from benchmarks.planilha_sintetica import gerar_planilha
+
+def _conteudo(caminho):
+    with open(caminho, "rb") as f:
+        return f.read()
+
+def test_revisao_corrompida_nao_destroi_planilha(planilha, tmp_path):
+    original = _conteudo(planilha)
+    dados = carregar_dados(planilha)
+    lote = tmp_path / "revisao.xlsx"
+    lote.write_bytes(b"isto nao e uma planilha")
+    with pytest.raises(Exception):
+        ingerir_lote(planilha, str(lote))
+    assert _conteudo(planilha) == original
+    assert carregar_dados(planilha).versao == dados.versao
+
+def test_revisao_fora_do_esquema_nao_destroi_planilha(planilha, tmp_path):
+    original = _conteudo(planilha)
+    lote = str(tmp_path / "revisao.xlsx")
+    pd.DataFrame({"Outra": [1, 2]}).to_excel(lote, index=False)
+    with pytest.raises(Exception):
+        ingerir_lote(planilha, lote)
+    assert _conteudo(planilha) == original
+
+def test_revisao_valida_substitui_e_guarda_anterior(planilha, tmp_path):
+    original = _conteudo(planilha)
+    lote = gerar_planilha(str(tmp_path / "revisao.xlsx"), unidades=4, anos=2, semente=1)
+    dados = ingerir_lote(planilha, lote)
+    assert _conteudo(planilha) == _conteudo(lote)
+    assert _conteudo(arquivo_anterior(planilha)) == original
+    assert dados.versao.split("-")[0] == assinatura_arquivo(planilha)
+    assert not [nome for nome in os.listdir(tmp_path) if nome.endswith(".tmp")]
+
+def test_lote_mensal_substitui_leitura(planilha, tmp_path):
+    dados = carregar_dados(planilha)
+    unidade = str(dados.fotovoltaico["Unidade"].iloc[0])
+    lote = tmp_path / "lote.csv"
+    pd.DataFrame({"Tempo": ["2021-03-01"], "Unidade": [unidade], "Geração (kWh)": [1234.5]}).to_csv(lote, index=False)
+    novos = ingerir_lote(planilha, str(lote))
+    fv = novos.fotovoltaico
+    linha = fv[(fv["Unidade"] == unidade) & (fv["Tempo"] == "2021-03-01")]
+    assert linha["Geração (kWh)"].tolist() == [1234.5]
+    assert len(fv) == len(dados.fotovoltaico)
+    assert novos.cubo.totais(2021, 3)["Geração (kWh)"] == pytest.approx(
+        fv.loc[fv["Tempo"] == "2021-03-01", "Geração (kWh)"].sum())
+
+def test_lote_so_com_meses_novos(planilha, tmp_path):
+    # Acréscimo puro: nenhuma leitura substituída
+    dados = carregar_dados(planilha)
+    unidades = [str(u) for u in dados.fotovoltaico["Unidade"].cat.categories]
+    lote = tmp_path / "lote.csv"
+    pd.DataFrame({"Tempo": "2023-01-01", "Unidade": unidades, "Geração (kWh)": 10.0}).to_csv(lote, index=False)
+    novos = ingerir_lote(planilha, str(lote))
+    assert len(novos.fotovoltaico) == len(dados.fotovoltaico) + len(unidades)
+    assert novos.cubo.totais(2023)["Geração (kWh)"] == pytest.approx(10.0 * len(unidades))
+
+def _revisar(planilha, destino, editar):
+    livro = openpyxl.load_workbook(planilha)
+    editar(livro.worksheets[0])
+    livro.save(destino)
+    return destino
+
+def _igual_a_carga_completa(incremental, planilha, tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path / "outro_cache"))
+    copia = str(tmp_path / "copia.xlsx")
+    shutil.copyfile(planilha, copia)
+    completo = carregar_dados(copia)
+    pd.testing.assert_frame_equal(incremental.fotovoltaico, completo.fotovoltaico)
+    pd.testing.assert_frame_equal(incremental.cubo.mensal, completo.cubo.mensal)
+    pd.testing.assert_frame_equal(incremental.cubo.anual, completo.cubo.anual)
+
+def test_revisao_com_celula_alterada_e_mes_novo(planilha, tmp_path, monkeypatch):
+    # O diff por hash de linha refaz só os meses tocados e tem de chegar ao
+    # mesmo estado que montar a revisão do zero
+    carregar_dados(planilha)
+    def editar(aba):
+        aba.cell(row=3, column=2).value = 12345
+        ultima = [celula.value for celula in aba[aba.max_row]]
+        aba.append([pd.Timestamp("2023-01-01"), *ultima[1:]])
+    incremental = ingerir_lote(planilha, _revisar(planilha, str(tmp_path / "revisao.xlsx"), editar))
+    assert 12345 in incremental.fotovoltaico["Geração (kWh)"].tolist()
+    _igual_a_carga_completa(incremental, planilha, tmp_path, monkeypatch)
+
+def test_revisao_que_so_remove_meses(planilha, tmp_path, monkeypatch):
+    # Nenhuma linha recalculada (FutureWarning do concat vira erro no pytest.ini)
+    dados = carregar_dados(planilha)
+    revisao = _revisar(planilha, str(tmp_path / "revisao.xlsx"), lambda aba: aba.delete_rows(aba.max_row))
+    incremental = ingerir_lote(planilha, revisao)
+    assert incremental.fotovoltaico["Tempo"].max() < dados.fotovoltaico["Tempo"].max()
+    _igual_a_carga_completa(incremental, planilha, tmp_path, monkeypatch)
@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+import pytest
+from motor_kpis import carregar_dados
+from motor_kpis.intervalos import indice_temporal, somas_acumuladas
+
+COLUNAS = ["Geração (kWh)", "Receita (R$)"]
+
+def _leituras(semente=0, linhas=400):
+    rng = np.random.default_rng(semente)
+    # Tempos repetidos e fora de ordem, como várias unidades no mesmo mês
+    tempo = pd.Timestamp("2022-01-01") + pd.to_timedelta(rng.integers(0, 90, linhas), unit="D")
+    df = pd.DataFrame({
+        "Tempo": tempo,
+        "Unidade": rng.choice(["A", "B", "C"], linhas),
+        "Geração (kWh)": rng.gamma(2.0, 500.0, linhas),
+        "Receita (R$)": rng.gamma(2.0, 300.0, linhas),
+    })
+    df.loc[rng.random(linhas) < 0.1, "Geração (kWh)"] = np.nan
+    df.loc[rng.random(linhas) < 0.1, "Receita (R$)"] = np.nan
+    return df
+
+def _intervalos(df, quantidade=50, semente=1):
+    rng = np.random.default_rng(semente)
+    tempos = np.sort(df["Tempo"].unique())
+    # Limites nos próprios tempos (bordas do intervalo fechado) e entre eles
+    for _ in range(quantidade):
+        i, j = sorted(rng.integers(0, len(tempos), 2))
+        yield pd.Timestamp(tempos[i]), pd.Timestamp(tempos[j])
+    yield pd.Timestamp(tempos[0]) - pd.Timedelta(days=30), pd.Timestamp(tempos[0]) - pd.Timedelta(days=1)
+    yield pd.Timestamp(tempos[3]) + pd.Timedelta(hours=1), pd.Timestamp(tempos[3]) + pd.Timedelta(hours=2)
+    yield pd.Timestamp(tempos[0]), pd.Timestamp(tempos[-1])
+
+def _conferir(somas, df):
+    for inicio, fim in _intervalos(df):
+        recorte = df[df["Tempo"].between(inicio, fim)]
+        np.testing.assert_allclose(somas.totais(inicio, fim)[COLUNAS].to_numpy(float),
+                                   recorte[COLUNAS].sum().to_numpy(float), rtol=1e-9, atol=1e-6)
+        np.testing.assert_allclose(somas.medias(inicio, fim)[COLUNAS].to_numpy(float),
+                                   recorte[COLUNAS].mean().to_numpy(float), rtol=1e-9, atol=1e-6)
+        assert sorted(somas.recorte(inicio, fim).index) == sorted(recorte.index)
+
+def test_somas_iguais_ao_filtro_do_pandas():
+    df = _leituras()
+    _conferir(somas_acumuladas(df, COLUNAS), df)
+
+def test_indice_por_unidade_igual_ao_filtro_do_pandas():
+    df = _leituras(semente=2)
+    indice = indice_temporal(df, COLUNAS)
+    _conferir(indice.geral, df)
+    assert set(indice.unidades) == {"A", "B", "C"}
+    for unidade, somas in indice.unidades.items():
+        _conferir(somas, df[df["Unidade"] == unidade])
+    inicio, fim = pd.Timestamp("2022-02-01"), pd.Timestamp("2022-02-28")
+    esperado = df[df["Tempo"].between(inicio, fim)].groupby("Unidade")[COLUNAS].sum()
+    pd.testing.assert_frame_equal(indice.totais_unidades(inicio, fim)[COLUNAS].sort_index(), esperado,
+                                  check_names=False, rtol=1e-9)
+
+def test_indice_dos_dados_carregados(planilha):
+    dados = carregar_dados(planilha)
+    df = dados.fotovoltaico
+    indice = dados.indice_fotovoltaico
+    inicio, fim = df["Tempo"].quantile(0.25), df["Tempo"].quantile(0.75)
+    recorte = df[df["Tempo"].between(inicio, fim)]
+    for coluna in indice.geral.colunas:
+        assert indice.geral.totais(inicio, fim)[coluna] == pytest.approx(recorte[coluna].sum(), rel=1e-9)
+        unidade = "Unidade 001"
+        esperado = recorte.loc[recorte["Unidade"] == unidade, coluna].sum()
+        assert indice.unidades[unidade].totais(inicio, fim)[coluna] == pytest.approx(esperado, rel=1e-9)
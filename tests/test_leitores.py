@@ -0,0 +1,62 @@
+import os
+import pandas as pd
+import pytest
+from motor_kpis import Planilha, escolher_motor, exportar_abas, leitores, ler_aba
+from motor_kpis.esquemas import ESQUEMA_FOTOVOLTAICO, ESQUEMA_SISTEMA, esquema_onibus
+from benchmarks.planilha_sintetica import gerar_planilha
+
+ESQUEMAS = (ESQUEMA_FOTOVOLTAICO, ESQUEMA_SISTEMA, esquema_onibus("Urbano"))
+
+def _excel():
+    # Motor de Excel da escolha automática neste ambiente
+    return "calamine" if leitores.MOTORES["calamine"]() else "openpyxl"
+
+@pytest.mark.parametrize("motor", ["openpyxl", "calamine"])
+def test_motor_forcado(planilha, motor, monkeypatch):
+    if not leitores.MOTORES[motor]():
+        pytest.skip(f"{motor} não instalado")
+    assert escolher_motor(planilha, motor) == motor
+    monkeypatch.setattr(leitores, "MOTOR_PLANILHA", motor)
+    with Planilha(planilha) as aberta:
+        assert aberta.motor == motor
+
+def test_motor_desconhecido(planilha):
+    with pytest.raises(ValueError, match="xlrd"):
+        escolher_motor(planilha, "xlrd")
+
+def test_sem_calamine_usa_openpyxl(planilha, monkeypatch):
+    monkeypatch.setitem(leitores.MOTORES, "calamine", lambda: False)
+    assert escolher_motor(planilha) == "openpyxl"
+    referencia = ler_aba(planilha, ESQUEMA_FOTOVOLTAICO, "openpyxl")
+    pd.testing.assert_frame_equal(ler_aba(planilha, ESQUEMA_FOTOVOLTAICO), referencia)
+
+def test_exportacao_forcada_sem_exportar(planilha):
+    with pytest.raises(FileNotFoundError, match="exportar_abas"):
+        Planilha(planilha, "csv")
+
+@pytest.mark.parametrize("formato", ["csv", "parquet"])
+def test_exportacao_em_dia_e_desatualizada(planilha, formato, monkeypatch):
+    if not leitores.MOTORES[formato]():
+        pytest.skip(f"{formato} indisponível")
+    exportar_abas(planilha, formato)
+    assert escolher_motor(planilha) == formato
+    for esquema in ESQUEMAS:
+        pd.testing.assert_frame_equal(ler_aba(planilha, esquema), ler_aba(planilha, esquema, "openpyxl"))
+
+    # Planilha alterada: o manifesto não bate com o hash e a exportação é ignorada
+    gerar_planilha(planilha, unidades=5, anos=1, semente=3)
+    assert escolher_motor(planilha) == _excel()
+    assert "Unidade 005" in ler_aba(planilha, ESQUEMA_FOTOVOLTAICO).columns
+    with pytest.raises(FileNotFoundError):
+        Planilha(planilha, formato)
+
+    # Exportada de novo, volta a ser usada, já com o conteúdo novo
+    exportar_abas(planilha, formato)
+    assert escolher_motor(planilha) == formato
+    for esquema in ESQUEMAS:
+        pd.testing.assert_frame_equal(ler_aba(planilha, esquema), ler_aba(planilha, esquema, "openpyxl"))
+
+def test_exportacao_interrompida_nao_e_usada(planilha, monkeypatch):
+    pasta = exportar_abas(planilha, "csv")
+    os.remove(os.path.join(pasta, leitores.MANIFESTO))
+    assert escolher_motor(planilha) == _excel()
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+from motor_kpis import METODOS_NORMALIZACAO, normalizar, normalizar_longo
+
+INDICADORES = ["Geração (kWh)", "Eficiência (kWh/kWp)", "Receita (R$)"]
+
+def _tabela(semente=0):
+    rng = np.random.default_rng(semente)
+    unidades = [f"Unidade {i}" for i in range(1, 7)]
+    tabela = pd.DataFrame({
+        "Unidade": np.tile(unidades, 3),
+        "Ano": np.repeat([2022, 2023, 2024], len(unidades)),
+        "Geração (kWh)": rng.gamma(2.0, 1000.0, 18),
+        "Eficiência (kWh/kWp)": rng.gamma(2.0, 50.0, 18),
+        "Receita (R$)": rng.gamma(2.0, 400.0, 18),
+    })
+    tabela.loc[3, "Receita (R$)"] = np.nan
+    # Ordem embaralhada: o resultado segue as linhas da tabela
+    return tabela.sample(frac=1.0, random_state=semente).reset_index(drop=True)
+
+def _referencia(tabela, metodo):
+    # Laço por ano e por indicador, valor a valor, como no radar antigo
+    saida = tabela.copy()
+    for ano in tabela["Ano"].unique():
+        linhas = tabela["Ano"] == ano
+        for col in INDICADORES:
+            serie = tabela.loc[linhas, col]
+            if metodo == "maximo":
+                maximo = serie.max()
+                valores = serie / maximo if maximo > 0 else serie * 0.0
+            elif metodo == "minmax":
+                amplitude = serie.max() - serie.min()
+                valores = (serie - serie.min()) / amplitude if amplitude > 0 else serie * 0.0
+            elif metodo == "posto":
+                valores = serie.rank(pct=True)
+            else:
+                desvio = serie.std(ddof=0)
+                valores = (serie - serie.mean()) / desvio if desvio > 0 else serie * 0.0
+            saida.loc[linhas, col] = valores
+    return saida
+
+@pytest.mark.parametrize("metodo", list(METODOS_NORMALIZACAO))
+def test_igual_ao_laco_por_ano(metodo):
+    tabela = _tabela()
+    pd.testing.assert_frame_equal(normalizar(tabela, INDICADORES, metodo), _referencia(tabela, metodo))
+
+@pytest.mark.parametrize("metodo", list(METODOS_NORMALIZACAO))
+def test_serie_constante(metodo):
+    tabela = _tabela()
+    tabela["Eficiência (kWh/kWp)"] = 80.0
+    tabela.loc[tabela["Ano"] == 2023, "Geração (kWh)"] = 0.0
+    normalizado = normalizar(tabela, INDICADORES, metodo)
+    assert np.isfinite(normalizado[["Eficiência (kWh/kWp)", "Geração (kWh)"]].to_numpy()).all()
+    pd.testing.assert_frame_equal(normalizado, _referencia(tabela, metodo))
+    if metodo in ("minmax", "zscore"):
+        # Sem amplitude ou desvio: 0, e não a divisão por zero
+        assert (normalizado["Eficiência (kWh/kWp)"] == 0.0).all()
+
+def test_metodo_desconhecido():
+    with pytest.raises(ValueError, match="'mediana'"):
+        normalizar(_tabela(), INDICADORES, "mediana")
+
+def test_longo():
+    tabela = _tabela()
+    longo = normalizar_longo(tabela, INDICADORES, "minmax")
+    assert len(longo) == len(tabela) * len(INDICADORES)
+    largo = longo.pivot(index=["Ano", "Unidade"], columns="Indicador", values="Valor")
+    esperado = normalizar(tabela, INDICADORES, "minmax").set_index(["Ano", "Unidade"])[INDICADORES]
+    pd.testing.assert_frame_equal(largo.loc[esperado.index, INDICADORES], esperado, check_names=False)
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+from motor_kpis import carregar_dados, ingerir_lote
+
+@pytest.fixture
+def com_inversor(planilha, tmp_path):
+    # Leituras de 15 min de uma única unidade em março de 2022
+    dados = carregar_dados(planilha)
+    unidade = str(dados.fotovoltaico["Unidade"].cat.categories[0])
+    tempo = pd.date_range("2022-03-01", "2022-03-31 23:45", freq="15min")
+    lote = tmp_path / "inversor.csv"
+    pd.DataFrame({"Tempo": tempo, "Unidade": unidade, "Geração (kWh)": np.full(len(tempo), 0.5)}).to_csv(lote, index=False)
+    return ingerir_lote(planilha, str(lote)), unidade
+
+def test_nivel_fino_so_com_todas_as_unidades(com_inversor):
+    dados, unidade = com_inversor
+    unidades = [str(u) for u in dados.fotovoltaico["Unidade"].cat.categories]
+    nivel, serie = dados.piramide.serie("2022-03-01", "2022-03-31")
+    assert nivel == "mes"
+    assert sorted(serie["Unidade"].astype(str).unique()) == sorted(unidades)
+    totais = dados.indice_fotovoltaico.geral.totais("2022-03-01", "2022-03-31")
+    assert serie["Geração (kWh)"].sum() == pytest.approx(totais["Geração (kWh)"])
+
+def test_nivel_fino_para_a_unidade_com_leituras(com_inversor):
+    dados, unidade = com_inversor
+    nivel, serie = dados.piramide.serie("2022-03-01", "2022-03-31 23:00", [unidade])
+    assert nivel == "hora"
+    assert serie["Geração (kWh)"].sum() == pytest.approx(31 * 24 * 4 * 0.5)
+    totais = dados.indice_fotovoltaico.unidades[unidade].totais("2022-03-01", "2022-03-31")
+    assert serie["Geração (kWh)"].sum() == pytest.approx(totais["Geração (kWh)"])
+
+def test_janela_alem_das_leituras_volta_ao_mes(com_inversor):
+    dados, unidade = com_inversor
+    nivel, _ = dados.piramide.serie("2022-02-01", "2022-03-31", [unidade])
+    assert nivel == "mes"
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+from motor_kpis import carregar_dados
+from motor_kpis.previsao import FRACAO_PARADA, MESES_TENDENCIA, ModeloSazonal, ajustar_sazonal
+
+MESES = 48
+PERFIL = 1 + 0.3 * np.sin(2 * np.pi * np.arange(12) / 12)
+PERFIL /= PERFIL.mean()
+
+def _matriz(niveis, inclinacoes, mes_inicial=1):
+    # Geração exata (a + b·t)·s[mês], sem ruído; o ajuste alterna retas e
+    # perfis por ITERACOES passadas, então a volta é aproximada
+    t = np.arange(MESES)
+    mes = (mes_inicial - 1 + t) % 12
+    return (np.asarray(niveis)[:, None] + np.asarray(inclinacoes)[:, None] * t) * PERFIL[mes]
+
+@pytest.mark.parametrize("mes_inicial", [1, 7])
+def test_recupera_nivel_inclinacao_e_perfil(mes_inicial):
+    niveis, inclinacoes = [1000.0, 400.0, 2500.0], [5.0, -2.0, 0.0]
+    nivel, inclinacao, sazonal = ajustar_sazonal(_matriz(niveis, inclinacoes, mes_inicial), mes_inicial)
+    np.testing.assert_allclose(nivel, niveis, rtol=1e-3)
+    np.testing.assert_allclose(inclinacao, inclinacoes, rtol=1e-3, atol=1e-2)
+    np.testing.assert_allclose(sazonal, np.tile(PERFIL, (3, 1)), rtol=1e-3)
+
+def test_meses_parados_e_parciais_ficam_de_fora():
+    matriz = _matriz([1000.0, 800.0], [5.0, 3.0])
+    mediana = np.median(matriz[0])
+    sujo, sem_leitura = matriz.copy(), matriz.copy()
+    # Parado (zero) e parcial (abaixo de FRACAO_PARADA da mediana) contam
+    # como meses sem leitura
+    sujo[0, [3, 17]] = 0.0
+    sujo[0, [8, 30]] = 0.5 * FRACAO_PARADA * mediana
+    sem_leitura[0, [3, 17, 8, 30]] = np.nan
+    nivel, inclinacao, sazonal = ajustar_sazonal(sujo, 1)
+    for esperado, obtido in zip(ajustar_sazonal(sem_leitura, 1), (nivel, inclinacao, sazonal)):
+        np.testing.assert_allclose(obtido, esperado, rtol=1e-9)
+    np.testing.assert_allclose(nivel, [1000.0, 800.0], rtol=1e-3)
+    np.testing.assert_allclose(inclinacao, [5.0, 3.0], rtol=1e-3)
+
+def test_unidade_com_pouco_historico_fica_sem_tendencia():
+    matriz = _matriz([1000.0, 600.0], [5.0, 8.0])
+    # A segunda unidade só tem leituras nos últimos meses
+    matriz[1, : MESES - (MESES_TENDENCIA - 1)] = np.nan
+    nivel, inclinacao, _ = ajustar_sazonal(matriz, 1)
+    assert inclinacao[0] == pytest.approx(5.0, rel=0.05)
+    assert inclinacao[1] == 0.0
+    assert nivel[1] > 0
+
+def test_variacao_sem_geracao_recente_e_nan():
+    unidades = pd.Index(["A", "B"], name="Unidade")
+    modelo = ModeloSazonal(
+        unidades=unidades, inicio=pd.Timestamp("2022-01-01"), fim=pd.Timestamp("2023-12-01"),
+        nivel=np.array([100.0, 100.0]), inclinacao=np.zeros(2), sazonal=np.ones((2, 12)), tarifa=pd.Series(0.8, index=unidades),
+        ultimos=pd.DataFrame({"Geração (kWh)": [0.0, 1000.0], "Receita (R$)": [0.0, 800.0]}, index=unidades),
+    )
+    tabela = modelo.comparativo().set_index("Unidade")
+    assert np.isnan(tabela.loc["A", "Variação %"])
+    assert tabela.loc["B", "Variação %"] == pytest.approx(20.0)
+    assert tabela.loc["B", "Previsão Receita (R$)"] == pytest.approx(1200 * 0.8)
+
+def test_previsao_dos_dados_carregados(planilha):
+    previsao = carregar_dados(planilha).previsao
+    futuro = previsao.prever()
+    assert len(futuro) == 12 * len(previsao.unidades)
+    assert futuro["Tempo"].min() == previsao.fim + pd.DateOffset(months=1)
+    assert (futuro["Geração (kWh)"] >= 0).all()
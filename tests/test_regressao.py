@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from motor_kpis import carregar_dados
+from motor_kpis.regressao import somas_regressao
+
+def _viagens(semente=0, linhas=300):
+    rng = np.random.default_rng(semente)
+    # km grande e pouco disperso: sem centrar, Σx² e (Σx)²/n se cancelam
+    km = 1e6 + rng.normal(0.0, 50.0, linhas)
+    df = pd.DataFrame({
+        "Tempo": pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 365, linhas), unit="D"),
+        "km": km,
+        "kWh": 3.0 + 1.2 * (km - 1e6) + rng.normal(0.0, 20.0, linhas),
+    })
+    df.loc[rng.random(linhas) < 0.1, "km"] = np.nan
+    df.loc[rng.random(linhas) < 0.1, "kWh"] = np.nan
+    return df
+
+def _esperado(df, inicio, fim):
+    recorte = df[df["Tempo"].between(inicio, fim)].dropna(subset=["km", "kWh"])
+    x, y = recorte["km"].to_numpy(), recorte["kWh"].to_numpy()
+    # OLS pelos mínimos quadrados do NumPy, sobre a matriz [1, x]
+    (intercepto, inclinacao), *_ = np.linalg.lstsq(np.column_stack([np.ones_like(x), x]), y, rcond=None)
+    return len(recorte), inclinacao, intercepto, recorte["km"].corr(recorte["kWh"])
+
+def test_ajuste_igual_ao_ols():
+    df = _viagens()
+    somas = somas_regressao(df, "km", "kWh")
+    rng = np.random.default_rng(1)
+    tempos = np.sort(df["Tempo"].unique())
+    for _ in range(40):
+        i, j = sorted(rng.integers(0, len(tempos), 2))
+        if j - i < 10:
+            continue
+        inicio, fim = pd.Timestamp(tempos[i]), pd.Timestamp(tempos[j])
+        ajuste = somas.ajuste(inicio, fim)
+        n, inclinacao, intercepto, correlacao = _esperado(df, inicio, fim)
+        assert ajuste.n == n
+        assert ajuste.inclinacao == pytest.approx(inclinacao, rel=1e-6)
+        assert ajuste.intercepto == pytest.approx(intercepto, rel=1e-6)
+        assert ajuste.correlacao == pytest.approx(correlacao, rel=1e-6)
+        assert ajuste.r2 == pytest.approx(correlacao ** 2, rel=1e-6)
+
+def test_ajuste_com_poucos_pontos():
+    df = _viagens()
+    somas = somas_regressao(df, "km", "kWh")
+    vazio = somas.ajuste("2020-01-01", "2020-12-31")
+    assert vazio.n == 0 and np.isnan(vazio.inclinacao) and np.isnan(vazio.correlacao)
+    # x constante: sem reta nem correlação
+    constante = somas_regressao(df.assign(km=5.0), "km", "kWh").ajuste("2023-01-01", "2023-12-31")
+    assert constante.n > 2 and np.isnan(constante.inclinacao) and np.isnan(constante.correlacao)
+
+def test_regressao_dos_dados_carregados(planilha):
+    dados = carregar_dados(planilha)
+    for tipo, df in dados.onibus.items():
+        inicio, fim = df["Tempo"].min(), df["Tempo"].max()
+        ajuste = dados.regressao_onibus[tipo].ajuste(inicio, fim)
+        n, inclinacao, intercepto, correlacao = _esperado(df, inicio, fim)
+        assert ajuste.n == n
+        assert ajuste.inclinacao == pytest.approx(inclinacao, rel=1e-9)
+        assert ajuste.intercepto == pytest.approx(intercepto, rel=1e-9, abs=1e-9)
+        assert ajuste.correlacao == pytest.approx(correlacao, rel=1e-9)
@@ -0,0 +1,69 @@
+import json
+import pandas as pd
+from motor_kpis import carregar_dados, impressao_digital
+import gerar_relatorios
+from gerar_relatorios import listar_tarefas, salvar_manifesto
+
+def _filtrar(df, ano, mes, unidade):
+    filtro = df["Ano"] == ano
+    if mes is not None:
+        filtro &= df["MesNum"] == mes
+    if unidade is not None:
+        filtro &= df["Unidade"] == unidade
+    return df[filtro]
+
+def test_tarefas_iguais_ao_filtro_por_tarefa(planilha, tmp_path):
+    df = carregar_dados(planilha).fotovoltaico
+    tarefas = {tarefa: impressao for tarefa, _, impressao in listar_tarefas(df, str(tmp_path))}
+    anos = sorted(int(a) for a in df["Ano"].dropna().unique())
+    unidades = list(df["Unidade"].unique())
+    esperado = {}
+    for ano in anos:
+        meses = sorted(int(m) for m in df.loc[df["Ano"] == ano, "MesNum"].dropna().unique())
+        for mes in [None] + meses:
+            for unidade in [None] + unidades:
+                parte = _filtrar(df, ano, mes, unidade)
+                if not parte.empty:
+                    esperado[(ano, mes, unidade)] = impressao_digital(parte)
+    # As impressões não mudam: manifestos antigos continuam valendo
+    assert {tarefa[:3]: impressao for tarefa, impressao in tarefas.items()} == esperado
+
+def test_tarefas_de_um_ano(planilha, tmp_path):
+    df = carregar_dados(planilha).fotovoltaico
+    ano = int(df["Ano"].max())
+    tarefas = list(listar_tarefas(df, str(tmp_path), [ano]))
+    assert {tarefa[0] for tarefa, _, _ in tarefas} == {ano}
+    # As posições apontam para as linhas do frame inteiro
+    for (ano, mes, unidade, _, _), posicoes, impressao in tarefas:
+        pd.testing.assert_frame_equal(df.iloc[posicoes], _filtrar(df, ano, mes, unidade))
+        assert impressao_digital(df.iloc[posicoes]) == impressao
+
+def test_pdf_do_grupo(planilha, tmp_path, monkeypatch):
+    df = carregar_dados(planilha).fotovoltaico
+    recebidos = []
+    monkeypatch.setattr(gerar_relatorios, "_df_fv", df)
+    monkeypatch.setattr(gerar_relatorios, "gerar_pdf_kpis", lambda parte, desc: recebidos.append(parte) or b"%PDF")
+    (ano, mes, unidade, desc, arquivo), posicoes, _ = next(
+        t for t in listar_tarefas(df, str(tmp_path)) if t[0][1] is not None and t[0][2] is not None)
+    assert gerar_relatorios._gerar(posicoes, desc, arquivo) == arquivo
+    pd.testing.assert_frame_equal(recebidos[0], _filtrar(df, ano, mes, unidade))
+    assert open(arquivo, "rb").read() == b"%PDF"
+
+def test_versao_modelo_muda_com_o_relatorio(tmp_path, monkeypatch):
+    from motor_kpis import relatorio
+    antes = relatorio.versao_modelo()
+    assert relatorio.versao_modelo() == antes
+    logo = tmp_path / "logo.png"
+    logo.write_bytes(b"logo 1")
+    monkeypatch.setattr(relatorio, "LOGO_PDF", str(logo))
+    com_logo = relatorio.versao_modelo()
+    assert com_logo != antes
+    logo.write_bytes(b"logo 2, outra")
+    assert relatorio.versao_modelo() != com_logo
+
+def test_salvar_manifesto(tmp_path):
+    caminho = tmp_path / "relatorios" / "manifesto.json"
+    salvar_manifesto(str(caminho), {"2024/a.pdf": "1"})
+    salvar_manifesto(str(caminho), {"2024/a.pdf": "1", "2024/b.pdf": "2"})
+    assert json.loads(caminho.read_text(encoding="utf-8")) == {"2024/a.pdf": "1", "2024/b.pdf": "2"}
+    assert [p.name for p in caminho.parent.iterdir()] == ["manifesto.json"]
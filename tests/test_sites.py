@@ -0,0 +1,78 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from motor_kpis import COL_TARIFA, carregar_dados
+from motor_kpis.sites import carregar_sites, listar_sites
+from benchmarks.planilha_sintetica import quadros_sinteticos
+
+def _planilha(caminho, tarifa, semente=0):
+    quadros = quadros_sinteticos(unidades=3, anos=2, semente=semente)
+    quadros["Sheet1"][COL_TARIFA] = tarifa
+    with pd.ExcelWriter(caminho, engine="openpyxl") as escritor:
+        for aba, df in quadros.items():
+            df.to_excel(escritor, sheet_name=aba, index=False)
+    return str(caminho)
+
+@pytest.fixture
+def campi(tmp_path):
+    pasta = tmp_path / "campi"
+    pasta.mkdir()
+    _planilha(pasta / "Belém.xlsx", 0.5)
+    _planilha(pasta / "Castanhal.xlsx", 1.0, semente=1)
+    return pasta
+
+def test_listar_sites(campi, tmp_path):
+    (campi / "~$Belém.xlsx").write_bytes(b"")
+    (campi / "notas.txt").write_text("")
+    esperado = {"Belém": str(campi / "Belém.xlsx"), "Castanhal": str(campi / "Castanhal.xlsx")}
+    assert listar_sites(str(campi)) == esperado
+    manifesto = tmp_path / "campi.json"
+    manifesto.write_text(json.dumps({"Belém": "campi/Belém.xlsx", "Castanhal": "campi/Castanhal.xlsx"}),
+                         encoding="utf-8")
+    assert {site: os.path.normpath(c) for site, c in listar_sites(str(manifesto)).items()} == esperado
+    assert listar_sites(str(campi / "Belém.xlsx")) == {"Belém": str(campi / "Belém.xlsx")}
+
+def test_planilha_sozinha_sem_site(campi):
+    caminho = str(campi / "Belém.xlsx")
+    dados = carregar_sites(caminho)
+    assert dados is carregar_dados(caminho)
+    assert "Site" not in dados.fotovoltaico.columns and not dados.sites
+    assert dados.site_das_unidades is None
+
+def test_unidades_com_o_campus_no_nome(campi):
+    dados = carregar_sites(str(campi), threads=2)
+    assert list(dados.sites) == ["Belém", "Castanhal"]
+    assert sorted(dados.indice_fotovoltaico.unidades) == sorted(
+        f"Unidade {i:03d} ({site})" for i in (1, 2, 3) for site in ("Belém", "Castanhal"))
+    assert list(dados.fotovoltaico["Site"].cat.categories) == ["Belém", "Castanhal"]
+    assert dados.site_das_unidades["Unidade 002 (Castanhal)"] == "Castanhal"
+    belem = dados.fotovoltaico[dados.fotovoltaico["Site"] == "Belém"]
+    assert belem["Geração (kWh)"].sum() == pytest.approx(dados.sites["Belém"].fotovoltaico["Geração (kWh)"].sum())
+
+def test_tarifa_de_cada_campus(campi):
+    dados = carregar_sites(str(campi))
+    # Sem média entre os campi: Receita e previsão com a tarifa do campus
+    assert set(dados.fatores_da_unidade("Unidade 001 (Belém)")["Tarifa (R$/kWh)"]) == {0.5}
+    assert set(dados.fatores_da_unidade("Unidade 001 (Castanhal)")["Tarifa (R$/kWh)"]) == {1.0}
+    tarifa = dados.previsao.tarifa
+    assert tarifa["Unidade 003 (Belém)"] == pytest.approx(0.5)
+    assert tarifa["Unidade 003 (Castanhal)"] == pytest.approx(1.0)
+    totais = dados.previsao.totais()
+    np.testing.assert_allclose(totais["Receita (R$)"], totais["Geração (kWh)"] * tarifa.to_numpy())
+    fv = dados.fotovoltaico
+    razao = (fv["Receita (R$)"] / fv["Geração (kWh)"]).groupby(fv["Site"], observed=True).mean()
+    assert razao.to_dict() == pytest.approx({"Belém": 0.5, "Castanhal": 1.0})
+
+def test_cada_campus_memorizado(campi):
+    primeiro = carregar_sites(str(campi))
+    assert carregar_sites(str(campi)) is primeiro
+    _planilha(campi / "Castanhal.xlsx", 1.2, semente=2)
+    segundo = carregar_sites(str(campi))
+    assert segundo is not primeiro and segundo.versao != primeiro.versao
+    # Só o campus alterado é recarregado
+    assert segundo.sites["Belém"] is primeiro.sites["Belém"]
+    assert segundo.sites["Castanhal"] is not primeiro.sites["Castanhal"]
+    assert dict(segundo.previsao.tarifa.groupby(segundo.site_das_unidades).mean()) == pytest.approx(
+        {"Belém": 0.5, "Castanhal": 1.2})